@@ -1,18 +1,68 @@
 import json
 import logging
 import os
+import time
 import pytest
+import allure
 import configparser
+import warnings
+from dataclasses import replace
+from pathlib import Path
+from urllib.parse import urlsplit
+from _pytest.skipping import evaluate_skip_marks
 from selenium.webdriver import Chrome
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from requests import Session
+from tests.support.api_cassette import API_MODES, CassetteStore, install_cassette
+from tests.support.latency_baseline import (
+    INFO_PREFIX, BaselineStore, LatencyRecorder, activate, compare, comparisons_csv, record_latency
+)
+from tests.support.corpus import Corpus, CorpusSpec
+from tests.support.http_transport import (
+    PrefetchRunner, TransportStats, TunedAdapter, in_prefetch_thread
+)
+from tests.support.capture import CaptureService, current_service
+from tests.support.circuit_breaker import CLOSED, HealthBoard, current_board, http_probe, note_response
+from tests.support.circuit_breaker import activate as activate_health
+from tests.support.capture import activate as activate_capture
+from tests.support.tracing import Tracer, current_tracer
+from tests.support.tracing import activate as activate_tracing
+from tests.support.browser_pool import BrowserPool, pool_stats_key
+from tests.support.driver_resolver import resolver_from_config
+from tests.support.harness_bench import BenchSettings, HarnessTargets, StaticPageServer
+from tests.support.har_archive import RECORD_BUFFERS, UI_MODES, HarArchive, MatchRules, har_name, record_har
+from tests.support.network_profiles import apply_profile, load_profiles, network_stats, read_performance_log
+from tests.support.page_state import PageStateCache, config_fingerprint
+from tests.support.replay_proxy import MAX_REPORTED_MISSES, ReplayProxy, self_signed_context
+from tests.support.run_profiles import RunSettings, available_profiles, resolve
+from tests.support.scheduling import DurationEstimator, longest_first, lpt_partition, shard_summary
+from tests.support.soak import SoakRecorder, current_recorder, iteration_schedule, sample_browser
+from tests.support.soak import activate as activate_soak
+from tests.support.stand_in_server import StandInServer
+from tests.support.structured_logging import LogSettings, begin_test, end_test, failure_log
+from tests.support.structured_logging import configure as configure_logging
+from tests.support.structured_logging import shutdown as shutdown_logging
+from tests.support.tab_host import ResourceMonitor, TabHost, TabPool, comparison_lines, open_tab, save_run
+from tests.support.waits import start_budget, stop_budget
+from tests.support.waits import configure as configure_waits
+from tests.support.web_vitals import WebVitalsCollector, WebVitalsHistory, current_collector, install_observer
+from tests.support.web_vitals import activate as activate_web_vitals
+from tests.support.web_vitals import thresholds_from_config
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+latency_regressions_key = pytest.StashKey[list]()
+network_stats_key = pytest.StashKey[dict]()
+shard_plan_key = pytest.StashKey[list]()
+transport_stats_key = pytest.StashKey[TransportStats]()
+config_key = pytest.StashKey[configparser.ConfigParser]()
+run_settings_key = pytest.StashKey[RunSettings]()
+replay_misses_key = pytest.StashKey[list]()
+tab_host_key = pytest.StashKey[TabHost]()
+resource_monitor_key = pytest.StashKey[ResourceMonitor]()
+resource_summary_key = pytest.StashKey[list]()
+
 
 def pytest_addoption(parser):
     """Добавление кастомных опций для pytest"""
@@ -22,6 +72,399 @@ def pytest_addoption(parser):
     parser.addoption(
         "--api", action="store_true", help="Запуск только API-тестов"
     )
+    parser.addoption(
+        "--profile", default=None,
+        help="Профиль прогона из секций [profile:<имя>] config.ini: smoke-fast, full, soak"
+    )
+    parser.addoption(
+        "--api-mode", choices=API_MODES, default=None,
+        help="Режим API-тестов: live (сеть), record (сеть + запись кассеты), replay (из кассеты)"
+    )
+    parser.addoption(
+        "--ui-mode", choices=UI_MODES, default=None,
+        help="Режим UI-тестов: live (сеть), record (сеть + запись HAR), replay (из HAR через локальный прокси)"
+    )
+    parser.addoption(
+        "--tabs", action="store_true",
+        help="UI-тесты во вкладках одного Chrome: у каждого воркера xdist своя изолированная вкладка"
+    )
+    parser.addoption(
+        "--load", action="store_true", help="Запуск нагрузочного теста API поиска"
+    )
+    parser.addoption(
+        "--network-profile", default=None,
+        help="Профиль блокировки ресурсов в UI-тестах: full, no-media, functional-only или из config.ini"
+    )
+    parser.addoption(
+        "--shard-index", type=int, default=None,
+        help="Номер шарда (с 0): выполняются только его тесты, распределённые по длительности"
+    )
+    parser.addoption(
+        "--shard-count", type=int, default=None, help="Число шардов для --shard-index"
+    )
+    parser.addoption(
+        "--corpus-shard", default="1/1",
+        help="Доля корпусов запросов для этого процесса в виде N/M (строки делятся по хешу)"
+    )
+    parser.addoption(
+        "--soak-iterations", type=int, default=None,
+        help="Режим выносливости: число проходов UI-тестов на одном браузере (0 — пока не истечёт --soak-duration)"
+    )
+    parser.addoption(
+        "--soak-duration", type=float, default=None,
+        help="Режим выносливости: длительность повторов UI-тестов в секундах"
+    )
+    parser.addoption(
+        "--bench", action="store_true", help="Запустить замеры накладных расходов стенда (маркер harness_bench)"
+    )
+    parser.addoption(
+        "--update-baseline", action="store_true",
+        help="Дописать задержки текущего прогона в базовую линию"
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Загрузка конфигурации, применение профиля прогона и включение трассировки WebDriver"""
+    settings = config.stash[config_key] = load_config()
+    profile = config.getoption("--profile") or settings.get('run', 'profile', fallback='full')
+    if profile not in available_profiles(settings):
+        raise pytest.UsageError(
+            f"Неизвестный профиль {profile}, доступны: {', '.join(available_profiles(settings))}"
+        )
+    run_settings = config.stash[run_settings_key] = apply_cli_overrides(config, resolve(settings, profile))
+    # Журнал настраивается после профиля: профиль может переопределить секцию [logging]
+    configure_logging(LogSettings.from_config(settings), Path(__file__).parent)
+    configure_waits(run_settings.waits)
+    apply_run_selection(config, run_settings)
+    ui_mode = config.getoption("--ui-mode") or settings.get('ui_replay', 'mode', fallback='live')
+    if run_settings.tabs.enabled and ui_mode == "replay":
+        raise pytest.UsageError("Режим вкладок не совместим с --ui-mode=replay: прокси задаётся при запуске Chrome")
+    if run_settings.soak.enabled:
+        if hasattr(config, "workerinput") or getattr(config.option, "numprocesses", None):
+            logger.warning("Режим выносливости не поддерживается с xdist и отключён")
+        else:
+            activate_soak(SoakRecorder(run_settings.soak))
+    if run_settings.health.enabled:
+        api_mode = config.getoption("--api-mode") or settings.get('api', 'mode', fallback='live')
+        activate_health(create_health_board(settings, run_settings.health, ui_mode, api_mode))
+    if settings.getboolean('tracing', 'enabled', fallback=False):
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+        activate_tracing(Tracer(
+            process_name=f"pytest {worker}",
+            max_events=settings.getint('tracing', 'max_events', fallback=100_000),
+            top_n=settings.getint('tracing', 'top_n', fallback=10),
+        ))
+
+
+def create_health_board(settings, health, ui_mode="live", api_mode="live"):
+    """Предохранители UI- и API-тестов с проверкой сайта и API одним HTTP-запросом.
+
+    Категория в режиме replay не ходит на сайт, поэтому предохранитель и проверки для неё не создаются.
+    """
+    probes = {}
+    if ui_mode != "replay":
+        probes["ui"] = http_probe(settings['base']['base_url'], health.probe_timeout, health.captcha_markers)
+    if api_mode != "replay":
+        probes["api"] = http_probe(settings['base']['api_url'], health.probe_timeout)
+    return HealthBoard(health, probes)
+
+
+def pytest_unconfigure(config):
+    """Запись оставшихся сообщений журнала в файл"""
+    shutdown_logging()
+
+
+def apply_run_selection(config, run_settings):
+    """Маркеры и число воркеров xdist из профиля, если они не заданы в командной строке"""
+    if run_settings.markers and not config.option.markexpr:
+        config.option.markexpr = run_settings.markers
+    # Воркеры xdist получают опции от координатора и сами воркеров не запускают
+    if (
+        run_settings.workers
+        and config.pluginmanager.hasplugin("xdist")
+        and not hasattr(config, "workerinput")
+        and not config.option.numprocesses
+    ):
+        # То же, что делает xdist для -n в pytest_cmdline_main (он выполняется раньше conftest)
+        config.option.numprocesses = run_settings.workers
+        if config.option.dist == "no":
+            config.option.dist = "load"
+        config.option.tx = ["popen"] * run_settings.workers
+
+
+def apply_cli_overrides(config, run_settings):
+    """Число проходов и длительность soak-прогона, режим вкладок из командной строки важнее профиля"""
+    if config.getoption("--tabs"):
+        run_settings = replace(run_settings, tabs=replace(run_settings.tabs, enabled=True))
+    overrides = {}
+    if config.getoption("--soak-iterations") is not None:
+        overrides["iterations"] = config.getoption("--soak-iterations")
+    if config.getoption("--soak-duration") is not None:
+        overrides["duration"] = config.getoption("--soak-duration")
+    if not overrides:
+        return run_settings
+    return replace(run_settings, soak=replace(run_settings.soak, **overrides))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session):
+    """Soak-прогон: все тесты один раз, затем повторы UI-тестов на том же браузере"""
+    recorder = current_recorder()
+    if recorder is None or session.config.option.collectonly:
+        return None
+    if session.testsfailed and not session.config.option.continue_on_collection_errors:
+        raise session.Interrupted(f"{session.testsfailed} error(s) during collection")
+    for item, nextitem in iteration_schedule(session.items, recorder, lambda item: "ui" in item.keywords):
+        item.config.hook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+        if session.shouldfail:
+            raise session.Failed(session.shouldfail)
+        if session.shouldstop:
+            raise session.Interrupted(session.shouldstop)
+    return True
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionstart(session):
+    """Главный процесс: монитор ресурсов прогона и общий Chrome для режима вкладок"""
+    config = session.config
+    if hasattr(config, "workerinput") or config.option.collectonly:
+        return
+    run_settings = config.stash[run_settings_key]
+    config.stash[resource_monitor_key] = ResourceMonitor(run_settings.tabs.monitor_interval).start()
+    if run_settings.tabs.enabled:
+        config.stash[tab_host_key] = start_tab_host(config.stash[config_key], run_settings)
+
+
+def start_tab_host(settings, run_settings):
+    """Запускает общий Chrome, к сессии которого подключаются вкладки воркеров"""
+    driver = create_chrome(
+        settings, run_settings, resolver_from_config(settings).resolve(), load_profiles(settings)["full"],
+        # Сессия не ждёт загрузку страниц: вкладки ждут её сами, не держа общую блокировку команд
+        page_load_strategy="none",
+    )
+    worker_dir = Path(__file__).parent / ".tabs" / str(os.getpid())
+    host = TabHost(driver, worker_dir)
+    logger.info("Общий Chrome для режима вкладок запущен: сессия %s", driver.session_id)
+    return host
+
+
+def pytest_report_header(config):
+    run_settings = config.stash.get(run_settings_key, None)
+    return run_settings.summary() if run_settings is not None else None
+
+
+@pytest.fixture(scope="session")
+def run_settings(request):
+    """Фикстура настроек прогона после применения профиля"""
+    return request.config.stash[run_settings_key]
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Сохранение трассы WebDriver, временного ряда soak-прогона, фронтенд-метрик страниц, ресурсов прогона
+    и замеров воркеров в базовой линии задержек"""
+    finish_resource_monitor(session.config)
+    merge_baseline_parts(session.config)
+    collector = current_collector()
+    if collector is not None:
+        collector.save(os.environ.get("PYTEST_XDIST_WORKER", "main"))
+    recorder = current_recorder()
+    if recorder is not None and recorder.samples:
+        output_dir = Path(__file__).parent / recorder.settings.output_dir
+        logger.info("Временной ряд soak-прогона сохранён: %s", recorder.write(output_dir))
+    tracer = current_tracer()
+    if tracer is None or not tracer.commands.count:
+        return
+    settings = session.config.stash[config_key]
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    output_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        settings.get('tracing', 'output_dir', fallback='traces')
+    )
+    tracer.write(os.path.join(output_dir, f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{worker}.json"))
+
+
+def merge_baseline_parts(config):
+    """Главный процесс дописывает в базовую линию замеры, сохранённые воркерами xdist"""
+    if hasattr(config, "workerinput") or not config.getoption("--update-baseline"):
+        return
+    settings = config.stash[config_key]
+    store = BaselineStore(baseline_path(settings), max_samples=settings.getint('baseline', 'max_samples', fallback=200))
+    merged = store.merge_parts()
+    if merged:
+        logger.info("Замеры %s воркеров дописаны в базовую линию задержек", merged)
+
+
+def finish_resource_monitor(config):
+    """Останавливает монитор ресурсов и общий Chrome; сравнение с другим режимом — в итоговый отчёт"""
+    host = config.stash.get(tab_host_key, None)
+    if host is not None:
+        host.close()
+    monitor = config.stash.get(resource_monitor_key, None)
+    if monitor is None:
+        return
+    monitor.stop()
+    # Отчёты воркеров xdist тоже приходят в главный процесс
+    stats = config.pluginmanager.get_plugin("terminalreporter").stats
+    monitor.tests = sum(
+        1 for outcome in ("passed", "failed", "xfailed", "xpassed") for report in stats.get(outcome, [])
+        if getattr(report, "when", None) == "call" and "ui" in report.keywords
+    )
+    if not monitor.tests:
+        return
+    run_settings = config.stash[run_settings_key]
+    run = monitor.record(
+        "tabs" if run_settings.tabs.enabled else "processes", getattr(config.option, "numprocesses", None) or 1
+    )
+    history = save_run(Path(__file__).parent / run_settings.tabs.history, run, run_settings.tabs.history_runs)
+    config.stash[resource_summary_key] = comparison_lines(run, history)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Записи журнала и спан теста в трассе помечаются идентификатором теста"""
+    begin_test(item.nodeid)
+    tracer = current_tracer()
+    if tracer is None:
+        yield
+        end_test()
+        return
+    tracer.current_test = item.nodeid
+    with tracer.span(item.nodeid, "test"):
+        yield
+    tracer.current_test = None
+    tracer.end_test(item.nodeid)
+    end_test()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    """Спан подготовки фикстуры в трассе"""
+    tracer = current_tracer()
+    if tracer is None:
+        yield
+        return
+    with tracer.span(f"fixture:{fixturedef.argname}", "fixture", {"scope": fixturedef.scope}):
+        yield
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Вывод статистики пула, трассировки, трафика, шардов и регрессий задержек в итоговый отчёт"""
+    shard_plan = config.stash.get(shard_plan_key, None)
+    if shard_plan:
+        terminalreporter.section("Распределение по шардам")
+        for line in shard_plan:
+            terminalreporter.write_line(line)
+    stats = config.stash.get(pool_stats_key, None)
+    if stats is not None:
+        terminalreporter.section("Пул браузеров")
+        for line in stats.summary_lines():
+            terminalreporter.write_line(line)
+    tracer = current_tracer()
+    if tracer is not None and tracer.commands.count:
+        terminalreporter.section("Самые медленные команды WebDriver")
+        top_n = config.stash[config_key].getint('tracing', 'top_n', fallback=10)
+        for line in tracer.slowest_summary(limit=top_n).splitlines():
+            terminalreporter.write_line(line)
+        if tracer.path:
+            terminalreporter.write_line(f"Трасса: {tracer.path} (chrome://tracing или Perfetto)")
+    network_stats = config.stash.get(network_stats_key, {})
+    if network_stats:
+        terminalreporter.section("Сетевой трафик UI-тестов")
+        for test_id, test_stats in network_stats.items():
+            terminalreporter.write_line(f"{test_id}: {test_stats.summary()}")
+    transport_stats = config.stash.get(transport_stats_key, None)
+    if transport_stats is not None and transport_stats.requests:
+        terminalreporter.section("HTTP-транспорт API")
+        for line in transport_stats.summary_lines():
+            terminalreporter.write_line(line)
+    board = current_board()
+    if board is not None and board.summary_lines():
+        terminalreporter.section("Предохранитель: сбои стенда")
+        for line in board.summary_lines():
+            terminalreporter.write_line(line)
+    resource_summary = config.stash.get(resource_summary_key, [])
+    if resource_summary:
+        terminalreporter.section("Ресурсы UI-прогона")
+        for line in resource_summary:
+            terminalreporter.write_line(line)
+    misses = config.stash.get(replay_misses_key, [])
+    if misses:
+        terminalreporter.section("Воспроизведение UI: запросы без записи в HAR")
+        for miss in misses[:MAX_REPORTED_MISSES]:
+            terminalreporter.write_line(f"{miss.test_id}: {miss}")
+        if len(misses) > MAX_REPORTED_MISSES:
+            terminalreporter.write_line(f"... и ещё {len(misses) - MAX_REPORTED_MISSES}")
+    collector = current_collector()
+    if collector is not None and collector.samples:
+        terminalreporter.section("Фронтенд-метрики страниц (медианы за прогон)")
+        for line in collector.summary_lines():
+            terminalreporter.write_line(line)
+    recorder = current_recorder()
+    if recorder is not None and recorder.samples:
+        terminalreporter.section("Soak-прогон: рост памяти браузера")
+        for line in recorder.summary_lines():
+            terminalreporter.write_line(line)
+    regressions = config.stash.get(latency_regressions_key, [])
+    if regressions:
+        terminalreporter.section("Регрессии задержек")
+        for test_id, comparison in regressions:
+            terminalreporter.write_line(
+                f"{test_id} {comparison.metric}: {comparison.baseline_median:.1f} -> "
+                f"{comparison.current_median:.1f} мс ({comparison.change_pct:+.1f}%, {comparison.status})"
+            )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Тесты категории с разомкнутым предохранителем не запускаются: ни браузера, ни ожиданий"""
+    board = current_board()
+    if board is None:
+        return
+    reason = board.begin_test(item.nodeid, item.keywords)
+    if reason is None:
+        return
+    if board.settings.action == "fail":
+        pytest.fail(reason, pytrace=False)
+    pytest.skip(reason)
+
+
+# trylast: отчёт меняется раньше, чем его прочитают обёртки других плагинов (allure-pytest)
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_makereport(item, call):
+    """Проверки задержек и фронтенд-метрик после вызова теста, журнал и снимок при падении, сводка команд WebDriver,
+    фоновые вложения и учёт сбоев стенда"""
+    outcome = yield
+    report = outcome.get_result()
+    if report.when == "call":
+        check_latency(item, report)
+        check_web_vitals(item, report)
+    if report.failed:
+        log = failure_log()
+        if log is not None:
+            # JSON Lines: по записи на строку, с идентификаторами теста и воркера
+            allure.attach(log, name=f"Журнал теста ({report.when})", attachment_type=allure.attachment_type.TEXT)
+    board = current_board()
+    if board is not None:
+        board.finish_phase(report.when, report.outcome, call.excinfo.value if call.excinfo else None)
+    tracer = current_tracer()
+    if tracer is not None and report.when == "call" and tracer.command_count(item.nodeid):
+        top_n = item.config.stash[config_key].getint('tracing', 'top_n', fallback=10)
+        allure.attach(
+            tracer.slowest_summary(item.nodeid, limit=top_n),
+            name="Самые медленные команды WebDriver",
+            attachment_type=allure.attachment_type.TEXT
+        )
+    service = current_service()
+    if service is None:
+        return
+    if report.failed and report.when in ("setup", "call"):
+        driver = item.funcargs.get("driver")
+        if driver is not None:
+            service.capture_failure(driver)
+    # Бюджет вложений и дедупликация снимков действуют на весь тест, поэтому сброс — один раз, после teardown
+    if report.when == "teardown":
+        service.flush()
 
 
 def pytest_collection_modifyitems(config, items):
@@ -32,70 +475,647 @@ def pytest_collection_modifyitems(config, items):
             if "api" in item.keywords:
                 item.add_marker(skip_api)
 
+    if not config.getoption("--load"):
+        skip_load = pytest.mark.skip(reason="Нагрузочный тест запускается с опцией --load")
+        for item in items:
+            if "api_load" in item.keywords:
+                item.add_marker(skip_load)
+
+    if not config.getoption("--bench"):
+        skip_bench = pytest.mark.skip(reason="Замеры накладных расходов стенда запускаются с опцией --bench")
+        for item in items:
+            if "harness_bench" in item.keywords:
+                item.add_marker(skip_bench)
+
     if config.getoption("--api"):
         skip_ui = pytest.mark.skip(reason="Пропуск UI-тестов")
         for item in items:
             if "ui" in item.keywords:
                 item.add_marker(skip_ui)
 
+    schedule_by_duration(config, items)
 
-@pytest.fixture(scope="session")
-def config_data():
-    """Фикстура для загрузки конфигурации"""
+
+def schedule_by_duration(config, items):
+    """Сортировка тестов по убыванию длительности из истории Allure (для xdist) и разбиение на шарды (LPT)"""
+    shard_count = config.getoption("--shard-count")
+    shard_index = config.getoption("--shard-index")
+    if (shard_count is None) != (shard_index is None):
+        raise pytest.UsageError("--shard-index и --shard-count задаются вместе")
+    if shard_count is not None and not 0 <= shard_index < shard_count:
+        raise pytest.UsageError(f"--shard-index должен быть от 0 до {shard_count - 1}")
+    under_xdist = "PYTEST_XDIST_WORKER" in os.environ
+    if shard_count is None and not under_xdist:
+        return
+    estimator = DurationEstimator.from_config(config.stash[config_key], config.rootpath)
+    estimates = estimator.estimate_all(items)
+    if shard_count is None:
+        items[:] = longest_first(items, estimates)
+        return
+    shards = lpt_partition(items, estimates, shard_count)
+    selected = shards[shard_index]
+    selected_ids = {id(item) for item in selected}
+    deselected = [item for item in items if id(item) not in selected_ids]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
+    config.stash[shard_plan_key] = shard_summary(shards, estimates)
+
+
+try:
+    import xdist  # noqa: F401
+except ImportError:
+    pass
+else:
+    from tests.support.scheduling import DurationScheduling
+
+    def pytest_xdist_make_scheduler(config, log):
+        """Раздача тестов воркерам xdist от самых длинных к коротким (только для --dist load)"""
+        if config.getoption("dist") == "load":
+            return DurationScheduling(config, log)
+        return None
+
+    def pytest_configure_node(node):
+        """Передача воркеру адреса сессии общего Chrome (режим вкладок)"""
+        host = node.config.stash.get(tab_host_key, None)
+        if host is not None:
+            node.workerinput["tab_host"] = host.info
+
+
+def load_config():
+    """Загрузка конфигурации из tests/config.ini"""
     config = configparser.ConfigParser()
     config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
     if not os.path.exists(config_path):
-        logger.error(f"Файл конфигурации {config_path} не найден")
+        logger.error("Файл конфигурации %s не найден", config_path)
         raise FileNotFoundError(f"Файл конфигурации {config_path} не найден")
     config.read(config_path, encoding='utf-8')
-    logger.info(f"Конфигурация загружена: {dict(config['selenium'])}")
+    logger.info("Конфигурация загружена: %s", dict(config['selenium']))
     return config
 
 
 @pytest.fixture(scope="session")
-def test_data():
-    """Фикстура для загрузки тестовых данных"""
+def config_data(request):
+    """Фикстура для загрузки конфигурации"""
+    return request.config.stash[config_key]
+
+
+def load_test_data():
+    """Загрузка тестовых данных из tests/test_data.json"""
     base_dir = os.path.dirname(os.path.abspath(__file__))
     test_data_path = os.path.join(base_dir, 'test_data.json')
     try:
         with open(test_data_path, 'r', encoding='utf-8') as file:
-            logger.info(f"Тестовые данные загружены из {test_data_path}")
+            logger.info("Тестовые данные загружены из %s", test_data_path)
             return json.load(file)
     except FileNotFoundError:
-        logger.warning(f"Файл тестовых данных {test_data_path} не найден, возвращается пустой словарь")
+        logger.warning("Файл тестовых данных %s не найден, возвращается пустой словарь", test_data_path)
         return {"ui_tests": [], "api_tests": []}
 
 
-@pytest.fixture(scope="class")
-def driver(config_data):
-    """Фикстура для инициализации WebDriver (только Chrome)."""
-    driver = None
+@pytest.fixture(scope="session")
+def test_data():
+    """Фикстура для загрузки тестовых данных"""
+    return load_test_data()
+
+
+@pytest.fixture(scope="session")
+def bench_settings(config_data):
+    """Фикстура параметров замеров накладных расходов стенда"""
+    return BenchSettings.from_config(config_data)
+
+
+@pytest.fixture(scope="session")
+def harness(request, config_data, run_settings, network_profile):
+    """Фикстура операций стенда для замеров; chromedriver разрешается только тестами, которым нужен браузер"""
+    return HarnessTargets(
+        start_chrome=lambda: create_chrome(
+            config_data, run_settings, request.getfixturevalue("chromedriver_path"), network_profile
+        ),
+        resolve_driver=lambda: resolver_from_config(config_data).resolve(),
+        load_config=load_config,
+        load_test_data=load_test_data,
+    )
+
+
+@pytest.fixture(scope="session")
+def static_page():
+    """Фикстура локальной статической страницы-дублёра (без сети и блокеров)"""
+    with StaticPageServer() as server:
+        yield server
+
+
+def create_chrome(
+    config_data, run_settings, driver_path, network_profile, ui_mode="live", replay_proxy=None,
+    page_load_strategy=None,
+):
+    """Запускает новый экземпляр Chrome с настройками из конфигурации и профиля прогона"""
+    options = ChromeOptions()
+    if run_settings.headless:
+        options.add_argument("--headless=new")
+    if page_load_strategy:
+        options.page_load_strategy = page_load_strategy
+    if replay_proxy is not None:
+        for argument in replay_proxy.chrome_arguments():
+            options.add_argument(argument)
+    chrome_binary = config_data.get('selenium', 'chrome_binary', fallback='')
+    if chrome_binary:
+        options.binary_location = chrome_binary
+    # Журнал производительности нужен для подсчёта трафика и заблокированных запросов
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    driver = Chrome(
+        service=Service(executable_path=driver_path),
+        options=options
+    )
+    prepare_driver(driver, config_data, network_profile, ui_mode)
+    logger.info("WebDriver (Chrome) успешно инициализирован")
+    return driver
+
+
+def prepare_driver(driver, config_data, network_profile, ui_mode="live"):
+    """Настройки вкладки: трассировка, сетевой профиль, буферы записи HAR и наблюдатели метрик"""
+    tracer = current_tracer()
+    if tracer is not None:
+        tracer.instrument(driver)
+    # Неявные ожидания не включаются: все ожидания явные, через tests.support.waits
+    apply_profile(driver, network_profile)
+    if ui_mode == "record":
+        driver.execute_cdp_cmd("Network.enable", RECORD_BUFFERS)
+    if config_data.getboolean('performance', 'web_vitals', fallback=True):
+        install_observer(driver)
+    return driver
+
+
+@pytest.fixture(autouse=True)
+def wait_budget():
+    """Фикстура бюджета времени теста, из которого берут таймауты все ожидания"""
+    budget = start_budget()
+    yield budget
+    stop_budget()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def capture_service(config_data, run_settings):
+    """Фикстура сервиса скриншотов с политикой из профиля прогона и параметрами из секции [capture]"""
+    service = CaptureService(
+        policy=run_settings.capture_policy,
+        image_format=config_data.get('capture', 'format', fallback='png'),
+        quality=config_data.getint('capture', 'quality', fallback=80),
+        max_width=config_data.getint('capture', 'max_width', fallback=0),
+        page_source=config_data.getboolean('capture', 'page_source', fallback=False),
+        budget=config_data.getint('capture', 'budget', fallback=5),
+    )
+    activate_capture(service)
+    yield service
+    activate_capture(None)
+    service.close()
+    if service.dropped:
+        logger.info("Вложений отброшено из-за бюджета: %s", service.dropped)
+
+
+@pytest.fixture(scope="session")
+def chromedriver_path(config_data):
+    """Фикстура пути к chromedriver (из локального кэша, без обращения к сети)"""
+    return resolver_from_config(config_data).resolve()
+
+
+@pytest.fixture(scope="session")
+def network_profile(request, config_data, run_settings):
+    """Фикстура сетевого профиля: опция командной строки важнее профиля прогона"""
+    name = request.config.getoption("--network-profile") or run_settings.network_profile
+    profiles = load_profiles(config_data)
+    if name not in profiles:
+        raise pytest.UsageError(f"Неизвестный сетевой профиль {name}, доступны: {', '.join(profiles)}")
+    request.config.stash[network_stats_key] = {}
+    return profiles[name]
+
+
+@pytest.fixture(scope="session")
+def ui_mode(request, config_data):
+    """Фикстура режима UI-тестов: опция командной строки важнее конфигурации"""
+    return request.config.getoption("--ui-mode") or config_data.get('ui_replay', 'mode', fallback='live')
+
+
+def har_dir(config_data):
+    """Каталог HAR-архивов UI-тестов относительно каталога тестов"""
+    return Path(__file__).parent / config_data.get('ui_replay', 'har_dir', fallback='hars')
+
+
+@pytest.fixture(scope="session")
+def replay_proxy(request, config_data, ui_mode):
+    """Фикстура прокси воспроизведения HAR (None вне режима replay)"""
+    if ui_mode != "replay":
+        yield None
+        return
+    archive = HarArchive(har_dir(config_data), MatchRules.from_config(config_data))
+    if not len(archive):
+        raise pytest.UsageError(f"Нет HAR-архивов в {archive.directory}: запишите их с --ui-mode=record")
+    context = self_signed_context(
+        config_data.get('ui_replay', 'cert', fallback='') or None,
+        config_data.get('ui_replay', 'key', fallback='') or None,
+    )
+    request.config.stash[replay_misses_key] = []
+    with ReplayProxy(archive, context) as proxy:
+        yield proxy
+    request.config.stash[replay_misses_key] = proxy.misses
+
+
+def tab_host_info(config):
+    """Адрес общего Chrome: от главного процесса xdist или из этого же процесса"""
+    if hasattr(config, "workerinput"):
+        return config.workerinput.get("tab_host")
+    host = config.stash.get(tab_host_key, None)
+    return host.info if host is not None else None
+
+
+@pytest.fixture(scope="session")
+def browser_pool(request, config_data, run_settings, chromedriver_path, network_profile, ui_mode, replay_proxy):
+    """Фикстура пула браузеров, общего для всего сеанса (воркера xdist)"""
+    tab_host = tab_host_info(request.config)
+    if tab_host is not None:
+        # Режим вкладок: вместо своего Chrome — изолированная вкладка общего браузера
+        pool_class = TabPool
+
+        def factory():
+            tab = open_tab(tab_host, run_settings.tabs)
+            return prepare_driver(tab, config_data, network_profile, ui_mode)
+    else:
+        pool_class = BrowserPool
+
+        def factory():
+            return create_chrome(config_data, run_settings, chromedriver_path, network_profile, ui_mode, replay_proxy)
+    max_uses = config_data.getint('browser_pool', 'max_uses', fallback=50)
+    max_heap_mb = config_data.getint('browser_pool', 'max_heap_mb', fallback=512)
+    if run_settings.soak.enabled:
+        # Soak-прогон ищет утечки одного браузера: пересоздание Chrome посреди прогона разорвало бы тренды
+        if max_uses or max_heap_mb:
+            logger.info("Soak-прогон: пересоздание браузеров пулом отключено (max_uses и max_heap_mb = 0)")
+        max_uses = max_heap_mb = 0
+    pool = pool_class(
+        factory=factory,
+        size=run_settings.browser_pool_size,
+        max_uses=max_uses,
+        max_heap_mb=max_heap_mb,
+    )
+    request.config.stash[pool_stats_key] = pool.stats
     try:
-        options = ChromeOptions()
-        if config_data.getboolean('selenium', 'headless'):
-            options.add_argument("--headless=new")
-        driver = Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=options
-        )
-        driver.implicitly_wait(config_data.getint('selenium', 'timeout'))
-        logger.info("WebDriver (Chrome) успешно инициализирован")
-        yield driver
+        pool.prewarm(config_data.getint('browser_pool', 'prewarm', fallback=1))
+        yield pool
     except Exception as e:
-        logger.error(f"Ошибка инициализации WebDriver: {e}")
+        logger.error("Ошибка инициализации WebDriver: %s", e)
         raise
     finally:
-        if driver is not None:
-            logger.info("Закрытие WebDriver")
-            driver.quit()
+        logger.info("Закрытие пула WebDriver")
+        pool.close()
+
+
+@pytest.fixture(scope="session")
+def web_vitals(config_data, network_profile):
+    """Фикстура сборщика фронтенд-метрик страниц (None, если сбор отключён в [performance])"""
+    if not config_data.getboolean('performance', 'web_vitals', fallback=True):
+        yield None
+        return
+    history = WebVitalsHistory(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            config_data.get('performance', 'web_vitals_dir', fallback='web_vitals')
+        ),
+        max_runs=config_data.getint('performance', 'web_vitals_runs', fallback=20),
+    )
+    # Воркеры xdist одного прогона пишут метрики под общим идентификатором
+    collector = WebVitalsCollector(
+        history,
+        thresholds=thresholds_from_config(config_data),
+        network_profile=network_profile.name,
+        run_id=os.environ.get("PYTEST_XDIST_TESTRUNUID"),
+    )
+    activate_web_vitals(collector)
+    yield collector
+    activate_web_vitals(None)
+
+
+def check_web_vitals(item, report):
+    """Превышение порогов фронтенд-метрик за тест: падение вызова или предупреждение по [performance]"""
+    collector = current_collector()
+    if collector is None:
+        return
+    violations = collector.take_violations()
+    if not violations:
+        return
+    message = "; ".join(str(violation) for violation in violations)
+    config_data = item.config.stash[config_key]
+    fail_call(
+        report, config_data.get('performance', 'web_vitals_mode', fallback='warn') == 'fail',
+        f"Превышены пороги фронтенд-метрик: {message}"
+    )
+
+
+@pytest.fixture
+def driver(request, config_data, browser_pool, web_vitals, ui_mode, replay_proxy):
+    """Фикстура WebDriver: арендует прогретый Chrome из пула на время теста."""
+    test_id = request.node.nodeid
+    with browser_pool.lease() as driver:
+        # Сбрасываем журнал, накопленный до начала теста (сброс браузера пулом)
+        read_performance_log(driver)
+        if replay_proxy is not None:
+            replay_proxy.begin_test(test_id, har_name(test_id))
+        yield driver
+        recorder = current_recorder()
+        if recorder is not None:
+            record_soak_sample(test_id, driver, recorder)
+        # Журнал читается один раз: из него считается трафик и собирается HAR
+        messages = read_performance_log(driver)
+        if messages is not None:
+            stats = network_stats(messages)
+            request.config.stash[network_stats_key][test_id] = stats
+            allure.attach(
+                stats.summary(),
+                name="Сетевой трафик теста",
+                attachment_type=allure.attachment_type.TEXT
+            )
+            if ui_mode == "record":
+                record_har(driver, messages, har_dir(config_data) / har_name(test_id))
+    if replay_proxy is not None:
+        check_replay_misses(config_data, replay_proxy.end_test())
+
+
+def check_replay_misses(config_data, misses):
+    """Запросы теста без записанного ответа: вложение и, если задано, падение теста"""
+    if not misses:
+        return
+    lines = [str(miss) for miss in misses[:MAX_REPORTED_MISSES]]
+    if len(misses) > MAX_REPORTED_MISSES:
+        lines.append(f"... и ещё {len(misses) - MAX_REPORTED_MISSES}")
+    allure.attach("\n".join(lines), name="Запросы без записи в HAR", attachment_type=allure.attachment_type.TEXT)
+    if config_data.getboolean('ui_replay', 'fail_on_miss', fallback=False):
+        pytest.fail(f"Запросов без записи в HAR: {len(misses)}, первый: {misses[0]}")
+    logger.warning("Запросов без записи в HAR: %s, первый: %s", len(misses), misses[0])
+
+
+def record_soak_sample(test_id, driver, recorder):
+    """Замер памяти браузера после теста; на последнем проходе — ряд и тренды теста в Allure"""
+    recorder.record(test_id, sample_browser(driver))
+    allure.dynamic.parameter("soak_iteration", recorder.iteration, excluded=True)
+    if not recorder.final:
+        return
+    allure.attach(recorder.test_summary(test_id), name="Soak: тренды памяти",
+                  attachment_type=allure.attachment_type.TEXT)
+    allure.attach(recorder.series_csv(test_id), name="Soak: временной ряд",
+                  attachment_type=allure.attachment_type.CSV)
+
+
+@pytest.fixture(scope="session")
+def page_state(config_data, run_settings):
+    """Фикстура снимка состояния главной страницы (None, если снимки отключены)"""
+    if not run_settings.page_state:
+        yield None
+        return
+    path = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        config_data.get('page_state', 'path', fallback='.page_state/main_page.json')
+    )
+    cache = PageStateCache(
+        path,
+        config_hash=config_fingerprint(config_data),
+        max_age=config_data.getfloat('page_state', 'max_age', fallback=3600),
+    )
+    yield cache
+    logger.info(
+        "Снимок состояния страницы: восстановлений %s, холодных загрузок %s", cache.restores, cache.cold_loads
+    )
+
+
+def cassette_path(config_data):
+    """Путь к кассете API относительно каталога тестов"""
+    return os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        config_data.get('api', 'cassette', fallback='cassettes/full_text_search.json')
+    )
+
+
+def cassette_store(config_data, api_mode):
+    """Кассета API для тестов, которые читают её записи; в режиме replay без записанной кассеты
+    такие тесты пропускаются, а не падают"""
+    path = cassette_path(config_data)
+    if api_mode == "replay" and not os.path.exists(path):
+        pytest.skip(f"Кассета {path} не найдена: сначала запишите её с --api-mode=record")
+    return CassetteStore(path)
+
+
+@pytest.fixture
+def corpus(request, config_data):
+    """Фикстура корпуса запросов: имя корпуса передаётся через parametrize(..., indirect=True)"""
+    try:
+        index, count = (int(part) for part in request.config.getoption("--corpus-shard").split("/"))
+    except ValueError:
+        raise pytest.UsageError("--corpus-shard задаётся в виде N/M, например 2/4")
+    if not 1 <= index <= count:
+        raise pytest.UsageError(f"--corpus-shard: номер шарда должен быть от 1 до {count}")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    spec = CorpusSpec.from_config(config_data, request.param, Path(base_dir))
+    return Corpus(spec, shard_index=index - 1, shard_count=count)
+
+
+@pytest.fixture(scope="session")
+def api_mode(request, config_data):
+    """Фикстура режима API-тестов: опция командной строки важнее конфигурации"""
+    return request.config.getoption("--api-mode") or config_data.get('api', 'mode', fallback='live')
+
+
+def record_api_latency(response, namespace: str = "api") -> None:
+    """Записывает задержку ответа API в метрики текущего теста"""
+    record_latency(
+        f"{namespace}:{response.request.method} {urlsplit(response.url).path}",
+        response.elapsed.total_seconds() * 1000
+    )
+
+
+def on_api_response(response, namespace: str = "api") -> None:
+    """Ответ API в тесте: задержка в метрики, ответ 5xx — в учёт сбоев стенда"""
+    record_api_latency(response, namespace)
+    note_response(response)
 
 
 @pytest.fixture(scope="session")
-def api_client(config_data):
+def transport_settings(run_settings):
+    """Фикстура параметров HTTP-транспорта (секция [api_transport] с учётом профиля)"""
+    return run_settings.transport
+
+
+@pytest.fixture(scope="session")
+def api_client(request, config_data, api_mode, transport_settings):
     """Фикстура для API клиента."""
+    store = cassette_store(config_data, api_mode)
     session = Session()
+    transport = None
+    if api_mode != "replay":
+        transport = TunedAdapter(transport_settings)
+    install_cassette(session, api_mode, store, transport)
+    if api_mode != "replay":
+        # Ответы предзагрузки учитываются позже, в тесте, который их забирает
+        session.hooks["response"].append(
+            lambda response, *args, **kwargs: None if in_prefetch_thread() else on_api_response(response)
+        )
     logger.info("API клиент инициализирован")
-    return session
+    yield session
+    if api_mode == "record":
+        store.save()
+    if transport is not None:
+        # Снимок до закрытия сессии: при закрытии пулы соединений очищаются
+        request.config.stash[transport_stats_key] = transport.stats()
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def api_prefetch(request, api_client, config_data, headers, transport_settings):
+    """Фикстура предзагрузки: запросы всех выбранных кейсов с маркером api_prefetch
+    отправляются параллельно при первом обращении, до выполнения самих тестов"""
+    if transport_settings.prefetch_workers <= 0:
+        yield None
+        return
+    if hasattr(request.config, "workerinput"):
+        # Воркер xdist собирает весь набор, но заранее не знает, какие тесты ему выдадут:
+        # предзагрузка отправила бы все кейсы из каждого воркера
+        logger.info("Предзагрузка API отключена на воркере xdist")
+        yield None
+        return
+    board = current_board()
+    breaker = board.breakers.get("api") if board is not None else None
+    if breaker is not None and breaker.state != CLOSED:
+        # Предохранитель API разомкнут: кейсы всё равно не запустятся
+        logger.info("Предзагрузка API пропущена: предохранитель %s", breaker.state)
+        yield None
+        return
+    url = config_data['base']['api_url']
+    timeout = config_data.getint('api', 'timeout')
+
+    def call(payload):
+        return api_client.post(url, headers=headers, data=json.dumps(payload), timeout=timeout)
+
+    runner = PrefetchRunner(transport_settings.prefetch_workers)
+    for item in request.session.items:
+        marker = item.get_closest_marker("api_prefetch")
+        if marker is None or not hasattr(item, "callspec") or evaluate_skip_marks(item) is not None:
+            continue
+        runner.submit(item.nodeid, marker.args[0](item.callspec.params), call)
+    logger.info("Предзагрузка API: %s кейсов, потоков: %s", len(runner), transport_settings.prefetch_workers)
+    yield runner
+    runner.close()
+
+
+@pytest.fixture
+def api_post(request, api_client, api_prefetch, api_mode, config_data, headers):
+    """Фикстура POST-запроса к API: готовый ответ предзагрузки для кейса или обычный запрос"""
+    def post(url, payload):
+        if api_prefetch is not None and url == config_data['base']['api_url']:
+            response = api_prefetch.take(request.node.nodeid, payload)
+            if response is not None:
+                if api_mode != "replay":
+                    # Параллельные запросы медленнее последовательных из базовой линии: задержка только для отчёта
+                    on_api_response(response, namespace=f"{INFO_PREFIX}api-prefetch")
+                return response
+        return api_client.post(
+            url,
+            headers=headers,
+            data=json.dumps(payload),
+            timeout=config_data.getint('api', 'timeout'),
+        )
+    return post
+
+
+@pytest.fixture(scope="session")
+def search_url(config_data, api_mode):
+    """Фикстура URL поиска: в режиме replay — локальный дублёр API вместо сети"""
+    if api_mode != "replay":
+        yield config_data['base']['api_url']
+        return
+    # Дублёру кассета не обязательна: без записи он отвечает заготовленным ответом
+    path = cassette_path(config_data)
+    with StandInServer(CassetteStore(path) if os.path.exists(path) else None) as server:
+        yield server.url
+
+
+def baseline_path(config_data):
+    return os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        config_data.get('baseline', 'path', fallback='baselines/latency.json')
+    )
+
+
+@pytest.fixture(scope="session")
+def latency_baseline(request, config_data):
+    """Фикстура базовой линии задержек; с --update-baseline сохраняет её в конце сеанса
+    (воркер xdist — свою часть, которую главный процесс дописывает в общий файл)"""
+    store = BaselineStore(
+        baseline_path(config_data), max_samples=config_data.getint('baseline', 'max_samples', fallback=200)
+    )
+    request.config.stash[latency_regressions_key] = []
+    yield store
+    if not request.config.getoption("--update-baseline"):
+        return
+    if hasattr(request.config, "workerinput"):
+        store.save_part(request.config.workerinput["workerid"])
+    else:
+        store.save()
+
+
+@pytest.fixture(autouse=True)
+def latency(request, latency_baseline):
+    """Фикстура замера задержек теста; сравнение с базовой линией — в отчёте о вызове теста"""
+    recorder = LatencyRecorder(request.node.nodeid)
+    activate(recorder)
+    yield recorder
+    activate(None)
+    if recorder.samples and request.config.getoption("--update-baseline"):
+        latency_baseline.update(recorder.test_id, recorder.samples)
+
+
+def check_latency(item, report):
+    """Сравнение задержек теста с базовой линией: вложение, сводка и, с mode = fail, падение вызова"""
+    recorder = item.funcargs.get("latency")
+    if recorder is None or not recorder.samples:
+        return
+    config_data = item.config.stash[config_key]
+    store = item.funcargs["latency_baseline"]
+    comparisons = [
+        compare(
+            metric,
+            store.samples(recorder.test_id, metric),
+            values,
+            tolerance_pct=config_data.getfloat('baseline', 'tolerance_pct', fallback=20),
+            alpha=config_data.getfloat('baseline', 'alpha', fallback=0.05),
+            min_samples=config_data.getint('baseline', 'min_samples', fallback=5),
+        )
+        for metric, values in sorted(recorder.samples.items())
+    ]
+    allure.attach(
+        comparisons_csv(comparisons),
+        name="Сравнение задержек с базовой линией",
+        attachment_type=allure.attachment_type.CSV
+    )
+    flagged = [c for c in comparisons if c.status in ("regression", "suspect")]
+    item.config.stash[latency_regressions_key].extend((recorder.test_id, c) for c in flagged)
+    regressions = [c for c in flagged if c.regressed]
+    if not regressions:
+        return
+    message = "; ".join(
+        f"{c.metric}: медиана {c.baseline_median:.1f} -> {c.current_median:.1f} мс "
+        f"({c.change_pct:+.1f}%, p={c.p_value:.4f})"
+        for c in regressions
+    )
+    fail_call(
+        report, config_data.get('baseline', 'mode', fallback='warn') == 'fail',
+        f"Регрессия задержек относительно базовой линии: {message}"
+    )
+
+
+def fail_call(report, fail, message):
+    """Проверка после теста: валит прошедший вызов теста (а не teardown с ERROR) или даёт предупреждение"""
+    if fail and report.passed:
+        report.outcome = "failed"
+        report.longrepr = message
+        return
+    warnings.warn(message)
 
 
 @pytest.fixture(scope="session")
@@ -2,11 +2,14 @@ import logging
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from tests.support.batch_actions import ActionBatch
+from tests.support.latency_baseline import timed
+from tests.support.page_state import PageStateCache
+from tests.support.tracing import traced
+from tests.support.waits import wait
+from tests.support.web_vitals import collect_page_metrics, current_collector
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -30,76 +33,122 @@ class MainPage:
             "button[data-testid='ui-button'], a[href*='passport'], button[class*='login']"
         )
 
+    @traced("MainPage.open")
     def open(self, url: str) -> None:
         """Открывает указанный URL."""
+        self._open(url)
+        # Сбор фронтенд-метрик не входит в замер ui:open
+        self.collect_metrics("main")
+
+    @timed("ui:open")
+    def _open(self, url: str) -> None:
         self.driver.get(url)
-        logger.info(f"Открыт URL: {url}")
+        logger.info("Открыт URL: %s", url)
+
+    @traced("MainPage.open_ready")
+    def open_ready(self, url: str, page_state: PageStateCache) -> bool:
+        """Открывает страницу в готовом состоянии (из снимка, если он актуален)"""
+        restored = self._open_ready(url, page_state)
+        self.collect_metrics("main")
+        return restored
+
+    @timed("ui:open_ready")
+    def _open_ready(self, url: str, page_state: PageStateCache) -> bool:
+        restored = page_state.open_ready(self.driver, url)
+        logger.info("Открыт URL: %s (%s)", url, 'из снимка состояния' if restored else 'холодная загрузка')
+        return restored
 
+    @traced("MainPage.collect_metrics")
+    def collect_metrics(self, page: str) -> dict[str, float]:
+        """Дожидается загрузки документа и снимает его фронтенд-метрики (Navigation Timing, LCP, CLS)"""
+        if current_collector() is None:
+            return {}
+        wait(self.driver).until(lambda d: d.execute_script("return document.readyState") == "complete")
+        return collect_page_metrics(self.driver, page)
+
+    @traced("MainPage.search")
+    @timed("ui:search")
     def search(self, query: str) -> None:
         """Выполняет поиск по заданному запросу"""
         try:
-            search_input = self.wait_for_element(self.SEARCH_INPUT)
-            search_input.clear()
-            search_input.send_keys(query)
-            find_button = self.wait_for_clickable(self.FIND_BUTTON)
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-                find_button
+            (
+                self.batch()
+                .locate("input", self.SEARCH_INPUT)
+                .type("input", query)
+                .locate("button", self.FIND_BUTTON, state="clickable")
+                .scroll("button")
+                .click("button")
+                .run()
             )
-            self.driver.execute_script("arguments[0].click();", find_button)
-            logger.info(f"Выполнен поиск по запросу: {query}")
+            logger.info("Выполнен поиск по запросу: %s", query)
         except Exception as e:
-            logger.error(f"Поиск по запросу '{query}' не удался: {e}")
+            logger.error("Поиск по запросу '%s' не удался: %s", query, e)
             raise
 
+    @traced("MainPage.click_dessert_category")
+    @timed("ui:click_dessert_category")
     def click_dessert_category(self) -> None:
         """Переходит в категорию 'Десерты'"""
         try:
-            dessert_button = self.wait_for_clickable(self.DESSERT_CATEGORY)
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-                dessert_button
-            )
-            self.driver.execute_script("arguments[0].click();", dessert_button)
+            self.click(self.DESSERT_CATEGORY)
             logger.info("Переход в категорию 'Десерты' выполнен")
         except Exception as e:
-            logger.error(f"Переход в категорию 'Десерты' не удался: {e}")
+            logger.error("Переход в категорию 'Десерты' не удался: %s", e)
             raise
 
+    @traced("MainPage.click_login_button")
+    @timed("ui:click_login_button")
     def click_login_button(self) -> None:
         """Нажимает на кнопку 'Войти'"""
         try:
-            login_button = self.wait_for_clickable(self.LOGIN_BUTTON)
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-                login_button
-            )
-            self.driver.execute_script("arguments[0].click();", login_button)
+            self.click(self.LOGIN_BUTTON)
             logger.info("Клик по кнопке 'Войти' выполнен")
         except Exception as e:
-            logger.error(f"Клик по кнопке 'Войти' не удался: {e}")
+            logger.error("Клик по кнопке 'Войти' не удался: %s", e)
             raise
 
+    def batch(self) -> ActionBatch:
+        """Создаёт батч действий, выполняемый за один вызов скрипта"""
+        return ActionBatch(self.driver)
+
+    @traced("MainPage.click")
+    def click(self, locator: tuple[str, str]) -> None:
+        """Дожидается кликабельности, прокручивает и нажимает элемент за один round trip"""
+        self.batch().locate("target", locator, state="clickable").scroll("target").click("target").run()
+        logger.info("Клик по элементу с локатором %s выполнен", locator)
+
+    @traced("MainPage.find")
+    def find(self, locator: tuple[str, str], state: str = "present") -> WebElement:
+        """Дожидается элемента (present, visible или clickable) за один round trip и возвращает его"""
+        return self.batch().locate("target", locator, state=state).run().elements["target"]
+
+    @traced("MainPage.read_text")
+    def read_text(self, locator: tuple[str, str], state: str = "present") -> str:
+        """Дожидается элемента и читает его текст за один round trip"""
+        return self.batch().locate("target", locator, state=state).read("target").run()["target"]
+
+    @traced("MainPage.wait_for_clickable")
     def wait_for_clickable(self, locator: tuple[str, str]) -> WebElement:
         """Ожидает, пока элемент станет кликабельным"""
         try:
-            element = WebDriverWait(self.driver, 15).until(
+            element = wait(self.driver).until(
                 EC.element_to_be_clickable(locator)
             )
-            logger.info(f"Элемент с локатором {locator} кликабелен")
+            logger.info("Элемент с локатором %s кликабелен", locator)
             return element
         except Exception as e:
-            logger.error(f"Не удалось найти кликабельный элемент с локатором {locator}: {e}")
+            logger.error("Не удалось найти кликабельный элемент с локатором %s: %s", locator, e)
             raise
 
+    @traced("MainPage.wait_for_element")
     def wait_for_element(self, locator: tuple[str, str]) -> WebElement:
         """Ожидает, пока элемент станет видимым"""
         try:
-            element = WebDriverWait(self.driver, 15).until(
+            element = wait(self.driver).until(
                 EC.presence_of_element_located(locator)
             )
-            logger.info(f"Элемент с локатором {locator} присутствует")
+            logger.info("Элемент с локатором %s присутствует", locator)
             return element
         except Exception as e:
-            logger.error(f"Не удалось найти элемент с локатором {locator}: {e}")
+            logger.error("Не удалось найти элемент с локатором %s: %s", locator, e)
             raise
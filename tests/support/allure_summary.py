@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("failed", "broken", "skipped", "passed", "unknown")
+TREND_FILES = ("history-trend.json", "duration-trend.json", "retry-trend.json", "categories-trend.json")
+# Отметка последнего учтённого прогона: повторный запуск по тем же результатам не дублирует историю
+STATE_FILE = "summary-state.json"
+DEFAULT_MAX_RUNS = 20
+
+
+@dataclass
+class CaseResult:
+    """Итог одного теста в прогоне: последняя попытка и число перезапусков"""
+    history_id: str
+    full_name: str
+    name: str
+    uuid: str
+    status: str
+    message: str
+    start: int
+    stop: int
+    attempts: list[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def retries(self) -> int:
+        return len(self.attempts) - 1
+
+    @property
+    def flaky(self) -> bool:
+        return "passed" in self.attempts and len(set(self.attempts)) > 1
+
+
+def iter_results(results_dir: Path) -> Iterator[dict]:
+    """Читает только *-result.json, не открывая вложения и контейнеры"""
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("-result.json"):
+                continue
+            try:
+                with open(entry.path, "rb") as f:
+                    yield json.loads(f.read())
+            except ValueError as e:
+                logger.warning("Пропущен повреждённый результат %s: %s", entry.name, e)
+
+
+def collect_runs(results_dir: Path) -> dict[str, CaseResult]:
+    """Сводит попытки по historyId: итогом считается последняя по времени завершения"""
+    if not results_dir.is_dir():
+        raise SystemExit(f"Каталог результатов {results_dir} не найден: сначала запустите тесты с --alluredir")
+    runs: dict[str, CaseResult] = {}
+    attempts: dict[str, list[tuple[int, str]]] = {}
+    for result in iter_results(results_dir):
+        history_id = result.get("historyId") or result.get("fullName") or result["uuid"]
+        stop = result.get("stop", result.get("start", 0))
+        status = result.get("status", "unknown")
+        attempts.setdefault(history_id, []).append((stop, status))
+        current = runs.get(history_id)
+        if current is not None and current.stop >= stop:
+            continue
+        runs[history_id] = CaseResult(
+            history_id=history_id,
+            full_name=result.get("fullName", result.get("name", "")),
+            name=result.get("name", ""),
+            uuid=result["uuid"],
+            status=status,
+            message=(result.get("statusDetails") or {}).get("message", ""),
+            start=result.get("start", stop),
+            stop=stop,
+        )
+    if not runs:
+        # Пустой прогон дописал бы в историю и тренды точку без тестов
+        raise SystemExit(f"В каталоге {results_dir} нет результатов тестов (*-result.json)")
+    for history_id, run in runs.items():
+        run.attempts = [status for _, status in sorted(attempts[history_id])]
+    return runs
+
+
+def run_key(runs: dict[str, CaseResult]) -> str:
+    """Отпечаток прогона по UUID итоговых результатов"""
+    return hashlib.sha1("|".join(sorted(run.uuid for run in runs.values())).encode("utf-8")).hexdigest()
+
+
+def statistic(statuses) -> dict[str, int]:
+    counts = dict.fromkeys(STATUSES, 0)
+    for status in statuses:
+        counts[status if status in counts else "unknown"] += 1
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def _read_json(path: Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def _write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def update_history(history_dir: Path, runs: dict[str, CaseResult], max_runs: int) -> bool:
+    """Дописывает прогон в history.json и *-trend.json, оставляя не больше max_runs записей.
+
+    Возвращает False, если этот прогон уже был учтён.
+    """
+    key = run_key(runs)
+    state = _read_json(history_dir / STATE_FILE, {})
+    if state.get("last_run") == key:
+        logger.info("Прогон уже учтён в истории, история не изменена")
+        return False
+
+    history = _read_json(history_dir / "history.json", {})
+    for history_id, run in runs.items():
+        entry = history.setdefault(history_id, {"statistic": {}, "items": []})
+        item = {
+            "uid": run.uuid,
+            "status": run.status,
+            "statusDetails": run.message,
+            "time": {"start": run.start, "stop": run.stop, "duration": run.duration},
+        }
+        entry["items"] = [item] + entry["items"][:max_runs - 1]
+        entry["statistic"] = statistic(i["status"] for i in entry["items"])
+    _write_json(history_dir / "history.json", history)
+
+    build_order = state.get("build_order", 0) + 1
+    starts = [run.start for run in runs.values()]
+    stops = [run.stop for run in runs.values()]
+    points = {
+        "history-trend.json": statistic(run.status for run in runs.values()),
+        "duration-trend.json": {"duration": (max(stops) - min(starts)) if runs else 0},
+        "retry-trend.json": {"run": len(runs), "retry": sum(run.retries for run in runs.values())},
+        "categories-trend.json": {},
+    }
+    for name in TREND_FILES:
+        trend = _read_json(history_dir / name, [])
+        trend = [{"buildOrder": build_order, "data": points[name]}] + trend[:max_runs - 1]
+        _write_json(history_dir / name, trend)
+    _write_json(history_dir / STATE_FILE, {"last_run": key, "build_order": build_order})
+    return True
+
+
+def compact_history(history_dir: Path, max_runs: int) -> int:
+    """Обрезает историю до max_runs прогонов без добавления нового; возвращает число удалённых записей"""
+    removed = 0
+    history = _read_json(history_dir / "history.json", {})
+    for entry in history.values():
+        removed += max(0, len(entry["items"]) - max_runs)
+        entry["items"] = entry["items"][:max_runs]
+        entry["statistic"] = statistic(i["status"] for i in entry["items"])
+    _write_json(history_dir / "history.json", history)
+    for name in TREND_FILES:
+        trend = _read_json(history_dir / name, [])
+        removed += max(0, len(trend) - max_runs)
+        _write_json(history_dir / name, trend[:max_runs])
+    return removed
+
+
+def build_summary(runs: dict[str, CaseResult], history: dict, top_n: int = 10) -> dict:
+    """Краткая сводка прогона: статусы, длительность, самые медленные и нестабильные тесты"""
+    # Нестабилен тест, который в этом прогоне прошёл после перезапуска или в истории менял статус
+    flaky = []
+    for history_id, run in runs.items():
+        statuses = {i["status"] for i in history.get(history_id, {}).get("items", [])}
+        if run.flaky or ("passed" in statuses and statuses & {"failed", "broken"}):
+            flaky.append(run.full_name)
+    slowest = sorted(runs.values(), key=lambda run: run.duration, reverse=True)[:top_n]
+    starts = [run.start for run in runs.values()]
+    stops = [run.stop for run in runs.values()]
+    return {
+        "statistic": statistic(run.status for run in runs.values()),
+        "time": {
+            "start": min(starts, default=0),
+            "stop": max(stops, default=0),
+            "duration": (max(stops) - min(starts)) if runs else 0,
+            "minDuration": min((run.duration for run in runs.values()), default=0),
+            "maxDuration": max((run.duration for run in runs.values()), default=0),
+            "sumDuration": sum(run.duration for run in runs.values()),
+        },
+        "slowest": [{"name": run.full_name, "duration": run.duration} for run in slowest],
+        "flaky": sorted(flaky),
+        "failed": sorted(run.full_name for run in runs.values() if run.status in ("failed", "broken")),
+    }
+
+
+def format_summary(summary: dict) -> str:
+    stat = summary["statistic"]
+    lines = [
+        "Итог: " + ", ".join(f"{status} {stat[status]}" for status in STATUSES if stat[status])
+        + f" (всего {stat['total']}), длительность {summary['time']['duration'] / 1000:.1f} с",
+        "Самые медленные тесты:",
+    ]
+    lines += [f"  {item['duration'] / 1000:8.2f} с  {item['name']}" for item in summary["slowest"]]
+    if summary["failed"]:
+        lines.append("Упавшие тесты:")
+        lines += [f"  {name}" for name in summary["failed"]]
+    if summary["flaky"]:
+        lines.append("Нестабильные тесты:")
+        lines += [f"  {name}" for name in summary["flaky"]]
+    return "\n".join(lines)
+
+
+def write_widget(report_dir: Path, summary: dict) -> None:
+    """Обновляет widgets/summary.json в формате Allure, чтобы сводка совпадала с HTML-отчётом"""
+    _write_json(report_dir / "widgets" / "summary.json", {
+        "reportName": "Allure Report",
+        "testRuns": [],
+        "statistic": summary["statistic"],
+        "time": summary["time"],
+    })
+
+
+def generate_html(results_dir: Path, report_dir: Path, runs: dict[str, CaseResult]) -> bool:
+    """Полная пересборка HTML-отчёта через Allure CLI (нужна Java); историю прогона дописывает сам Allure.
+
+    Возвращает False, если этот прогон уже был учтён в истории.
+    """
+    allure = shutil.which("allure")
+    if allure is None:
+        raise SystemExit("Allure CLI не найден в PATH, HTML-отчёт не собран")
+    history_dir = report_dir / "history"
+    key = run_key(runs)
+    state = _read_json(history_dir / STATE_FILE, {})
+    if state.get("last_run") == key:
+        # Allure дописывает прогон в историю при каждой сборке, повторная сборка учла бы его дважды
+        logger.info("Прогон уже учтён в истории, HTML-отчёт не пересобран")
+        return False
+    # Allure берёт историю до этого прогона из allure-results/history
+    if history_dir.is_dir():
+        shutil.copytree(history_dir, results_dir / "history", dirs_exist_ok=True)
+    subprocess.run([allure, "generate", str(results_dir), "-o", str(report_dir), "--clean"], check=True)
+    # generate --clean удаляет отметку последнего прогона вместе со старым отчётом
+    _write_json(history_dir / STATE_FILE, {"last_run": key, "build_order": state.get("build_order", 0) + 1})
+    return True
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    # Вне pytest журнал настраивается здесь: сообщения утилиты выводятся в консоль
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Сводка allure-results и инкрементальная история без Allure CLI")
+    parser.add_argument("results", nargs="?", type=Path, default=Path("allure-results"), help="Каталог allure-results")
+    parser.add_argument("-r", "--report", type=Path, default=Path("allure-report"), help="Каталог отчёта с history/")
+    parser.add_argument("--max-runs", type=int, default=DEFAULT_MAX_RUNS, help="Сколько прогонов хранить в истории")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых медленных тестов показать")
+    parser.add_argument("--compact", action="store_true", help="Только обрезать историю до --max-runs")
+    parser.add_argument("--html", action="store_true", help="Дополнительно пересобрать HTML через Allure CLI")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    history_dir = args.report / "history"
+    if args.compact:
+        removed = compact_history(history_dir, args.max_runs)
+        logger.info("История сжата до %s прогонов, удалено записей: %s", args.max_runs, removed)
+        return
+    runs = collect_runs(args.results)
+    if args.html:
+        # Историю дописывает сам Allure; generate --clean пересоздаёт каталог отчёта, поэтому сводка пишется после
+        generate_html(args.results, args.report, runs)
+    else:
+        update_history(history_dir, runs, args.max_runs)
+    history = _read_json(history_dir / "history.json", {})
+    summary = build_summary(runs, history, args.top)
+    write_widget(args.report, summary)
+    _write_json(args.report / "compact-summary.json", summary)
+    print(format_summary(summary))
+    logger.info("Сводка по %s тестам построена за %.3f с", len(runs), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
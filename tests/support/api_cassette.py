@@ -0,0 +1,209 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # fcntl есть только в Unix: без него запись кассеты не защищена от других процессов
+    fcntl = None
+
+from requests import PreparedRequest, Response, Session
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+API_MODES = ("live", "record", "replay")
+# Заголовки ответа, которые сохраняются в кассете (остальные нестабильны или не нужны тестам)
+KEPT_HEADERS = ("Content-Type", "Allow")
+
+
+class CassetteMissError(RequestsConnectionError):
+    """В кассете нет записи для запроса (режим replay)"""
+
+
+def normalize_body(body) -> str:
+    """Приводит JSON-тело запроса к каноническому виду: text + location, ключи отсортированы.
+
+    Тело не в UTF-8 (бинарная отправка формы, сжатый payload) заменяется его хешем: ключ остаётся
+    стабильным, а незнакомый запрос становится обычным промахом, а не исключением в потоке прокси.
+    """
+    if body is None or body == b"" or body == "":
+        return ""
+    if isinstance(body, bytes):
+        try:
+            body = body.decode("utf-8")
+        except UnicodeDecodeError:
+            return f"binary:{len(body)}:sha1:{hashlib.sha1(body).hexdigest()}"
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(payload, dict) and isinstance(payload.get("location"), dict):
+        payload["location"] = {
+            key: round(value, 6) if isinstance(value, float) else value
+            for key, value in payload["location"].items()
+        }
+    return json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def request_key(method: str, url: str, body) -> str:
+    """Ключ записи в кассете: метод, путь URL и нормализованный payload"""
+    path = urlsplit(url).path
+    raw = f"{method.upper()} {path} {normalize_body(body)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CassetteStore:
+    """Компактное хранилище пар запрос/ответ в одном JSON-файле (gzip для *.gz).
+
+    Воркеры xdist записывают одну кассету: при сохранении файл перечитывается под блокировкой,
+    и в него дописываются только записи этого процесса.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._entries: Optional[dict] = None
+        self._recorded: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self) -> dict:
+        if self._entries is None:
+            self._entries = self._load()
+        return self._entries
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def put(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self.entries[key] = entry
+            self._recorded[key] = entry
+
+    def save(self) -> None:
+        """Атомарно дописывает записи этого процесса в кассету на диске, если они есть"""
+        if not self._recorded:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = self._load()
+            entries.update(self._recorded)
+            data = json.dumps(entries, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            if self.path.suffix == ".gz":
+                tmp_path.write_bytes(gzip.compress(data.encode("utf-8")))
+            else:
+                tmp_path.write_text(data, encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        self._entries = entries
+        self._recorded.clear()
+        logger.info("Кассета сохранена: %s (%s записей)", self.path, len(entries))
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        if self.path.suffix == ".gz":
+            data = gzip.decompress(self.path.read_bytes()).decode("utf-8")
+        else:
+            data = self.path.read_text(encoding="utf-8")
+        return json.loads(data)
+
+
+def serialize_response(request: PreparedRequest, response: Response) -> dict:
+    """Сериализует ответ в запись кассеты"""
+    return {
+        "request": {
+            "method": request.method,
+            "path": urlsplit(request.url).path,
+            "body": normalize_body(request.body),
+        },
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+        "body": response.content.decode("utf-8", errors="replace"),
+        "elapsed_ms": round(response.elapsed.total_seconds() * 1000, 1),
+    }
+
+
+def build_response(request: PreparedRequest, entry: dict) -> Response:
+    """Собирает объект Response из записи кассеты"""
+    response = Response()
+    response.status_code = entry["status"]
+    response.reason = entry.get("reason")
+    response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+    response._content = entry["body"].encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.elapsed = timedelta(0)
+    return response
+
+
+class RecordingAdapter(BaseAdapter):
+    """Транспорт, который отправляет запросы в сеть через inner и записывает ответы в кассету"""
+
+    def __init__(self, store: CassetteStore, inner: Optional[BaseAdapter] = None):
+        super().__init__()
+        self.store = store
+        self.inner = inner or HTTPAdapter()
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        response = self.inner.send(request, **kwargs)
+        key = request_key(request.method, request.url, request.body)
+        self.store.put(key, serialize_response(request, response))
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Транспорт, который отвечает из кассеты без обращения к сети"""
+
+    def __init__(self, store: CassetteStore):
+        super().__init__()
+        self.store = store
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        entry = self.store.get(request_key(request.method, request.url, request.body))
+        if entry is None:
+            raise CassetteMissError(
+                f"Нет записи в кассете {self.store.path} для {request.method} {request.url} "
+                f"{normalize_body(request.body)}; перезапишите её с --api-mode=record",
+                request=request,
+            )
+        return build_response(request, entry)
+
+    def close(self) -> None:
+        pass
+
+
+def install_cassette(
+    session: Session, mode: str, store: CassetteStore, transport: Optional[BaseAdapter] = None
+) -> None:
+    """Подключает к сессии транспорт: сетевой (transport), записи или воспроизведения"""
+    if mode == "live":
+        if transport is not None:
+            session.mount("https://", transport)
+            session.mount("http://", transport)
+        return
+    if mode == "record":
+        adapter = RecordingAdapter(store, transport)
+    elif mode == "replay":
+        adapter = ReplayAdapter(store)
+    else:
+        raise ValueError(f"Неизвестный режим API: {mode}, ожидается один из {API_MODES}")
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    logger.info("API клиент работает в режиме %s (кассета: %s)", mode, store.path)
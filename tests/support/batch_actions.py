@@ -0,0 +1,250 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from weakref import WeakKeyDictionary
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from tests.support.waits import FailFastError, budgeted_timeout, fail_fast_selectors, poll_intervals
+
+logger = logging.getLogger(__name__)
+
+# Запас таймаута скриптов драйвера сверх таймаута батча, с: скрипт должен успеть вернуть свою ошибку
+SCRIPT_TIMEOUT_MARGIN = 5.0
+# Таймаут скриптов каждого драйвера читается один раз: батч восстанавливает его после себя
+_script_timeouts: "WeakKeyDictionary[WebDriver, float]" = WeakKeyDictionary()
+
+# Выполняет шаги батча за один вызов execute_async_script.
+# Поиск элементов опрашивает DOM внутри браузера, не возвращаясь в Python,
+# с тем же адаптивным интервалом опроса, что и ожидания в tests.support.waits,
+# и на каждом опросе проверяет селекторы быстрого отказа (например, CAPTCHA).
+BATCH_SCRIPT = """
+const [steps, timeoutMs, poll, known, failFast] = arguments;
+const done = arguments[arguments.length - 1];
+const elements = Object.assign({}, known);
+const values = {};
+const find = (by, value) => {
+    if (by === 'xpath') {
+        const type = XPathResult.FIRST_ORDERED_NODE_TYPE;
+        return document.evaluate(value, document, null, type, null).singleNodeValue;
+    }
+    return document.querySelector(value);
+};
+const usable = (el, state) => {
+    if (!el) return false;
+    if (state === 'present') return true;
+    const shown = el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';
+    if (state === 'visible') return shown;
+    return shown && !el.disabled;
+};
+const setValue = (el, text) => {
+    const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, text);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+};
+const read = (el, what) => {
+    if (what === 'text') return el.innerText;
+    if (what === 'value') return el.value;
+    return el.getAttribute(what);
+};
+const blocked = () => Object.keys(failFast).find(name => usable(find(...failFast[name]), 'visible'));
+const locate = (step) => new Promise((resolve, reject) => {
+    const deadline = Date.now() + timeoutMs;
+    let interval = poll.minMs;
+    const check = () => {
+        const el = find(step.by, step.value);
+        if (usable(el, step.state)) return resolve(el);
+        const name = blocked();
+        if (name) return reject({failFast: name, message: `${step.by}=${step.value}`});
+        if (Date.now() >= deadline) return reject({timeout: true, message: `${step.by}=${step.value} (${step.state})`});
+        setTimeout(check, Math.min(interval, deadline - Date.now()));
+        interval = Math.min(interval * poll.backoff, poll.maxMs);
+    };
+    check();
+});
+(async () => {
+    let i = 0;
+    try {
+        for (; i < steps.length; i++) {
+            const step = steps[i];
+            const el = elements[step.alias];
+            if (step.op === 'locate') elements[step.alias] = await locate(step);
+            else if (step.op === 'scroll') el.scrollIntoView({block: 'center', inline: 'center'});
+            else if (step.op === 'click') el.click();
+            else if (step.op === 'type') setValue(el, (step.clear ? '' : el.value) + step.text);
+            else if (step.op === 'read') values[step.key] = read(el, step.what);
+            else if (step.op === 'script') values[step.key] = new Function(step.source)();
+        }
+    } catch (error) {
+        // index — шаг, на котором батч остановился: по таймауту его можно продолжить следующим вызовом
+        return {
+            ok: false, failFast: error.failFast, timeout: error.timeout === true, index: i,
+            values: values, elements: elements, error: String(error.message || error)
+        };
+    }
+    return {ok: true, values: values, elements: elements};
+})().then(done, error => done({ok: false, error: String(error.message || error)}));
+"""
+
+
+def _to_js_locator(locator: tuple[str, str]) -> tuple[str, str]:
+    """Переводит локатор Selenium в пару (css|xpath, выражение)"""
+    by, value = locator
+    if by == By.XPATH:
+        return "xpath", value
+    if by == By.ID:
+        return "css", f"[id='{value}']"
+    if by == By.NAME:
+        return "css", f"[name='{value}']"
+    if by == By.CLASS_NAME:
+        return "css", f".{value}"
+    if by == By.TAG_NAME:
+        return "css", value
+    if by == By.CSS_SELECTOR:
+        return "css", value
+    raise ValueError(f"Локатор {by} не поддерживается в батче")
+
+
+def _selector_to_js(selector: str) -> tuple[str, str]:
+    """Переводит селектор вида CSS или "xpath:..." в пару (css|xpath, выражение)"""
+    if selector.startswith("xpath:"):
+        return "xpath", selector[len("xpath:"):]
+    return "css", selector
+
+
+@dataclass
+class BatchResult:
+    """Результат батча: прочитанные значения и найденные элементы"""
+    values: dict[str, Any] = field(default_factory=dict)
+    elements: dict[str, WebElement] = field(default_factory=dict)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.values[key]
+
+
+class ActionBatch:
+    """Последовательность шагов locate/scroll/click/type/read, выполняемая за один round trip.
+
+    Шаги с native=True (реальные события ввода) выполняются через WebDriver между
+    сегментами батча: до такого шага — один скрипт, после — следующий. Клик, ведущий
+    на другую страницу, должен быть последним шагом сегмента.
+
+    Если у драйвера задан script_slice (вкладка общего браузера), один вызов скрипта ждёт элемент
+    не дольше script_slice секунд, а батч продолжается следующим вызовом с того же шага: между
+    вызовами общей сессией пользуются другие вкладки.
+    """
+
+    def __init__(self, driver: WebDriver, timeout: Optional[float] = None):
+        self.driver = driver
+        self.timeout = timeout
+        self._steps: list[dict] = []
+
+    def locate(self, alias: str, locator: tuple[str, str], state: str = "present") -> "ActionBatch":
+        """Ждёт элемент: state — present, visible или clickable"""
+        by, value = _to_js_locator(locator)
+        self._steps.append({"op": "locate", "alias": alias, "by": by, "value": value, "state": state})
+        return self
+
+    def scroll(self, alias: str) -> "ActionBatch":
+        self._steps.append({"op": "scroll", "alias": alias})
+        return self
+
+    def click(self, alias: str, native: bool = False) -> "ActionBatch":
+        self._steps.append({"op": "click", "alias": alias, "native": native})
+        return self
+
+    def type(self, alias: str, text: str, native: bool = False, clear: bool = True) -> "ActionBatch":
+        """Ввод текста: в браузере через value + input/change, с native=True — через send_keys"""
+        self._steps.append({"op": "type", "alias": alias, "text": text, "native": native, "clear": clear})
+        return self
+
+    def read(self, alias: str, what: str = "text", key: Optional[str] = None) -> "ActionBatch":
+        """Читает text, value или атрибут элемента в результат под ключом key (по умолчанию alias)"""
+        self._steps.append({"op": "read", "alias": alias, "what": what, "key": key or alias})
+        return self
+
+    def script(self, key: str, source: str) -> "ActionBatch":
+        """Выполняет произвольный JS (тело функции) и кладёт возвращённое значение в результат"""
+        self._steps.append({"op": "script", "key": key, "source": source})
+        return self
+
+    def run(self) -> BatchResult:
+        """Выполняет батч: один вызов скрипта на каждый сегмент между native-шагами"""
+        result = BatchResult()
+        segment: list[dict] = []
+        for step in self._steps:
+            if step.get("native"):
+                self._run_segment(segment, result)
+                segment = []
+                self._run_native(step, result)
+            else:
+                segment.append(step)
+        self._run_segment(segment, result)
+        return result
+
+    def _run_segment(self, steps: list[dict], result: BatchResult) -> None:
+        if not steps:
+            return
+        # Таймаут сегмента берётся из бюджета теста, как у любого другого ожидания
+        timeout = budgeted_timeout(self.timeout)
+        poll_min, poll_max, backoff = poll_intervals()
+        poll = {"minMs": int(poll_min * 1000), "maxMs": int(poll_max * 1000), "backoff": backoff}
+        fail_fast = {name: _selector_to_js(selector) for name, selector in fail_fast_selectors().items()}
+        script_slice = getattr(self.driver, "script_slice", None)
+        longest_call = timeout if script_slice is None else min(timeout, script_slice)
+        # Свой таймаут батча должен сработать раньше таймаута скриптов драйвера (по умолчанию 30 с),
+        # иначе вместо понятной ошибки батча будет ScriptTimeoutException
+        script_timeout = _script_timeouts.get(self.driver)
+        if script_timeout is None:
+            script_timeout = _script_timeouts[self.driver] = self.driver.timeouts.script
+        raised = longest_call + SCRIPT_TIMEOUT_MARGIN > script_timeout
+        if raised:
+            self.driver.set_script_timeout(longest_call + SCRIPT_TIMEOUT_MARGIN)
+        try:
+            self._run_script(steps, result, timeout, poll, fail_fast, script_slice)
+        finally:
+            if raised:
+                self.driver.set_script_timeout(script_timeout)
+
+    def _run_script(
+        self, steps: list[dict], result: BatchResult, timeout: float, poll: dict, fail_fast: dict,
+        script_slice: Optional[float],
+    ) -> None:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            call_timeout = remaining if script_slice is None else min(remaining, script_slice)
+            # Элементы из предыдущих сегментов передаются в скрипт, чтобы не искать их повторно
+            outcome = self.driver.execute_async_script(
+                BATCH_SCRIPT, steps, int(call_timeout * 1000), poll, result.elements, fail_fast
+            )
+            if outcome and outcome.get("failFast"):
+                raise FailFastError(f"Батч действий прерван: {outcome['failFast']} (ожидался {outcome.get('error')})")
+            if outcome and (outcome.get("ok") or outcome.get("timeout")):
+                result.values.update(outcome["values"])
+                result.elements.update(outcome["elements"])
+            if outcome and outcome.get("ok"):
+                return
+            if outcome and outcome.get("timeout") and deadline > time.monotonic():
+                steps = steps[outcome["index"]:]
+                continue
+            error = outcome.get("error") if outcome else "нет ответа"
+            raise TimeoutException(f"Батч действий не выполнен: {error}")
+
+    def _run_native(self, step: dict, result: BatchResult) -> None:
+        element = result.elements.get(step["alias"])
+        if element is None:
+            raise ValueError(f"Элемент '{step['alias']}' должен быть найден до native-шага")
+        if step["op"] == "click":
+            element.click()
+        elif step["op"] == "type":
+            if step["clear"]:
+                element.clear()
+            element.send_keys(step["text"])
+        else:
+            raise ValueError(f"Шаг {step['op']} не поддерживает native")
@@ -0,0 +1,201 @@
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+# Ключ для хранения статистики пула в config.stash (для итогового отчёта)
+pool_stats_key = pytest.StashKey["PoolStats"]()
+
+
+@dataclass
+class PoolStats:
+    """Статистика работы пула браузеров"""
+    created: int = 0
+    leases: int = 0
+    recycled: int = 0
+    recycle_reasons: Counter = field(default_factory=Counter)
+    lease_waits: list[float] = field(default_factory=list)
+
+    def summary_lines(self) -> list[str]:
+        """Строки для итогового отчёта pytest"""
+        waits = sorted(self.lease_waits)
+        if waits:
+            avg_ms = sum(waits) / len(waits) * 1000
+            max_ms = waits[-1] * 1000
+        else:
+            avg_ms = max_ms = 0.0
+        reasons = ", ".join(f"{name}={count}" for name, count in self.recycle_reasons.items()) or "-"
+        return [
+            f"Запущено браузеров: {self.created}, выдано аренд: {self.leases}",
+            f"Ожидание аренды: среднее {avg_ms:.1f} мс, максимум {max_ms:.1f} мс",
+            f"Пересоздано браузеров: {self.recycled} ({reasons})",
+        ]
+
+
+@dataclass
+class PooledBrowser:
+    """Экземпляр браузера в пуле вместе со счётчиком использований"""
+    driver: WebDriver
+    uses: int = 0
+
+
+class BrowserPool:
+    """Пул прогретых экземпляров Chrome, живущий весь сеанс (воркер xdist)."""
+
+    def __init__(
+        self,
+        factory: Callable[[], WebDriver],
+        size: int = 1,
+        max_uses: int = 50,
+        max_heap_mb: int = 512,
+        lease_timeout: float = 120,
+    ):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_heap_mb = max_heap_mb
+        self.lease_timeout = lease_timeout
+        self.stats = PoolStats()
+        self._idle: queue.LifoQueue[PooledBrowser] = queue.LifoQueue()
+        self._all: list[PooledBrowser] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def prewarm(self, count: Optional[int] = None) -> None:
+        """Заранее запускает браузеры, чтобы первые тесты не ждали холодный старт"""
+        count = self.size if count is None else min(count, self.size)
+        while len(self._all) < count:
+            self._idle.put(self._create())
+
+    @contextmanager
+    def lease(self) -> Iterator[WebDriver]:
+        """Выдаёт браузер на время теста и возвращает его в пул после сброса"""
+        browser = self.acquire()
+        try:
+            yield browser.driver
+        finally:
+            self.release(browser)
+
+    def acquire(self) -> PooledBrowser:
+        """Берёт свободный браузер из пула или запускает новый, если есть место"""
+        if self._closed:
+            raise RuntimeError("Пул браузеров уже закрыт")
+        started = time.perf_counter()
+        browser = None
+        try:
+            browser = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = len(self._all) < self.size
+            if can_create:
+                browser = self._create()
+            else:
+                try:
+                    browser = self._idle.get(timeout=self.lease_timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"Нет свободного браузера в пуле за {self.lease_timeout} с"
+                    ) from None
+        wait = time.perf_counter() - started
+        self.stats.lease_waits.append(wait)
+        self.stats.leases += 1
+        browser.uses += 1
+        logger.info("Браузер выдан из пула за %.1f мс (использование №%s)", wait * 1000, browser.uses)
+        return browser
+
+    def release(self, browser: PooledBrowser) -> None:
+        """Возвращает браузер в пул; сломанные и разросшиеся экземпляры пересоздаются"""
+        reason = self._recycle_reason(browser)
+        if reason is None:
+            try:
+                self._reset(browser.driver)
+            except WebDriverException as e:
+                logger.warning("Не удалось сбросить состояние браузера: %s", e)
+                reason = "reset_failed"
+        if reason is not None:
+            self._recycle(browser, reason)
+            return
+        self._idle.put(browser)
+
+    def close(self) -> None:
+        """Закрывает все браузеры пула"""
+        self._closed = True
+        with self._lock:
+            browsers, self._all = self._all, []
+        for browser in browsers:
+            self._quit(browser.driver)
+        logger.info("Пул браузеров закрыт")
+
+    def _create(self) -> PooledBrowser:
+        started = time.perf_counter()
+        browser = PooledBrowser(driver=self.factory())
+        with self._lock:
+            self._all.append(browser)
+        self.stats.created += 1
+        logger.info("Запущен новый браузер для пула за %.2f с", time.perf_counter() - started)
+        return browser
+
+    def _recycle(self, browser: PooledBrowser, reason: str) -> None:
+        logger.info("Браузер пересоздаётся: %s", reason)
+        with self._lock:
+            if browser in self._all:
+                self._all.remove(browser)
+        self._quit(browser.driver)
+        self.stats.recycled += 1
+        self.stats.recycle_reasons[reason] += 1
+
+    def _recycle_reason(self, browser: PooledBrowser) -> Optional[str]:
+        """Возвращает причину пересоздания браузера или None, если он пригоден"""
+        try:
+            browser.driver.window_handles
+        except WebDriverException:
+            return "crashed"
+        if self.max_uses and browser.uses >= self.max_uses:
+            return "max_uses"
+        if self.max_heap_mb and self._heap_mb(browser.driver) > self.max_heap_mb:
+            return "max_heap"
+        return None
+
+    @staticmethod
+    def _heap_mb(driver: WebDriver) -> float:
+        """Размер используемой JS-кучи текущей вкладки в МБ"""
+        try:
+            used = driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0;"
+            )
+        except WebDriverException:
+            return 0.0
+        return (used or 0) / (1024 * 1024)
+
+    @staticmethod
+    def _reset(driver: WebDriver) -> None:
+        """Сбрасывает состояние браузера между тестами: окна, cookies и хранилища"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            # Для about:blank и страниц ошибок хранилища недоступны
+            pass
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+
+    @staticmethod
+    def _quit(driver: WebDriver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("Ошибка при закрытии браузера: %s", e)
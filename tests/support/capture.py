@@ -0,0 +1,177 @@
+import hashlib
+import io
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import allure
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow не обязателен: без него снимки прикладываются как PNG
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("never", "on-failure", "always")
+# Формат Pillow, тип вложения Allure (или MIME-тип) и расширение файла
+FORMATS = {
+    "png": ("PNG", allure.attachment_type.PNG, None),
+    "jpeg": ("JPEG", allure.attachment_type.JPG, None),
+    "webp": ("WEBP", "image/webp", "webp"),
+}
+FAILURE_NAME = "Снимок при падении теста"
+
+# Сервис текущего сеанса: через него снимают скриншоты utils и тесты
+_current_service: Optional["CaptureService"] = None
+
+
+@dataclass
+class Artifact:
+    """Готовое к прикреплению вложение"""
+    name: str
+    body: bytes
+    attachment_type: object
+    extension: Optional[str] = None
+
+
+class CaptureService:
+    """Централизованный сбор скриншотов и исходного кода страницы по политике.
+
+    Снимок делается синхронно (это команда WebDriver), а кодирование и сжатие — в фоновом
+    потоке; в Allure вложения попадают при сбросе в конце теста, с дедупликацией по хешу
+    и ограничением числа вложений на тест.
+    """
+
+    def __init__(
+        self,
+        policy: str = "on-failure",
+        image_format: str = "png",
+        quality: int = 80,
+        max_width: int = 0,
+        page_source: bool = False,
+        budget: int = 5,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика снимков: {policy}, ожидается одна из {POLICIES}")
+        if image_format not in FORMATS:
+            raise ValueError(f"Неизвестный формат снимков: {image_format}, ожидается один из {tuple(FORMATS)}")
+        if image_format != "png" and Image is None:
+            logger.warning("Pillow не установлен, формат %s заменён на png", image_format)
+            image_format = "png"
+        self.policy = policy
+        self.image_format = image_format
+        self.quality = quality
+        self.max_width = max_width
+        self.page_source = page_source
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+        self._pending: list[Future] = []
+        self._hashes: set[str] = set()
+        self._last_label: Optional[str] = None
+        self._last_source = False
+        self.dropped = 0
+
+    def capture(self, driver: WebDriver, name: str, page_source: Optional[bool] = None) -> None:
+        """Запрос снимка из кода теста; при on-failure лишь запоминает подпись для снимка при падении"""
+        if self.policy == "never":
+            return
+        if self.policy == "on-failure":
+            self._last_label = name
+            self._last_source = bool(page_source)
+            return
+        self._take(driver, name, self.page_source if page_source is None else page_source)
+
+    def capture_failure(self, driver: WebDriver) -> None:
+        """Снимок в момент падения теста (вызывается из хука отчёта)"""
+        if self.policy == "never":
+            return
+        self._take(driver, self._last_label or FAILURE_NAME, self.page_source or self._last_source)
+
+    def flush(self) -> None:
+        """Прикрепляет подготовленные вложения текущего теста с учётом бюджета"""
+        attached = 0
+        for future in self._pending:
+            try:
+                artifact = future.result()
+            except Exception as e:
+                logger.warning("Не удалось подготовить вложение: %s", e)
+                continue
+            if artifact is None:
+                continue
+            if attached >= self.budget:
+                self.dropped += 1
+                continue
+            allure.attach(
+                artifact.body,
+                name=artifact.name,
+                attachment_type=artifact.attachment_type,
+                extension=artifact.extension
+            )
+            attached += 1
+        self._pending = []
+        self._hashes = set()
+        self._last_label = None
+        self._last_source = False
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _take(self, driver: WebDriver, name: str, with_source: bool) -> None:
+        try:
+            png = driver.get_screenshot_as_png()
+            source = driver.page_source if with_source else None
+        except WebDriverException as e:
+            logger.warning("Не удалось снять скриншот '%s': %s", name, e)
+            return
+        self._pending.append(self._executor.submit(self._encode_screenshot, name, png))
+        if source is not None:
+            self._pending.append(self._executor.submit(self._encode_source, name, source))
+
+    def _is_duplicate(self, body: bytes) -> bool:
+        digest = hashlib.sha1(body).hexdigest()
+        if digest in self._hashes:
+            return True
+        self._hashes.add(digest)
+        return False
+
+    def _encode_screenshot(self, name: str, png: bytes) -> Optional[Artifact]:
+        if self._is_duplicate(png):
+            return None
+        pil_format, attachment_type, extension = FORMATS[self.image_format]
+        if Image is None or (self.image_format == "png" and not self.max_width):
+            return Artifact(name, png, attachment_type, extension)
+        image = Image.open(io.BytesIO(png))
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height))
+        if pil_format == "JPEG":
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format=pil_format, quality=self.quality, optimize=True)
+        return Artifact(name, buffer.getvalue(), attachment_type, extension)
+
+    def _encode_source(self, name: str, source: str) -> Optional[Artifact]:
+        body = source.encode("utf-8")
+        if self._is_duplicate(body):
+            return None
+        return Artifact(f"{name}: Page Source", body, allure.attachment_type.HTML)
+
+
+def activate(service: Optional[CaptureService]) -> None:
+    """Делает сервис текущим для сеанса"""
+    global _current_service
+    _current_service = service
+
+
+def current_service() -> Optional[CaptureService]:
+    return _current_service
+
+
+def capture_screenshot(driver: WebDriver, name: str, page_source: Optional[bool] = None) -> None:
+    """Снимок страницы по политике текущего сервиса"""
+    if _current_service is not None:
+        _current_service.capture(driver, name, page_source)
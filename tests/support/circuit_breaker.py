@@ -0,0 +1,288 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import requests
+from selenium.common.exceptions import WebDriverException
+
+from tests.support.api_cassette import CassetteMissError
+from tests.support.waits import FailFastError
+
+logger = logging.getLogger(__name__)
+
+# Виды сбоев стенда: отличаются от обычных падений тестов тем, что повторяются у всех тестов подряд
+CONNECTION = "connection"
+CAPTCHA = "captcha"
+SERVER_ERROR = "server_error"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+HEALTH_ACTIONS = ("skip", "fail")
+
+# Предохранитель текущего прогона (на процесс; у каждого воркера xdist свой)
+_current: Optional["HealthBoard"] = None
+
+
+def _split(value: str) -> tuple[str, ...]:
+    return tuple(p.strip() for p in value.split(",") if p.strip())
+
+
+@dataclass(frozen=True)
+class HealthSettings:
+    """Предохранитель прогона из секции [health].
+
+    threshold — сколько тестов категории подряд должны упасть из-за сбоя одного вида, чтобы
+    остальные тесты категории не запускались; probe_interval — как часто проверять, что сайт ожил.
+    """
+    enabled: bool = True
+    threshold: int = 3
+    probe_interval: float = 60
+    probe_timeout: float = 10
+    action: str = "skip"
+    captcha_markers: tuple[str, ...] = ("showcaptcha", "Я не робот", "I'm not a robot")
+
+    @classmethod
+    def from_config(cls, config) -> "HealthSettings":
+        defaults = cls()
+        section = "health"
+        action = config.get(section, "action", fallback=defaults.action)
+        if action not in HEALTH_ACTIONS:
+            raise ValueError(f"Неизвестное действие предохранителя: {action}, ожидается одно из {HEALTH_ACTIONS}")
+        markers = config.get(section, "captcha_markers", fallback="")
+        return cls(
+            enabled=config.getboolean(section, "enabled", fallback=defaults.enabled),
+            threshold=config.getint(section, "threshold", fallback=defaults.threshold),
+            probe_interval=config.getfloat(section, "probe_interval", fallback=defaults.probe_interval),
+            probe_timeout=config.getfloat(section, "probe_timeout", fallback=defaults.probe_timeout),
+            action=action,
+            captcha_markers=_split(markers) or defaults.captcha_markers,
+        )
+
+
+def classify_failure(error: Optional[BaseException]) -> Optional[str]:
+    """Вид сбоя стенда по исключению теста или None, если это обычное падение"""
+    if isinstance(error, FailFastError) and CAPTCHA in str(error):
+        return CAPTCHA
+    if isinstance(error, WebDriverException) and "net::ERR_" in (error.msg or ""):
+        return CONNECTION
+    # Промах кассеты — ConnectionError только по типу: сайт тут ни при чём
+    if isinstance(error, CassetteMissError):
+        return None
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return CONNECTION
+    if isinstance(error, requests.HTTPError) and error.response is not None and error.response.status_code >= 500:
+        return SERVER_ERROR
+    return None
+
+
+def http_probe(url: str, timeout: float, captcha_markers: tuple[str, ...] = ()) -> Callable[[], Optional[str]]:
+    """Проверка доступности по одному HTTP-запросу: None, если ответ нормальный, иначе описание сбоя"""
+    def probe() -> Optional[str]:
+        try:
+            response = requests.get(url, timeout=timeout)
+        except requests.RequestException as e:
+            return f"{CONNECTION}: {e.__class__.__name__}"
+        if response.status_code >= 500:
+            return f"{SERVER_ERROR}: HTTP {response.status_code}"
+        page = response.url + response.text[:200_000]
+        if any(marker in page for marker in captcha_markers):
+            return f"{CAPTCHA}: {response.url}"
+        return None
+    return probe
+
+
+@dataclass
+class Trip:
+    """Размыкание предохранителя: когда, из-за чего и когда тесты возобновились"""
+    kind: str
+    failures: int
+    test_id: str
+    opened_at: float
+    closed_at: Optional[float] = None
+    short_circuited: int = 0
+    probes: int = 0
+
+
+class CircuitBreaker:
+    """Предохранитель одной категории тестов.
+
+    closed — тесты идут, подряд идущие сбои одного вида считаются; после threshold сбоев — open:
+    тесты не запускаются. Раз в probe_interval выполняется проверка сайта, и если она прошла —
+    half_open: запускается один пробный тест. Он проходит — closed, падает из-за сбоя — снова open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int,
+        probe_interval: float,
+        probe: Callable[[], Optional[str]],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.probe = probe
+        self.clock = clock
+        self.state = CLOSED
+        self.failures: dict[str, int] = {}
+        self.trips: list[Trip] = []
+        self._last_probe = 0.0
+        self._last_problem = ""
+
+    @property
+    def trip(self) -> Optional[Trip]:
+        return self.trips[-1] if self.trips and self.trips[-1].closed_at is None else None
+
+    def allow(self) -> Optional[str]:
+        """None, если тест можно запускать, иначе причина отказа"""
+        if self.state != OPEN:
+            return None
+        trip = self.trip
+        now = self.clock()
+        if now - self._last_probe >= self.probe_interval:
+            self._last_probe = now
+            trip.probes += 1
+            problem = self.probe()
+            if problem is None:
+                self.state = HALF_OPEN
+                logger.info("Предохранитель %s: сайт отвечает, запускается пробный тест", self.name)
+                return None
+            self._last_problem = problem
+            logger.info("Предохранитель %s: проверка не прошла (%s)", self.name, problem)
+        trip.short_circuited += 1
+        retry_in = max(0.0, self.probe_interval - (now - self._last_probe))
+        reason = (
+            f"Предохранитель {self.name} разомкнут: {trip.kind} в {trip.failures} тестах подряд "
+            f"(последний {trip.test_id}); следующая проверка сайта через {retry_in:.0f} с"
+        )
+        if self._last_problem:
+            reason += f", последняя проверка: {self._last_problem}"
+        return reason
+
+    def record(self, test_id: str, kind: Optional[str], passed: bool) -> None:
+        """Итог теста: вид сбоя стенда (если он был) и прошёл ли тест"""
+        if self.state == HALF_OPEN:
+            if kind is None:
+                self._close()
+            else:
+                self._open(kind, self.trip.failures + 1, test_id, reopen=True)
+            return
+        # Считаются только сбои одного вида подряд: любой другой итог обрывает серию
+        count = self.failures.get(kind, 0) + 1 if kind is not None else 0
+        self.failures.clear()
+        if kind is None:
+            return
+        count = self.failures[kind] = count
+        if count >= self.threshold:
+            self._open(kind, count, test_id)
+
+    def _open(self, kind: str, failures: int, test_id: str, reopen: bool = False) -> None:
+        self.state = OPEN
+        self._last_probe = self.clock()
+        self._last_problem = ""
+        if reopen:
+            trip = self.trip
+            trip.kind, trip.failures, trip.test_id = kind, failures, test_id
+            logger.warning("Предохранитель %s: пробный тест %s упал (%s), снова разомкнут", self.name, test_id, kind)
+            return
+        self.trips.append(Trip(kind, failures, test_id, opened_at=self.clock()))
+        logger.warning(
+            "Предохранитель %s разомкнут: %s в %s тестах подряд, "
+            "остальные тесты категории не запускаются до восстановления сайта", self.name, kind, failures
+        )
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self.failures.clear()
+        trip = self.trip
+        trip.closed_at = self.clock()
+        logger.info(
+            "Предохранитель %s замкнут: сайт восстановился через "
+            "%.0f с, тесты продолжаются", self.name, trip.closed_at - trip.opened_at
+        )
+
+
+@dataclass
+class _TestHealth:
+    test_id: str
+    category: str
+    noted: list[str] = field(default_factory=list)
+
+
+class HealthBoard:
+    """Предохранители категорий тестов (ui, api) и учёт сбоев текущего теста"""
+
+    def __init__(self, settings: HealthSettings, probes: dict[str, Callable[[], Optional[str]]]):
+        self.settings = settings
+        self.breakers = {
+            category: CircuitBreaker(category, settings.threshold, settings.probe_interval, probe)
+            for category, probe in probes.items()
+        }
+        self._test: Optional[_TestHealth] = None
+
+    def begin_test(self, test_id: str, categories) -> Optional[str]:
+        """Начало теста: None, если его можно запускать, иначе причина отказа"""
+        self._test = None
+        category = next((c for c in categories if c in self.breakers), None)
+        if category is None:
+            return None
+        reason = self.breakers[category].allow()
+        if reason is None:
+            self._test = _TestHealth(test_id, category)
+        return reason
+
+    def note(self, kind: str) -> None:
+        """Сбой стенда, замеченный по ходу теста (например, неубранная CAPTCHA или ответ 5xx)"""
+        if self._test is not None and kind not in self._test.noted:
+            self._test.noted.append(kind)
+
+    def finish_phase(self, when: str, outcome: str, error: Optional[BaseException]) -> None:
+        """Итог фазы теста из отчёта pytest; учитывается первая упавшая фаза или успешный вызов"""
+        test = self._test
+        if test is None or when == "teardown" or (when == "setup" and outcome == "passed"):
+            return
+        self._test = None
+        if outcome == "skipped":
+            return
+        kind = classify_failure(error) if outcome == "failed" else None
+        if kind is None and outcome == "failed" and test.noted:
+            kind = test.noted[0]
+        self.breakers[test.category].record(test.test_id, kind, passed=outcome == "passed")
+
+    def summary_lines(self) -> list[str]:
+        lines = []
+        for breaker in self.breakers.values():
+            for trip in breaker.trips:
+                if trip.closed_at is None:
+                    state = "не восстановился до конца прогона"
+                else:
+                    state = f"восстановился через {trip.closed_at - trip.opened_at:.0f} с"
+                lines.append(
+                    f"{breaker.name}: {trip.kind} в {trip.failures} тестах подряд (последний {trip.test_id}), {state}; "
+                    f"не запущено тестов: {trip.short_circuited}, проверок сайта: {trip.probes}"
+                )
+        return lines
+
+
+def note_response(response) -> None:
+    """Ответ 5xx API засчитывается текущему тесту как сбой сервера"""
+    if _current is not None and response.status_code >= 500:
+        _current.note(SERVER_ERROR)
+
+
+def note_failure(kind: str) -> None:
+    if _current is not None:
+        _current.note(kind)
+
+
+def activate(board: Optional[HealthBoard]) -> None:
+    global _current
+    _current = board
+
+
+def current_board() -> Optional[HealthBoard]:
+    return _current
@@ -0,0 +1,170 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+CORPUS_SECTION_PREFIX = "corpus:"
+# Сколько упавших строк сохраняется в отчёте подробно; остальные только считаются
+MAX_REPORTED_FAILURES = 50
+
+
+def stable_fraction(value: str, salt: str = "") -> float:
+    """Детерминированное число из [0, 1) по строке: одинаково во всех процессах и прогонах"""
+    digest = hashlib.sha1(f"{salt}:{value}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def read_rows(path: Path) -> Iterator[dict]:
+    """Построчно читает корпус JSONL или CSV, не загружая файл целиком"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            yield from csv.DictReader(f)
+            return
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                logger.warning("%s:%s: пропущена некорректная строка (%s)", path.name, number, e)
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Корпус запросов из секции [corpus:<имя>].
+
+    sample — доля строк (отбор по хешу ключа, стабильный между прогонами; seed меняет выборку),
+    stratify/per_stratum — не больше per_stratum строк на каждое значение поля stratify,
+    limit — не больше limit строк всего (0 — без ограничений).
+    """
+    name: str
+    path: Path
+    key: str = "query"
+    sample: float = 1.0
+    seed: str = ""
+    stratify: Optional[str] = None
+    per_stratum: int = 0
+    limit: int = 0
+
+    @classmethod
+    def from_config(cls, config, name: str, base_dir: Path) -> "CorpusSpec":
+        section = CORPUS_SECTION_PREFIX + name
+        if not config.has_section(section):
+            raise KeyError(f"Корпус {name} не описан: нет секции [{section}]")
+        return cls(
+            name=name,
+            path=base_dir / config.get(section, "path"),
+            key=config.get(section, "key", fallback="query"),
+            sample=config.getfloat(section, "sample", fallback=1.0),
+            seed=config.get(section, "seed", fallback=""),
+            stratify=config.get(section, "stratify", fallback="") or None,
+            per_stratum=config.getint(section, "per_stratum", fallback=0),
+            limit=config.getint(section, "limit", fallback=0),
+        )
+
+
+@dataclass
+class CorpusRow:
+    key: str
+    stratum: str
+    data: dict
+
+    def __getitem__(self, name: str) -> Any:
+        return self.data[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.data.get(name, default)
+
+
+class Corpus:
+    """Ленивый поток строк корпуса с шардированием по хешу, выборкой и стратификацией"""
+
+    def __init__(self, spec: CorpusSpec, shard_index: int = 0, shard_count: int = 1):
+        self.spec = spec
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    def __iter__(self) -> Iterator[CorpusRow]:
+        spec = self.spec
+        per_stratum: dict[str, int] = {}
+        taken = 0
+        for data in read_rows(spec.path):
+            key = str(data.get(spec.key, ""))
+            # Шард и выборка считаются от разных солей, чтобы выборка не зависела от номера шарда
+            if int(stable_fraction(key, "shard") * self.shard_count) != self.shard_index:
+                continue
+            if spec.sample < 1.0 and stable_fraction(key, spec.seed) >= spec.sample:
+                continue
+            stratum = str(data.get(spec.stratify, "")) if spec.stratify else ""
+            if spec.per_stratum:
+                if per_stratum.get(stratum, 0) >= spec.per_stratum:
+                    continue
+                per_stratum[stratum] = per_stratum.get(stratum, 0) + 1
+            yield CorpusRow(key, stratum, data)
+            taken += 1
+            if spec.limit and taken >= spec.limit:
+                return
+
+    def describe(self) -> str:
+        spec = self.spec
+        parts = [f"{spec.path.name}", f"шард {self.shard_index + 1}/{self.shard_count}"]
+        if spec.sample < 1.0:
+            parts.append(f"выборка {spec.sample:.0%}")
+        if spec.per_stratum:
+            parts.append(f"до {spec.per_stratum} на {spec.stratify}")
+        if spec.limit:
+            parts.append(f"не больше {spec.limit}")
+        return f"Корпус {spec.name}: " + ", ".join(parts)
+
+
+@dataclass
+class CorpusReport:
+    """Итог прогона корпуса одним тестом: счётчики по стратам и первые ошибки"""
+    name: str
+    total: int = 0
+    failed: int = 0
+    by_stratum: dict[str, list[int]] = field(default_factory=dict)
+    failures: list[tuple[str, str, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def record(self, row: CorpusRow, error: Optional[str] = None) -> None:
+        """Учитывает строку корпуса: error=None — проверка прошла"""
+        counts = self.by_stratum.setdefault(row.stratum, [0, 0])
+        self.total += 1
+        counts[0] += 1
+        if error is None:
+            return
+        self.failed += 1
+        counts[1] += 1
+        if len(self.failures) < MAX_REPORTED_FAILURES:
+            self.failures.append((row.key, row.stratum, error))
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        lines = [f"Корпус {self.name}: строк {self.total}, ошибок {self.failed}, {elapsed:.1f} с"]
+        for stratum, (total, failed) in sorted(self.by_stratum.items()):
+            if stratum:
+                lines.append(f"  {stratum}: {total} строк, ошибок {failed}")
+        for key, _, error in self.failures[:10]:
+            lines.append(f"  ✗ {key!r}: {error}")
+        if self.failed > 10:
+            lines.append(f"  ... и ещё {self.failed - 10}")
+        return "\n".join(lines)
+
+    def failures_csv(self) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["key", "stratum", "error"])
+        writer.writerows(self.failures)
+        return buffer.getvalue()
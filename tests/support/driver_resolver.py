@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import re
+import shutil
+import stat
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+logger = logging.getLogger(__name__)
+
+CHROME_BINARIES = (
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+)
+WINDOWS_VERSION_KEYS = (
+    r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon",
+    r"HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon",
+)
+MAC_CHROME_BINARY = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "final_proj" / "chromedriver"
+VERSION_PATTERN = re.compile(r"(\d+)\.\d+\.\d+\.\d+")
+
+
+def detect_chrome_version(binary: Optional[str] = None) -> Optional[str]:
+    """Определяет установленную версию Chrome без обращения к сети"""
+    if sys.platform.startswith("win") and not binary:
+        for key in WINDOWS_VERSION_KEYS:
+            version = _run_for_version(["reg", "query", key, "/v", "version"])
+            if version:
+                return version
+        return None
+    candidates = [binary] if binary else [MAC_CHROME_BINARY, *CHROME_BINARIES]
+    for candidate in candidates:
+        path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if path:
+            version = _run_for_version([path, "--version"])
+            if version:
+                return version
+    return None
+
+
+def _run_for_version(command: list[str]) -> Optional[str]:
+    try:
+        output = subprocess.run(
+            command, capture_output=True, text=True, timeout=10, check=False
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(output)
+    return match.group(0) if match else None
+
+
+class DriverCache:
+    """Локальный кэш chromedriver, ключ — версия Chrome"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.index_path = self.root / self.INDEX_FILE
+
+    def lookup(self, chrome_version: str) -> Optional[str]:
+        """Ищет драйвер для точной версии Chrome, затем для её мажорной версии"""
+        index = self._read_index()
+        major = chrome_version.split(".")[0]
+        for key in (chrome_version, major):
+            path = index.get(key)
+            if path and os.path.isfile(path):
+                return path
+        return None
+
+    def store(self, chrome_version: str, driver_path: str) -> str:
+        """Копирует драйвер в кэш и закрепляет его за версией Chrome"""
+        target_dir = self.root / chrome_version
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / Path(driver_path).name
+        if Path(driver_path).resolve() != target.resolve():
+            shutil.copy2(driver_path, target)
+        target.chmod(target.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        index = self._read_index()
+        index[chrome_version] = str(target)
+        index[chrome_version.split(".")[0]] = str(target)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+        return str(target)
+
+    def _read_index(self) -> dict:
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+
+class ChromeDriverResolver:
+    """Находит chromedriver: сначала в локальном кэше, при промахе — в конфиге или через Selenium Manager"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        driver_path: Optional[str] = None,
+        chrome_binary: Optional[str] = None,
+    ):
+        self.cache = DriverCache(Path(cache_dir).expanduser() if cache_dir else DEFAULT_CACHE_DIR)
+        self.driver_path = driver_path or None
+        self.chrome_binary = chrome_binary or None
+
+    def resolve(self) -> str:
+        """Возвращает путь к chromedriver и логирует время разрешения"""
+        started = time.perf_counter()
+        chrome_version = detect_chrome_version(self.chrome_binary)
+        source = "cache"
+        path = self.cache.lookup(chrome_version) if chrome_version else None
+        if path is None:
+            source, path = self._resolve_fallback()
+            if chrome_version:
+                path = self.cache.store(chrome_version, path)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "chromedriver разрешён за %.1f мс "
+            "(источник: %s, Chrome %s): %s", elapsed_ms, source, chrome_version or 'не определён', path
+        )
+        return path
+
+    def _resolve_fallback(self) -> tuple[str, str]:
+        if self.driver_path:
+            if not os.path.isfile(self.driver_path):
+                raise FileNotFoundError(f"chromedriver из конфигурации не найден: {self.driver_path}")
+            return "config", self.driver_path
+        options = ChromeOptions()
+        if self.chrome_binary:
+            options.binary_location = self.chrome_binary
+        return "selenium-manager", SeleniumManager().driver_location(options)
+
+
+def resolver_from_config(config) -> ChromeDriverResolver:
+    """Создаёт резолвер по секции [selenium] конфигурации"""
+    return ChromeDriverResolver(
+        cache_dir=config.get("selenium", "driver_cache_dir", fallback=None),
+        driver_path=config.get("selenium", "chromedriver_path", fallback=None),
+        chrome_binary=config.get("selenium", "chrome_binary", fallback=None),
+    )
@@ -0,0 +1,268 @@
+import base64
+import fnmatch
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tests.support.api_cassette import normalize_body
+
+logger = logging.getLogger(__name__)
+
+UI_MODES = ("live", "record", "replay")
+HAR_VERSION = "1.2"
+# Буферы Chrome для тел ответов при записи: по умолчанию тела крупных страниц вытесняются
+RECORD_BUFFERS = {"maxTotalBufferSize": 200 * 1024 * 1024, "maxResourceBufferSize": 20 * 1024 * 1024}
+
+
+def _split(value: str) -> tuple[str, ...]:
+    return tuple(p.strip() for p in value.replace("\n", ",").split(",") if p.strip())
+
+
+@dataclass(frozen=True)
+class MatchRules:
+    """Правила сопоставления запросов при воспроизведении из секции [ui_replay].
+
+    ignore_params — шаблоны имён нестабильных query-параметров, которые не участвуют в ключе,
+    ignore_urls — шаблоны URL, на которые отвечается пустой 204 без учёта в промахах.
+    """
+    ignore_params: tuple[str, ...] = ()
+    ignore_urls: tuple[str, ...] = ()
+
+    @classmethod
+    def from_config(cls, config) -> "MatchRules":
+        section = "ui_replay"
+        return cls(
+            ignore_params=_split(config.get(section, "ignore_params", fallback="")),
+            ignore_urls=_split(config.get(section, "ignore_urls", fallback="")),
+        )
+
+    def ignored(self, url: str) -> bool:
+        return any(fnmatch.fnmatchcase(url, pattern) for pattern in self.ignore_urls)
+
+    def key(self, method: str, url: str, body) -> str:
+        """Ключ запроса: метод, URL без нестабильных параметров (остальные отсортированы) и тело"""
+        parts = urlsplit(url)
+        params = sorted(
+            (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not any(fnmatch.fnmatchcase(name, pattern) for pattern in self.ignore_params)
+        )
+        query = f"?{urlencode(params)}" if params else ""
+        return f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}{query} {normalize_body(body)}"
+
+
+def har_name(test_id: str) -> str:
+    """Имя HAR-архива теста: идентификатор pytest без символов, недопустимых в именах файлов"""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", test_id).strip("_") + ".har"
+
+
+def _headers(raw: Optional[dict]) -> list[dict]:
+    return [{"name": name, "value": str(value)} for name, value in (raw or {}).items()]
+
+
+def _iso(wall_time: Optional[float]) -> str:
+    moment = datetime.fromtimestamp(wall_time, timezone.utc) if wall_time else datetime.now(timezone.utc)
+    return moment.isoformat(timespec="milliseconds")
+
+
+class HarBuilder:
+    """Собирает HAR 1.2 из сетевых событий журнала производительности Chrome"""
+
+    def __init__(self):
+        self._requests: dict[str, dict] = {}
+        self.entries: list[dict] = []
+
+    def feed(self, messages: list[dict]) -> None:
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                previous = self._requests.get(request_id)
+                if previous is not None and params.get("redirectResponse"):
+                    # Редирект приходит тем же requestId: предыдущий шаг закрывается ответом-редиректом
+                    previous["response"] = params["redirectResponse"]
+                    self._finish(request_id)
+                if params["request"]["url"].startswith("data:"):
+                    continue
+                self._requests[request_id] = {"request": params["request"], "wall_time": params.get("wallTime")}
+            elif method == "Network.responseReceived" and request_id in self._requests:
+                self._requests[request_id]["response"] = params["response"]
+            elif method == "Network.loadingFinished" and request_id in self._requests:
+                self._requests[request_id]["encoded"] = params.get("encodedDataLength", 0)
+                self._requests[request_id]["finished"] = True
+            elif method == "Network.loadingFailed" and request_id in self._requests:
+                self._requests[request_id]["error"] = params.get("blockedReason") or params.get("errorText")
+                self._finish(request_id)
+
+    def build(self, driver: WebDriver) -> dict:
+        """Дочитывает тела ответов через CDP и возвращает HAR-документ"""
+        for request_id, pending in list(self._requests.items()):
+            request = pending["request"]
+            if request.get("hasPostData") and "postData" not in request:
+                # Крупные тела запросов в событие не попадают, их нужно запросить отдельно
+                try:
+                    request["postData"] = driver.execute_cdp_cmd(
+                        "Network.getRequestPostData", {"requestId": request_id}
+                    )["postData"]
+                except WebDriverException:
+                    pass
+            if pending.get("finished"):
+                pending["body"] = self._response_body(driver, request_id)
+            if "response" in pending:
+                self._finish(request_id)
+        return {
+            "log": {
+                "version": HAR_VERSION,
+                "creator": {"name": "tests.support.har_archive", "version": "1"},
+                "entries": self.entries,
+            }
+        }
+
+    def _finish(self, request_id: str) -> None:
+        pending = self._requests.pop(request_id)
+        if "response" not in pending:
+            return
+        request, response = pending["request"], pending["response"]
+        body = pending.get("body")
+        content = {"size": 0, "mimeType": response.get("mimeType", "")}
+        if body is not None:
+            content.update(text=body["body"], size=len(body["body"]))
+            if body.get("base64Encoded"):
+                content["encoding"] = "base64"
+        entry = {
+            "startedDateTime": _iso(pending.get("wall_time")),
+            "time": 0,
+            "request": {
+                "method": request["method"],
+                "url": request["url"],
+                "httpVersion": response.get("protocol", "http/1.1"),
+                "headers": _headers(request.get("headers")),
+                "queryString": [{"name": k, "value": v} for k, v in parse_qsl(urlsplit(request["url"]).query)],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": len(request.get("postData", "")),
+            },
+            "response": {
+                "status": response["status"],
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", "http/1.1"),
+                "headers": _headers(response.get("headers")),
+                "cookies": [],
+                "content": content,
+                "redirectURL": (response.get("headers") or {}).get("location", ""),
+                "headersSize": -1,
+                "bodySize": pending.get("encoded", -1),
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": 0, "receive": 0},
+        }
+        if "postData" in request:
+            entry["request"]["postData"] = {
+                "mimeType": (request.get("headers") or {}).get("Content-Type", ""),
+                "text": request["postData"],
+            }
+        if pending.get("error"):
+            entry["_error"] = pending["error"]
+        self.entries.append(entry)
+
+    @staticmethod
+    def _response_body(driver: WebDriver, request_id: str) -> Optional[dict]:
+        try:
+            return driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except WebDriverException:
+            # Тело вытеснено из буфера или ресурс из другой вкладки: запись останется без тела
+            return None
+
+
+def record_har(driver: WebDriver, messages: list[dict], path: Path) -> int:
+    """Записывает трафик теста в HAR-архив; возвращает число записей"""
+    builder = HarBuilder()
+    builder.feed(messages)
+    har = builder.build(driver)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(har, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+    missing = sum(1 for entry in builder.entries if "text" not in entry["response"]["content"])
+    logger.info("HAR записан: %s, запросов %s, без тела %s", path.name, len(builder.entries), missing)
+    return len(builder.entries)
+
+
+@dataclass
+class RecordedResponse:
+    status: int
+    reason: str
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+def _recorded_response(entry: dict) -> RecordedResponse:
+    response = entry["response"]
+    content = response.get("content", {})
+    text = content.get("text", "")
+    body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+    headers = []
+    for header in response.get("headers", []):
+        # Chrome склеивает повторяющиеся заголовки (Set-Cookie) через перевод строки
+        for value in header["value"].split("\n"):
+            headers.append((header["name"], value))
+    return RecordedResponse(response["status"], response.get("statusText", ""), headers, body)
+
+
+class HarArchive:
+    """Записанные ответы из каталога HAR-архивов с поиском по ключу запроса.
+
+    Ответы на одинаковые запросы отдаются в порядке записи (последний повторяется).
+    Сначала ищется в архиве текущего теста, затем во всех архивах каталога.
+    """
+
+    def __init__(self, directory: Path, rules: MatchRules):
+        self.directory = Path(directory)
+        self.rules = rules
+        self._by_file: dict[str, dict[str, list[RecordedResponse]]] = {}
+        self._shared: dict[str, list[RecordedResponse]] = {}
+        self._cursors: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        for path in sorted(self.directory.glob("*.har")):
+            index = self._by_file[path.name] = {}
+            for entry in json.loads(path.read_text(encoding="utf-8"))["log"]["entries"]:
+                if entry["response"]["status"] == 0 or entry.get("_error"):
+                    continue
+                request = entry["request"]
+                key = self.rules.key(request["method"], request["url"], request.get("postData", {}).get("text"))
+                response = _recorded_response(entry)
+                index.setdefault(key, []).append(response)
+                self._shared.setdefault(key, []).append(response)
+        logger.info("Загружено HAR-архивов: %s, уникальных запросов: %s", len(self._by_file), len(self._shared))
+
+    def __len__(self) -> int:
+        return len(self._by_file)
+
+    def reset(self) -> None:
+        """Начинает очередь ответов заново (в начале каждого теста)"""
+        with self._lock:
+            self._cursors.clear()
+
+    def lookup(self, method: str, url: str, body, har_file: Optional[str] = None) -> Optional[RecordedResponse]:
+        key = self.rules.key(method, url, body)
+        source, responses = "*", None
+        if har_file is not None and key in self._by_file.get(har_file, {}):
+            source, responses = har_file, self._by_file[har_file][key]
+        elif key in self._shared:
+            responses = self._shared[key]
+        if not responses:
+            return None
+        with self._lock:
+            position = self._cursors.get((source, key), 0)
+            self._cursors[(source, key)] = position + 1
+        return responses[min(position, len(responses) - 1)]
@@ -0,0 +1,123 @@
+import logging
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+from tests.support.latency_baseline import measure
+
+logger = logging.getLogger(__name__)
+
+# Статическая копия главной страницы: те же локаторы, что у MainPage, без сети, рекламы и CAPTCHA
+STAND_IN_PAGE = """<!DOCTYPE html>
+<html lang="ru">
+<head><meta charset="utf-8"><title>Дублёр главной страницы</title></head>
+<body>
+<header>
+  <input name="search" placeholder="Найти ресторан, блюдо или товар">
+  <button data-testid="search-button">Найти</button>
+  <button data-testid="ui-button">Войти</button>
+</header>
+<nav><a href="/category/deserti">Десерты</a><a href="/category/pizza">Пицца</a></nav>
+<main id="content"></main>
+</body>
+</html>
+"""
+
+
+@dataclass(frozen=True)
+class BenchSettings:
+    """Параметры замеров накладных расходов стенда из секции [harness_bench].
+
+    rounds — замеров на метрику (не меньше [baseline] min_samples, иначе U-тест не выполняется),
+    warmup — первые вызовы, которые не учитываются, driver_rounds — замеров для запуска Chrome,
+    absent_timeout — таймаут ожидания отсутствующего элемента.
+    """
+    rounds: int = 10
+    warmup: int = 2
+    driver_rounds: int = 5
+    absent_timeout: float = 1.0
+
+    @classmethod
+    def from_config(cls, config) -> "BenchSettings":
+        defaults = cls()
+        section = "harness_bench"
+        return cls(
+            rounds=config.getint(section, "rounds", fallback=defaults.rounds),
+            warmup=config.getint(section, "warmup", fallback=defaults.warmup),
+            driver_rounds=config.getint(section, "driver_rounds", fallback=defaults.driver_rounds),
+            absent_timeout=config.getfloat(section, "absent_timeout", fallback=defaults.absent_timeout),
+        )
+
+
+@dataclass(frozen=True)
+class HarnessTargets:
+    """Операции стенда, стоимость которых замеряется (создаются в conftest)"""
+    start_chrome: Callable[[], Any]
+    resolve_driver: Callable[[], str]
+    load_config: Callable[[], Any]
+    load_test_data: Callable[[], dict]
+
+
+def repeat(metric: str, func: Callable[[], Any], rounds: int, warmup: int = 0) -> list[Any]:
+    """Вызывает func warmup раз без учёта, затем rounds раз с замером как метрику теста"""
+    for _ in range(warmup):
+        func()
+    results = []
+    for _ in range(rounds):
+        with measure(metric):
+            results.append(func())
+    return results
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class StaticPageServer:
+    """Локальный HTTP-сервер статической страницы-дублёра"""
+
+    def __init__(self, page: str = STAND_IN_PAGE, host: str = "127.0.0.1", port: int = 0):
+        self.body = page.encode("utf-8")
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "StaticPageServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Статическая страница-дублёр запущена: %s", self.url)
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StaticPageServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        body = self.body
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                # Любой путь отдаёт ту же страницу: переходы по ссылкам не уходят в 404
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,242 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import ConnectTimeout, Timeout
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Методы, которые можно повторить после ошибки чтения: сервер мог уже обработать запрос
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Потоки предзагрузки помечаются, чтобы их ответы не попадали в метрики текущего теста
+_thread_state = threading.local()
+
+
+def _split_ints(value: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+
+@dataclass(frozen=True)
+class TransportSettings:
+    """Параметры транспорта api_client из секции [api_transport]"""
+    pool_connections: int = 4
+    pool_maxsize: int = 10
+    connect_timeout: float = 3.05
+    read_timeout: float = 10
+    max_retries: int = 2
+    backoff_base: float = 0.2
+    backoff_max: float = 2.0
+    retry_statuses: tuple[int, ...] = (502, 503, 504)
+    budget_ratio: float = 0.1
+    budget_min: int = 3
+    prefetch_workers: int = 4
+
+    @classmethod
+    def from_config(cls, config) -> "TransportSettings":
+        defaults = cls()
+        section = "api_transport"
+        return cls(
+            pool_connections=config.getint(section, "pool_connections", fallback=defaults.pool_connections),
+            pool_maxsize=config.getint(section, "pool_maxsize", fallback=defaults.pool_maxsize),
+            connect_timeout=config.getfloat(section, "connect_timeout", fallback=defaults.connect_timeout),
+            read_timeout=config.getfloat(
+                section, "read_timeout", fallback=config.getfloat("api", "timeout", fallback=defaults.read_timeout)
+            ),
+            max_retries=config.getint(section, "max_retries", fallback=defaults.max_retries),
+            backoff_base=config.getfloat(section, "backoff_base", fallback=defaults.backoff_base),
+            backoff_max=config.getfloat(section, "backoff_max", fallback=defaults.backoff_max),
+            retry_statuses=_split_ints(config.get(section, "retry_statuses", fallback="502, 503, 504")),
+            budget_ratio=config.getfloat(section, "budget_ratio", fallback=defaults.budget_ratio),
+            budget_min=config.getint(section, "budget_min", fallback=defaults.budget_min),
+            prefetch_workers=config.getint(section, "prefetch_workers", fallback=defaults.prefetch_workers),
+        )
+
+
+class RetryBudget:
+    """Общий на сеанс лимит повторов: не больше budget_min + budget_ratio от числа запросов.
+
+    Когда сервис деградирует, повторы быстро заканчиваются и ошибки становятся видны,
+    а не маскируются ретраями.
+    """
+
+    def __init__(self, ratio: float, minimum: int):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self) -> bool:
+        """Берёт повтор из бюджета; False — бюджет исчерпан"""
+        with self._lock:
+            if self.retries < self.minimum + self.ratio * self.requests:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+
+@dataclass
+class TransportStats:
+    """Статистика транспорта: повторы и переиспользование keep-alive соединений"""
+    requests: int = 0
+    retries: int = 0
+    retries_denied: int = 0
+    connections: int = 0
+    pooled_requests: int = 0
+    retry_reasons: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.pooled_requests - self.connections)
+
+    def summary_lines(self) -> list[str]:
+        reuse = self.reused / self.pooled_requests * 100 if self.pooled_requests else 0
+        lines = [
+            f"Запросов: {self.requests}, новых соединений: {self.connections}, "
+            f"переиспользовано keep-alive: {self.reused} ({reuse:.0f}%)",
+            f"Повторов: {self.retries}, отклонено бюджетом: {self.retries_denied}",
+        ]
+        if self.retry_reasons:
+            lines.append("Причины повторов: " + ", ".join(f"{k}: {v}" for k, v in sorted(self.retry_reasons.items())))
+        return lines
+
+
+def not_sent(error: Exception) -> bool:
+    """True, если соединение не установилось и запрос не дошёл до сервера"""
+    if isinstance(error, ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, RequestsConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class TunedAdapter(HTTPAdapter):
+    """HTTPAdapter с размером пула на хост, таймаутами по умолчанию и повторами с джиттером в рамках бюджета.
+
+    Повторяются ответы retry_statuses и ошибки соединения, при которых запрос не ушёл на сервер.
+    Таймаут чтения и обрыв соединения повторяются только для идемпотентных методов: POST поиска
+    мог быть уже обработан.
+
+    Session замеряет elapsed вокруг всего adapter.send, поэтому в задержку ответа входят
+    все попытки и паузы между ними: повторы не скрывают реальную задержку.
+    """
+
+    def __init__(self, settings: TransportSettings, budget: Optional[RetryBudget] = None):
+        super().__init__(
+            pool_connections=settings.pool_connections,
+            pool_maxsize=settings.pool_maxsize,
+            pool_block=True,
+        )
+        self.settings = settings
+        self.budget = budget or RetryBudget(settings.budget_ratio, settings.budget_min)
+        self._reasons: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def send(self, request: PreparedRequest, timeout=None, **kwargs) -> Response:
+        if timeout is None:
+            timeout = (self.settings.connect_timeout, self.settings.read_timeout)
+        self.budget.on_request()
+        attempt = 0
+        while True:
+            reason = None
+            try:
+                response = super().send(request, timeout=timeout, **kwargs)
+                if response.status_code not in self.settings.retry_statuses:
+                    break
+                reason = str(response.status_code)
+            except (RequestsConnectionError, Timeout) as e:
+                if request.method not in IDEMPOTENT_METHODS and not not_sent(e):
+                    raise
+                reason = type(e).__name__
+                response = None
+                error = e
+            if attempt >= self.settings.max_retries or not self.budget.try_acquire():
+                if response is None:
+                    raise error
+                break
+            if response is not None:
+                response.close()
+            with self._lock:
+                self._reasons[reason] = self._reasons.get(reason, 0) + 1
+            attempt += 1
+            # Full jitter: случайная пауза до экспоненциального предела
+            delay = random.uniform(0, min(self.settings.backoff_max, self.settings.backoff_base * 2 ** attempt))
+            logger.info(
+                "Повтор %s запроса %s %s через %.2f с (%s)", attempt, request.method, request.url, delay, reason
+            )
+            time.sleep(delay)
+        return response
+
+    def stats(self) -> TransportStats:
+        stats = TransportStats(
+            requests=self.budget.requests,
+            retries=self.budget.retries,
+            retries_denied=self.budget.denied,
+            retry_reasons=dict(self._reasons),
+        )
+        # Счётчики пулов urllib3: новые соединения против всех запросов через пул
+        for key in self.poolmanager.pools.keys():
+            pool = self.poolmanager.pools.get(key)
+            if pool is not None:
+                stats.connections += pool.num_connections
+                stats.pooled_requests += pool.num_requests
+        return stats
+
+
+def in_prefetch_thread() -> bool:
+    """True, если код выполняется в потоке предзагрузки"""
+    return getattr(_thread_state, "prefetching", False)
+
+
+class PrefetchRunner:
+    """Заранее и параллельно выполняет запросы независимых параметризованных API-кейсов.
+
+    Тесты по-прежнему идут по одному в порядке pytest и забирают готовый ответ своего
+    кейса, поэтому проверки, отчёты и метрики остаются детерминированными.
+    """
+
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-prefetch",
+                                            initializer=self._mark_thread)
+        self._futures: dict[str, tuple[dict, Future]] = {}
+
+    @staticmethod
+    def _mark_thread() -> None:
+        _thread_state.prefetching = True
+
+    def submit(self, case_id: str, payload: dict, call: Callable[[dict], Response]) -> None:
+        self._futures[case_id] = (payload, self._executor.submit(call, payload))
+
+    def take(self, case_id: str, payload: dict) -> Optional[Response]:
+        """Ответ, полученный заранее для этого кейса и payload; None — запроса не было или payload другой"""
+        prefetched = self._futures.pop(case_id, None)
+        if prefetched is None:
+            return None
+        expected, future = prefetched
+        if expected != payload:
+            logger.warning("Payload кейса %s отличается от предзагруженного, запрос выполняется заново", case_id)
+            future.cancel()
+            return None
+        # Исключение запроса поднимается здесь, в самом тесте, как при обычном вызове
+        return future.result()
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def close(self) -> None:
+        for _, future in self._futures.values():
+            future.cancel()
+        self._executor.shutdown(wait=True)
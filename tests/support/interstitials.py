@@ -0,0 +1,179 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from tests.support.waits import current_settings, register_fail_fast
+
+logger = logging.getLogger(__name__)
+
+# Таймаут и время «успокоения» страницы (сколько она должна оставаться без блокеров,
+# чтобы считаться чистой) по умолчанию берутся из секции [waits]
+POLL_INTERVAL = 0.1
+# Пауза перед повторным нажатием на тот же блокер, пока он исчезает
+REDISMISS_DELAY = 2.0
+
+
+def click_element(driver: WebDriver, element: WebElement) -> None:
+    """Прокручивает элемент в центр экрана и нажимает на него"""
+    driver.execute_script(
+        "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
+        element
+    )
+    element.click()
+
+
+@dataclass(frozen=True)
+class Blocker:
+    """Известное перекрытие страницы: как его найти и как убрать.
+
+    root и target — CSS-селекторы или XPath (с префиксом "xpath:"); target ищется внутри root.
+    """
+    name: str
+    root: str
+    target: str
+    dismiss: Callable[[WebDriver, WebElement], None] = click_element
+
+
+@dataclass
+class InterstitialReport:
+    """Какие блокеры были обработаны и сколько это заняло"""
+    handled: list[tuple[str, float]] = field(default_factory=list)
+    elapsed: float = 0.0
+    clear: bool = False
+    remaining: list[str] = field(default_factory=list)
+
+    def handled_names(self) -> list[str]:
+        return [name for name, _ in self.handled]
+
+    def summary(self) -> str:
+        handled = ", ".join(f"{name} ({seconds:.2f} с)" for name, seconds in self.handled) or "нет"
+        state = "страница чистая" if self.clear else f"не убраны: {', '.join(self.remaining)}"
+        return f"Обработаны блокеры: {handled}; {state}; всего {self.elapsed:.2f} с"
+
+
+BLOCKERS: dict[str, Blocker] = {}
+
+
+def register_blocker(blocker: Blocker) -> None:
+    """Регистрирует новый тип блокера для обработчика"""
+    BLOCKERS[blocker.name] = blocker
+
+
+register_blocker(Blocker(
+    name="address_popup",
+    root="div.r1nk4da0",
+    target="xpath:.//button[.//span[text()='Да']]",
+))
+register_blocker(Blocker(
+    name="captcha",
+    root="xpath://button[contains(text(), 'Я не робот') or contains(text(), \"I'm not a robot\")]",
+    target="xpath:.",
+))
+
+# Один проход по всем блокерам за один round trip: возвращает видимые блокеры и кнопки для их закрытия
+DETECT_SCRIPT = """
+const blockers = arguments[0];
+const find = (selector, context) => {
+    if (selector.startsWith('xpath:')) {
+        return document.evaluate(selector.slice(6), context, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return context === document ? document.querySelector(selector) : context.querySelector(selector);
+};
+const visible = el => !!el && el.getClientRects().length > 0
+    && getComputedStyle(el).visibility !== 'hidden';
+const found = [];
+for (const blocker of blockers) {
+    const root = find(blocker.root, document);
+    if (!visible(root)) continue;
+    found.push({name: blocker.name, target: find(blocker.target, root)});
+}
+return {ready: document.readyState, found: found};
+"""
+
+
+class InterstitialHandler:
+    """Следит сразу за всеми известными блокерами одним циклом опроса и убирает их"""
+
+    def __init__(
+        self,
+        driver: WebDriver,
+        blockers: Optional[Iterable[str]] = None,
+        timeout: Optional[float] = None,
+        settle: Optional[float] = None,
+    ):
+        self.driver = driver
+        names = list(blockers) if blockers is not None else list(BLOCKERS)
+        self.blockers = [BLOCKERS[name] for name in names]
+        settings = current_settings()
+        self.timeout = settings.interstitial_timeout if timeout is None else timeout
+        self.settle = settings.interstitial_settle if settle is None else settle
+
+    def clear(self) -> InterstitialReport:
+        """Ждёт, пока страница загрузится и останется без блокеров, убирая появившиеся"""
+        report = InterstitialReport()
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        clear_since: Optional[float] = None
+        first_seen: dict[str, float] = {}
+        last_dismiss: dict[str, float] = {}
+        specs = [{"name": b.name, "root": b.root, "target": b.target} for b in self.blockers]
+        by_name = {b.name: b for b in self.blockers}
+        while True:
+            now = time.perf_counter()
+            try:
+                state = self.driver.execute_script(DETECT_SCRIPT, specs)
+            except WebDriverException as e:
+                logger.warning("Не удалось проверить блокеры на странице: %s", e)
+                state = {"ready": "loading", "found": []}
+            found = state["found"]
+            for name in list(first_seen):
+                if name not in {item["name"] for item in found}:
+                    report.handled.append((name, now - first_seen.pop(name)))
+            for item in found:
+                name = item["name"]
+                first_seen.setdefault(name, now)
+                if item["target"] is not None and now - last_dismiss.get(name, -REDISMISS_DELAY) >= REDISMISS_DELAY:
+                    try:
+                        by_name[name].dismiss(self.driver, item["target"])
+                        last_dismiss[name] = now
+                    except WebDriverException as e:
+                        logger.warning("Не удалось убрать блокер %s: %s", name, e)
+            if found or state["ready"] != "complete":
+                clear_since = None
+            elif clear_since is None:
+                clear_since = now
+            if clear_since is not None and now - clear_since >= self.settle:
+                report.clear = True
+                break
+            if now >= deadline:
+                report.remaining = [item["name"] for item in found]
+                break
+            time.sleep(POLL_INTERVAL)
+        report.elapsed = time.perf_counter() - started
+        logger.info(report.summary())
+        return report
+
+
+def clear_interstitials(driver: WebDriver, blockers: Optional[Iterable[str]] = None, **kwargs) -> InterstitialReport:
+    """Убирает все (или только указанные) блокеры и возвращает отчёт"""
+    return InterstitialHandler(driver, blockers, **kwargs).clear()
+
+
+def blocker_visible(driver: WebDriver, name: str) -> bool:
+    """Проверяет за один round trip, виден ли блокер на странице"""
+    blocker = BLOCKERS[name]
+    try:
+        state = driver.execute_script(DETECT_SCRIPT, [{"name": name, "root": blocker.root, "target": blocker.target}])
+    except WebDriverException:
+        return False
+    return bool(state["found"])
+
+
+# CAPTCHA не исчезнет сама: ожидания элементов прерываются сразу, а не по таймауту
+register_fail_fast("captcha", lambda driver: blocker_visible(driver, "captcha"), selector=BLOCKERS["captcha"].root)
@@ -0,0 +1,306 @@
+import functools
+import json
+import logging
+import math
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+# Метрики с этим префиксом сравниваются с базовой линией только для отчёта: ни регрессий, ни подозрений
+INFO_PREFIX = "info:"
+# Перцентили, которыми сводится метрика внутри aggregate_latency (например, по корпусу запросов)
+SUMMARY_PERCENTILES = (50, 90, 99)
+
+# Регистратор текущего теста: сюда пишут хуки API клиента и page object'ы
+_current_recorder: Optional["LatencyRecorder"] = None
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с логарифмическими корзинами: память не зависит от числа замеров,
+    перцентиль отличается от точного не больше чем на половину корзины (~2.5%)"""
+    GROWTH = 1.05
+    FLOOR_MS = 0.01
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.total = 0
+
+    def add(self, value_ms: float) -> None:
+        bucket = math.floor(math.log(max(value_ms, self.FLOOR_MS) / self.FLOOR_MS, self.GROWTH))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+
+    def percentile(self, q: float) -> float:
+        rank = max(1, math.ceil(q * self.total))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return self.FLOOR_MS * self.GROWTH ** (bucket + 0.5)
+        raise ValueError("Пустая гистограмма")
+
+
+class LatencyRecorder:
+    """Собирает задержки (мс) по метрикам в рамках одного теста"""
+
+    def __init__(self, test_id: str):
+        self.test_id = test_id
+        self.samples: dict[str, list[float]] = {}
+        self.histograms: Optional[dict[str, LatencyHistogram]] = None
+
+    def add(self, metric: str, value_ms: float) -> None:
+        if self.histograms is not None:
+            self.histograms.setdefault(metric, LatencyHistogram()).add(value_ms)
+            return
+        self.samples.setdefault(metric, []).append(value_ms)
+
+    @contextmanager
+    def aggregated(self) -> Iterator[None]:
+        """Замеры блока копятся в гистограммах, а в тест попадают только перцентили метрик
+        (по одному замеру metric:p50, metric:p90, metric:p99)"""
+        self.histograms = {}
+        try:
+            yield
+        finally:
+            histograms, self.histograms = self.histograms, None
+            for metric, histogram in histograms.items():
+                for percentile in SUMMARY_PERCENTILES:
+                    self.add(f"{metric}:p{percentile}", histogram.percentile(percentile / 100))
+
+
+def activate(recorder: Optional[LatencyRecorder]) -> None:
+    """Делает регистратор текущим (None — отключает запись)"""
+    global _current_recorder
+    _current_recorder = recorder
+
+
+def record_latency(metric: str, value_ms: float) -> None:
+    """Записывает задержку в регистратор текущего теста, если он есть"""
+    if _current_recorder is not None:
+        _current_recorder.add(metric, value_ms)
+
+
+@contextmanager
+def aggregate_latency() -> Iterator[None]:
+    """Сводит замеры блока в перцентили (см. LatencyRecorder.aggregated): для тестов, которые
+    делают тысячи однотипных запросов, базовая линия растёт на три замера, а не на тысячи"""
+    if _current_recorder is None:
+        yield
+        return
+    with _current_recorder.aggregated():
+        yield
+
+
+@contextmanager
+def measure(metric: str) -> Iterator[None]:
+    """Замеряет длительность блока и записывает её как метрику"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_latency(metric, (time.perf_counter() - started) * 1000)
+
+
+def timed(metric: str):
+    """Декоратор для шагов page object'ов: замеряет длительность вызова"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(metric):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mann_whitney_p(baseline: Sequence[float], current: Sequence[float]) -> float:
+    """Односторонний p-value U-теста Манна-Уитни (гипотеза: current больше baseline).
+
+    Нормальная аппроксимация с поправкой на связки; без scipy.
+    """
+    n1, n2 = len(baseline), len(current)
+    ranked = sorted([(v, 0) for v in baseline] + [(v, 1) for v in current])
+    ranks = [0.0] * len(ranked)
+    tie_term = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        tied = j - i + 1
+        tie_term += tied ** 3 - tied
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 1)
+    u = rank_sum - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+@dataclass
+class Comparison:
+    """Результат сравнения метрики с базовой линией"""
+    metric: str
+    baseline_n: int
+    baseline_median: Optional[float]
+    current_n: int
+    current_median: float
+    change_pct: Optional[float]
+    p_value: Optional[float]
+    status: str
+
+    @property
+    def regressed(self) -> bool:
+        return self.status == "regression"
+
+
+def compare(
+    metric: str,
+    baseline: Sequence[float],
+    current: Sequence[float],
+    tolerance_pct: float,
+    alpha: float,
+    min_samples: int,
+) -> Comparison:
+    """Сравнивает выборку с базовой линией: регрессия — медиана выросла больше допуска и U-тест значим.
+
+    При малом числе замеров прогона U-тест невозможен, и выход медианы за 90-й перцентиль базовой линии
+    даёт только подозрение: так бывает примерно в каждом десятом обычном прогоне.
+    """
+    comparison = _compare(metric, baseline, current, tolerance_pct, alpha, min_samples)
+    if metric.startswith(INFO_PREFIX) and comparison.status != "new":
+        return replace(comparison, status="info")
+    return comparison
+
+
+def _compare(
+    metric: str,
+    baseline: Sequence[float],
+    current: Sequence[float],
+    tolerance_pct: float,
+    alpha: float,
+    min_samples: int,
+) -> Comparison:
+    current_median = statistics.median(current)
+    if not baseline:
+        return Comparison(metric, 0, None, len(current), current_median, None, None, "new")
+    baseline_median = statistics.median(baseline)
+    change_pct = (current_median / baseline_median - 1) * 100 if baseline_median else 0.0
+    if len(baseline) < min_samples:
+        status = "suspect" if change_pct > tolerance_pct else "ok"
+        return Comparison(
+            metric, len(baseline), baseline_median, len(current), current_median, change_pct, None, status
+        )
+    if len(current) < min_samples:
+        # Большинство шагов дают один-два замера за прогон: рост медианы больше допуска и выход
+        # за 90-й перцентиль замеров прошлых прогонов попадает в сводку, но тест не валит
+        ceiling = statistics.quantiles(baseline, n=10)[-1]
+        status = "suspect" if change_pct > tolerance_pct and current_median > ceiling else "ok"
+        return Comparison(
+            metric, len(baseline), baseline_median, len(current), current_median, change_pct, None, status
+        )
+    p_value = mann_whitney_p(baseline, current)
+    status = "regression" if change_pct > tolerance_pct and p_value < alpha else "ok"
+    return Comparison(
+        metric, len(baseline), baseline_median, len(current), current_median, change_pct, p_value, status
+    )
+
+
+def comparisons_csv(comparisons: Sequence[Comparison]) -> str:
+    """Таблица сравнения для вложения в Allure (CSV отображается как таблица)"""
+    def fmt(value, digits=1):
+        return "" if value is None else f"{value:.{digits}f}"
+
+    lines = ["metric,baseline_n,baseline_median_ms,current_n,current_median_ms,change_pct,p_value,status"]
+    for c in comparisons:
+        lines.append(",".join([
+            c.metric, str(c.baseline_n), fmt(c.baseline_median), str(c.current_n),
+            fmt(c.current_median), fmt(c.change_pct), fmt(c.p_value, 4), c.status,
+        ]))
+    return "\n".join(lines)
+
+
+class BaselineStore:
+    """Версионированный файл базовых распределений задержек по тестам.
+
+    Воркеры xdist не пишут общий файл: каждый сохраняет свои новые замеры в отдельную часть
+    (save_part), а главный процесс в конце прогона дописывает их в базовую линию (merge_parts).
+    """
+
+    def __init__(self, path: str, max_samples: int = 200):
+        self.path = Path(path)
+        self.max_samples = max_samples
+        self.data = self._load()
+        self.pending: dict[str, dict[str, list[float]]] = {}
+
+    def samples(self, test_id: str, metric: str) -> list[float]:
+        return self.data["tests"].get(test_id, {}).get(metric, [])
+
+    def update(self, test_id: str, samples: dict[str, list[float]]) -> None:
+        """Добавляет новые замеры, оставляя последние max_samples на метрику"""
+        metrics = self.data["tests"].setdefault(test_id, {})
+        pending = self.pending.setdefault(test_id, {})
+        for metric, values in samples.items():
+            rounded = [round(v, 2) for v in values]
+            metrics[metric] = (metrics.get(metric, []) + rounded)[-self.max_samples:]
+            pending[metric] = pending.get(metric, []) + rounded
+
+    def save(self) -> None:
+        self.data["revision"] += 1
+        self.data["updated"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        _write_json(self.path, self.data)
+        self.pending.clear()
+        logger.info("Базовая линия задержек обновлена: %s (ревизия %s)", self.path, self.data['revision'])
+
+    def part_path(self, worker: str) -> Path:
+        return self.path.with_name(f"{self.path.stem}.{worker}.part{self.path.suffix}")
+
+    def save_part(self, worker: str) -> None:
+        """Сохраняет новые замеры воркера отдельно от общего файла"""
+        if self.pending:
+            _write_json(self.part_path(worker), {"schema": SCHEMA_VERSION, "tests": self.pending})
+
+    def merge_parts(self) -> int:
+        """Дописывает части воркеров в базовую линию и удаляет их; возвращает число частей"""
+        parts = sorted(self.path.parent.glob(f"{self.path.stem}.*.part{self.path.suffix}"))
+        if not parts:
+            return 0
+        self.data = self._load()
+        for part in parts:
+            for test_id, samples in json.loads(part.read_text(encoding="utf-8"))["tests"].items():
+                self.update(test_id, samples)
+        self.save()
+        for part in parts:
+            part.unlink()
+        return len(parts)
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {"schema": SCHEMA_VERSION, "revision": 0, "updated": None, "tests": {}}
+        if data.get("schema") != SCHEMA_VERSION:
+            raise ValueError(
+                f"Неподдерживаемая версия схемы базовой линии {self.path}: {data.get('schema')}"
+            )
+        return data
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Временный файл свой у каждого процесса, чтобы os.replace не гонялся за чужой файл
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
@@ -0,0 +1,249 @@
+import asyncio
+import itertools
+import json
+import logging
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCATION = {"latitude": 55.7558, "longitude": 37.6173}
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class LoadProfile:
+    """Параметры нагрузки: конкурентность, темп (запросов/с, 0 — без ограничения), длительность и корпус"""
+    concurrency: int = 10
+    rate: float = 0
+    duration: float = 10
+    corpus: Sequence[str] = ("пицца",)
+    location: dict = field(default_factory=lambda: dict(DEFAULT_LOCATION))
+    timeout: float = 10
+
+    @classmethod
+    def from_config(cls, config) -> "LoadProfile":
+        """Создаёт профиль по секции [load] конфигурации"""
+        corpus = [q.strip() for q in config.get("load", "corpus", fallback="пицца").split(",")]
+        return cls(
+            concurrency=config.getint("load", "concurrency", fallback=10),
+            rate=config.getfloat("load", "rate", fallback=0),
+            duration=config.getfloat("load", "duration", fallback=10),
+            corpus=[q for q in corpus if q],
+            timeout=config.getfloat("api", "timeout", fallback=10),
+        )
+
+
+@dataclass
+class LoadReport:
+    """Итоги нагрузочного прогона.
+
+    При заданном темпе задержка считается от запланированного времени отправки, а не от фактического:
+    ожидание в очереди, пока сервер не успевает, входит в перцентили. max_lag_ms — наибольшее отставание
+    отправки от расписания, unsent — запросы расписания, которые так и не были отправлены до конца прогона.
+    """
+    requests: int
+    errors: int
+    elapsed: float
+    latencies_ms: list[float]
+    status_counts: dict = field(default_factory=dict)
+    max_lag_ms: float = 0.0
+    unsent: int = 0
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Перцентиль задержки (nearest-rank) в мс"""
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        rank = max(1, -(-len(ordered) * p // 100))
+        return ordered[int(rank) - 1]
+
+    @property
+    def percentiles(self) -> dict[str, float]:
+        values = {f"p{p}": self.percentile(p) for p in PERCENTILES}
+        values["max"] = max(self.latencies_ms, default=0.0)
+        return values
+
+    def slo_violations(self, threshold_ms: float, checked: Sequence[str]) -> list[str]:
+        """Список перцентилей, превысивших порог"""
+        percentiles = self.percentiles
+        return [
+            f"{name}={percentiles[name]:.1f} мс > {threshold_ms} мс"
+            for name in checked if percentiles[name] > threshold_ms
+        ]
+
+    def summary(self) -> str:
+        latency = ", ".join(f"{name}={value:.1f} мс" for name, value in self.percentiles.items())
+        return (
+            f"Запросов: {self.requests}, ошибок: {self.errors} ({self.error_rate:.1%}), "
+            f"пропускная способность: {self.throughput:.1f} запросов/с, {latency}, "
+            f"статусы: {self.status_counts}, отставание от расписания: до {self.max_lag_ms:.1f} мс, "
+            f"не отправлено по расписанию: {self.unsent}"
+        )
+
+
+class AsyncHTTPConnection:
+    """Минимальное keep-alive HTTP/1.1 соединение на asyncio streams"""
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.secure = parts.scheme == "https"
+        self.port = parts.port or (443 if self.secure else 80)
+        self.path = parts.path + (f"?{parts.query}" if parts.query else "")
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def post_json(self, payload: dict, headers: dict) -> int:
+        """Отправляет POST и возвращает код ответа (тело вычитывается полностью)"""
+        body = json.dumps(payload).encode("utf-8")
+        return await asyncio.wait_for(self._request("POST", body, headers), self.timeout)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+            self._reader = self._writer = None
+
+    async def _connect(self) -> None:
+        context = ssl.create_default_context() if self.secure else None
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port, ssl=context, server_hostname=self.host if self.secure else None
+        )
+
+    async def _request(self, method: str, body: bytes, headers: dict) -> int:
+        if self._writer is None:
+            await self._connect()
+        lines = [f"{method} {self.path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in headers.items() if name.lower() != "content-length"]
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self._writer.drain()
+        try:
+            status, keep_alive = await self._read_response()
+        except Exception:
+            await self.close()
+            raise
+        if not keep_alive:
+            await self.close()
+        return status
+
+    async def _read_response(self) -> tuple[int, bool]:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Соединение закрыто сервером")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in response_headers:
+            await self._reader.readexactly(int(response_headers["content-length"]))
+        else:
+            await self._reader.read()
+            return status, False
+        return status, response_headers.get("connection", "").lower() != "close"
+
+
+class LoadGenerator:
+    """Асинхронный генератор нагрузки на эндпоинт поиска с payload как в TestAPI"""
+
+    def __init__(self, url: str, profile: LoadProfile, headers: Optional[dict] = None):
+        self.url = url
+        self.profile = profile
+        self.headers = dict(headers or {"Content-Type": "application/json"})
+
+    def run(self) -> LoadReport:
+        """Запускает прогон и возвращает отчёт"""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> LoadReport:
+        queries = itertools.cycle(self.profile.corpus)
+        jobs: asyncio.Queue = asyncio.Queue(maxsize=self.profile.concurrency * 2)
+        latencies: list[float] = []
+        status_counts: dict = {}
+        errors = 0
+        max_lag = 0.0
+
+        async def worker() -> None:
+            nonlocal errors, max_lag
+            connection = AsyncHTTPConnection(self.url, self.profile.timeout)
+            try:
+                while True:
+                    job = await jobs.get()
+                    if job is None:
+                        return
+                    query, scheduled_at = job
+                    payload = {"text": query, "location": self.profile.location}
+                    sent_at = time.perf_counter()
+                    # Без темпа нагрузка замкнутая: расписания нет, задержка считается от отправки
+                    started = sent_at if scheduled_at is None else scheduled_at
+                    max_lag = max(max_lag, sent_at - started)
+                    try:
+                        status = await connection.post_json(payload, self.headers)
+                    except Exception as e:
+                        status = type(e).__name__
+                        await connection.close()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    status_counts[status] = status_counts.get(status, 0) + 1
+                    if not isinstance(status, int) or status >= 400:
+                        errors += 1
+            finally:
+                await connection.close()
+
+        started = time.perf_counter()
+        workers = [asyncio.create_task(worker()) for _ in range(self.profile.concurrency)]
+        deadline = started + self.profile.duration
+        interval = 1 / self.profile.rate if self.profile.rate else 0
+        next_at = started
+        scheduled = 0
+        while time.perf_counter() < deadline:
+            if interval:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Время отправки по расписанию едет вместе с запросом: если очередь полна и генератор
+                # ждёт, это ожидание попадает в задержку (без этого перцентили занижены — coordinated omission)
+                await jobs.put((next(queries), next_at))
+                next_at += interval
+                scheduled += 1
+            else:
+                await jobs.put((next(queries), None))
+        for _ in workers:
+            await jobs.put(None)
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - started
+        report = LoadReport(
+            requests=len(latencies),
+            errors=errors,
+            elapsed=elapsed,
+            latencies_ms=latencies,
+            status_counts=status_counts,
+            max_lag_ms=max_lag * 1000,
+            unsent=max(0, int(self.profile.duration * self.profile.rate) - scheduled) if interval else 0,
+        )
+        logger.info("Нагрузочный прогон завершён: %s", report.summary())
+        return report
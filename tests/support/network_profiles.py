@@ -0,0 +1,123 @@
+import json
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+MEDIA_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+)
+TRACKER_PATTERNS = (
+    "*mc.yandex.ru*", "*an.yandex.ru*", "*yastatic.net/metrika*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*top-fwz1.mail.ru*", "*vk.com/rtrg*",
+)
+PROFILE_SECTION_PREFIX = "network_profile:"
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """Профиль блокировки ресурсов: шаблоны URL в формате Network.setBlockedURLs.
+
+    allow — исключения из block (проверяются первыми).
+    """
+    name: str
+    block: tuple[str, ...] = ()
+    allow: tuple[str, ...] = ()
+
+
+DEFAULT_PROFILES = {
+    "full": NetworkProfile("full"),
+    "no-media": NetworkProfile("no-media", block=MEDIA_PATTERNS),
+    "functional-only": NetworkProfile("functional-only", block=MEDIA_PATTERNS + TRACKER_PATTERNS),
+}
+
+
+def _split_patterns(value: str) -> tuple[str, ...]:
+    return tuple(p.strip() for p in value.replace("\n", ",").split(",") if p.strip())
+
+
+def load_profiles(config) -> dict[str, NetworkProfile]:
+    """Встроенные профили, переопределённые секциями [network_profile:<имя>] конфигурации"""
+    profiles = dict(DEFAULT_PROFILES)
+    for section in config.sections():
+        if not section.startswith(PROFILE_SECTION_PREFIX):
+            continue
+        name = section[len(PROFILE_SECTION_PREFIX):]
+        base = profiles.get(name, NetworkProfile(name))
+        profiles[name] = NetworkProfile(
+            name,
+            block=_split_patterns(config.get(section, "block")) if config.has_option(section, "block") else base.block,
+            allow=_split_patterns(config.get(section, "allow")) if config.has_option(section, "allow") else base.allow,
+        )
+    return profiles
+
+
+def apply_profile(driver: WebDriver, profile: NetworkProfile) -> None:
+    """Включает блокировку ресурсов профиля через Chrome DevTools"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    if not profile.block:
+        return
+    if profile.allow:
+        # Упорядоченные шаблоны с исключениями поддерживаются только в новых версиях Chrome
+        patterns = [{"urlPattern": p, "block": False} for p in profile.allow]
+        patterns += [{"urlPattern": p, "block": True} for p in profile.block]
+        try:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urlPatterns": patterns})
+            logger.info(
+                "Сетевой профиль %s: %s запретов, %s исключений", profile.name, len(profile.block), len(profile.allow)
+            )
+            return
+        except WebDriverException as e:
+            logger.warning("Браузер не поддерживает исключения в Network.setBlockedURLs, allow игнорируется: %s", e)
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(profile.block)})
+    logger.info("Сетевой профиль %s: %s запретов", profile.name, len(profile.block))
+
+
+@dataclass
+class NetworkStats:
+    """Сетевой трафик теста по журналу производительности Chrome"""
+    requests: int = 0
+    blocked: int = 0
+    bytes: int = 0
+
+    def __iadd__(self, other: "NetworkStats") -> "NetworkStats":
+        self.requests += other.requests
+        self.blocked += other.blocked
+        self.bytes += other.bytes
+        return self
+
+    def summary(self) -> str:
+        return f"Запросов: {self.requests}, заблокировано: {self.blocked}, передано: {self.bytes / 1024:.1f} КБ"
+
+
+def read_performance_log(driver: WebDriver) -> Optional[list[dict]]:
+    """Считывает (и очищает) журнал производительности; None — журнал недоступен.
+
+    Журнал читается один раз, а сообщения разбирают все потребители: статистика трафика и запись HAR.
+    """
+    try:
+        entries = driver.get_log("performance")
+    except WebDriverException:
+        return None
+    return [json.loads(entry["message"])["message"] for entry in entries]
+
+
+def network_stats(messages: list[dict]) -> NetworkStats:
+    """Запросы, блокировки и байты по сообщениям журнала производительности"""
+    stats = NetworkStats()
+    for message in messages:
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            stats.requests += 1
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            stats.blocked += 1
+        elif method == "Network.loadingFinished":
+            stats.bytes += int(params.get("encodedDataLength", 0))
+    return stats
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from tests.support.interstitials import clear_interstitials
+
+logger = logging.getLogger(__name__)
+
+# Хранилища и отпечаток версии сайта (список бандлов скриптов) за один round trip
+CAPTURE_SCRIPT = """
+const dump = storage => Object.fromEntries(Object.keys(storage).map(k => [k, storage.getItem(k)]));
+return {
+    local: dump(window.localStorage),
+    session: dump(window.sessionStorage),
+    scripts: Array.from(document.scripts).map(s => s.src).filter(Boolean).sort(),
+};
+"""
+VERSION_SCRIPT = "return Array.from(document.scripts).map(s => s.src).filter(Boolean).sort();"
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite")
+
+
+def site_version(scripts: list[str]) -> str:
+    """Отпечаток версии сайта: бандлы с хешем в имени меняются при каждом релизе"""
+    return hashlib.sha1("|".join(scripts).encode("utf-8")).hexdigest()
+
+
+def config_fingerprint(config, sections=("base", "selenium")) -> str:
+    """Хеш секций конфигурации, от которых зависит состояние страницы"""
+    data = {section: dict(config[section]) for section in sections if config.has_section(section)}
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PageSnapshot:
+    """Состояние прогретой страницы: cookies, хранилища и версия сайта"""
+    url: str
+    origin: str
+    cookies: list
+    local_storage: dict
+    session_storage: dict
+    site_version: str
+    config_hash: str
+    created: float
+
+
+class PageStateCache:
+    """Снимок состояния MainPage после первой загрузки и закрытия попапов.
+
+    Последующие тесты восстанавливают его через CDP (cookies и хранилища до первого
+    скрипта страницы) и сразу получают готовую страницу. Снимок сбрасывается при
+    смене конфигурации, версии сайта или по истечении max_age.
+    """
+
+    def __init__(self, path: str, config_hash: str, max_age: float = 3600):
+        self.path = Path(path)
+        self.config_hash = config_hash
+        self.max_age = max_age
+        self.snapshot: Optional[PageSnapshot] = self._load()
+        self.restores = 0
+        self.cold_loads = 0
+
+    def open_ready(self, driver: WebDriver, url: str) -> bool:
+        """Открывает страницу в готовом состоянии; True — если состояние восстановлено из снимка"""
+        if self.snapshot is not None and self.snapshot.url == url:
+            if self._restore(driver):
+                self.restores += 1
+                return True
+            self.invalidate()
+        self.cold_loads += 1
+        driver.get(url)
+        report = clear_interstitials(driver)
+        if report.clear:
+            self.capture(driver, url)
+        return False
+
+    def capture(self, driver: WebDriver, url: str) -> PageSnapshot:
+        """Сохраняет текущее состояние страницы как снимок"""
+        state = driver.execute_script(CAPTURE_SCRIPT)
+        parts = urlsplit(driver.current_url)
+        self.snapshot = PageSnapshot(
+            url=url,
+            origin=f"{parts.scheme}://{parts.netloc}",
+            cookies=driver.get_cookies(),
+            local_storage=state["local"],
+            session_storage=state["session"],
+            site_version=site_version(state["scripts"]),
+            config_hash=self.config_hash,
+            created=time.time(),
+        )
+        self._save()
+        logger.info(
+            "Снимок состояния страницы сохранён: %s cookies, "
+            "%s ключей localStorage", len(self.snapshot.cookies), len(self.snapshot.local_storage)
+        )
+        return self.snapshot
+
+    def invalidate(self) -> None:
+        logger.info("Снимок состояния страницы сброшен")
+        self.snapshot = None
+        self.path.unlink(missing_ok=True)
+
+    def _restore(self, driver: WebDriver) -> bool:
+        snapshot = self.snapshot
+        try:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": [self._cdp_cookie(c) for c in snapshot.cookies]})
+            script = driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument",
+                {"source": self._storage_script(snapshot)}
+            )
+            try:
+                driver.get(snapshot.url)
+            finally:
+                driver.execute_cdp_cmd(
+                    "Page.removeScriptToEvaluateOnNewDocument", {"identifier": script["identifier"]}
+                )
+            version = site_version(driver.execute_script(VERSION_SCRIPT))
+        except WebDriverException as e:
+            logger.warning("Не удалось восстановить состояние страницы: %s", e)
+            return False
+        if version != snapshot.site_version:
+            logger.info("Версия сайта изменилась, снимок состояния устарел")
+            return False
+        # Быстрая проверка без ожидания: если попап всё же появился, снимок неполный
+        report = clear_interstitials(driver, settle=0)
+        if report.handled:
+            logger.info("После восстановления пришлось убрать блокеры: %s", report.summary())
+            return False
+        return report.clear
+
+    @staticmethod
+    def _cdp_cookie(cookie: dict) -> dict:
+        cdp_cookie = {key: cookie[key] for key in COOKIE_FIELDS if key in cookie}
+        if "expiry" in cookie:
+            cdp_cookie["expires"] = cookie["expiry"]
+        return cdp_cookie
+
+    @staticmethod
+    def _storage_script(snapshot: PageSnapshot) -> str:
+        return (
+            f"if (location.origin === {json.dumps(snapshot.origin)}) {{"
+            f"const local = {json.dumps(snapshot.local_storage)};"
+            f"const session = {json.dumps(snapshot.session_storage)};"
+            "for (const [k, v] of Object.entries(local)) localStorage.setItem(k, v);"
+            "for (const [k, v] of Object.entries(session)) sessionStorage.setItem(k, v);"
+            "}"
+        )
+
+    def _load(self) -> Optional[PageSnapshot]:
+        try:
+            snapshot = PageSnapshot(**json.loads(self.path.read_text(encoding="utf-8")))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        if snapshot.config_hash != self.config_hash:
+            logger.info("Конфигурация изменилась, снимок состояния страницы не используется")
+            return None
+        if time.time() - snapshot.created > self.max_age:
+            logger.info("Снимок состояния страницы устарел по времени")
+            return None
+        return snapshot
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self.snapshot), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
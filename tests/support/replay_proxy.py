@@ -0,0 +1,209 @@
+import logging
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+from tests.support.har_archive import HarArchive
+
+logger = logging.getLogger(__name__)
+
+# Заголовки, которые не переносятся из записи: тело отдаётся уже распакованным и целиком,
+# а HSTS и Alt-Svc могли бы увести браузер мимо прокси
+DROPPED_HEADERS = {
+    "content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive",
+    "strict-transport-security", "alt-svc", "date", "server",
+}
+MISS_STATUS = 404
+# Сколько промахов теста перечисляется во вложении; остальные только считаются
+MAX_REPORTED_MISSES = 100
+
+
+@dataclass
+class Miss:
+    """Запрос, для которого в HAR-архивах нет ответа"""
+    test_id: str
+    method: str
+    url: str
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.url}"
+
+
+def self_signed_context(cert: Optional[str] = None, key: Optional[str] = None) -> ssl.SSLContext:
+    """TLS-контекст прокси: заданный сертификат или одноразовый самоподписанный (через openssl).
+
+    Браузер запускается с --ignore-certificate-errors, поэтому один сертификат подходит для всех хостов.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    # Только HTTP/1.1: HTTP/2 внутри туннеля прокси не поддерживает
+    context.set_alpn_protocols(["http/1.1"])
+    if cert and key:
+        context.load_cert_chain(cert, key)
+        return context
+    if shutil.which("openssl") is None:
+        raise RuntimeError("Для воспроизведения HTTPS нужен openssl или пара cert/key в секции [ui_replay]")
+    workdir = Path(tempfile.mkdtemp(prefix="replay-proxy-"))
+    try:
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+             "-subj", "/CN=replay-proxy", "-keyout", str(workdir / "key.pem"), "-out", str(workdir / "cert.pem")],
+            check=True, capture_output=True,
+        )
+        context.load_cert_chain(str(workdir / "cert.pem"), str(workdir / "key.pem"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return context
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class ReplayProxy:
+    """Локальный прокси, который отвечает браузеру из HAR-архивов, не выходя в сеть.
+
+    HTTPS-запросы приходят через CONNECT и расшифровываются своим сертификатом. Ответ ищется
+    по методу, URL (без нестабильных параметров) и телу; промахи получают 404 и попадают в отчёт.
+    """
+
+    def __init__(self, archive: HarArchive, context: ssl.SSLContext, host: str = "127.0.0.1", port: int = 0):
+        self.archive = archive
+        self.context = context
+        self.misses: list[Miss] = []
+        self.served = 0
+        self.ignored = 0
+        self.current_test: Optional[str] = None
+        self._har_file: Optional[str] = None
+        self._test_misses: list[Miss] = []
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def chrome_arguments(self) -> list[str]:
+        """Аргументы Chrome: весь трафик через прокси, сертификат прокси принимается"""
+        return [
+            f"--proxy-server=http://{self.address}",
+            "--ignore-certificate-errors",
+        ]
+
+    def start(self) -> "ReplayProxy":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Прокси воспроизведения запущен: %s (архивов %s)", self.address, len(self.archive))
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        logger.info("Прокси воспроизведения остановлен: ответов %s, промахов %s", self.served, len(self.misses))
+
+    def __enter__(self) -> "ReplayProxy":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def begin_test(self, test_id: str, har_file: str) -> None:
+        """Ответы теста сначала берутся из его собственного архива"""
+        with self._lock:
+            self.current_test = test_id
+            self._har_file = har_file
+            self._test_misses = []
+        self.archive.reset()
+
+    def end_test(self) -> list[Miss]:
+        with self._lock:
+            misses, self._test_misses = self._test_misses, []
+            self.current_test = self._har_file = None
+        return misses
+
+    def respond(self, method: str, url: str, body: bytes):
+        """Записанный ответ, пустой ответ для игнорируемых URL или None (промах)"""
+        if self.archive.rules.ignored(url):
+            with self._lock:
+                self.ignored += 1
+            return 204, "No Content", [], b""
+        recorded = self.archive.lookup(method, url, body, self._har_file)
+        with self._lock:
+            if recorded is None:
+                miss = Miss(self.current_test or "-", method, url)
+                self.misses.append(miss)
+                self._test_misses.append(miss)
+                return None
+            self.served += 1
+        headers = [(name, value) for name, value in recorded.headers if name.lower() not in DROPPED_HEADERS]
+        return recorded.status, recorded.reason, headers, recorded.body
+
+    def _handler_class(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            # Схема и хост запросов внутри расшифрованного туннеля CONNECT
+            origin: Optional[str] = None
+
+            def do_CONNECT(self):
+                self.send_response(200, "Connection Established")
+                self.end_headers()
+                try:
+                    tls = proxy.context.wrap_socket(self.connection, server_side=True)
+                except (ssl.SSLError, OSError) as e:
+                    logger.debug("TLS-рукопожатие с %s не удалось: %s", self.path, e)
+                    self.close_connection = True
+                    return
+                host, _, port = self.path.partition(":")
+                self.origin = f"https://{host}" if port in ("", "443") else f"https://{self.path}"
+                self.connection = tls
+                self.rfile = tls.makefile("rb", self.rbufsize)
+                self.wfile = tls.makefile("wb", 0)
+                self.close_connection = False
+                # Дальше по туннелю идут обычные HTTP-запросы к этому хосту
+                while not self.close_connection:
+                    self.handle_one_request()
+
+            def do_GET(self):
+                self._respond()
+
+            do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = do_GET
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                url = self.path if self.origin is None else self.origin + self.path
+                result = proxy.respond(self.command, url, body)
+                if result is None:
+                    status, reason, headers, payload = MISS_STATUS, "Not Recorded", [], b""
+                else:
+                    status, reason, headers, payload = result
+                self.send_response(status, reason)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            def handle_one_request(self):
+                try:
+                    super().handle_one_request()
+                except (ConnectionError, socket.timeout, ssl.SSLError):
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
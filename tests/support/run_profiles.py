@@ -0,0 +1,90 @@
+import logging
+from dataclasses import dataclass
+
+from tests.support.circuit_breaker import HealthSettings
+from tests.support.http_transport import TransportSettings
+from tests.support.soak import SoakSettings
+from tests.support.tab_host import TabSettings
+from tests.support.waits import WaitSettings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SECTION_PREFIX = "profile:"
+# Ключи профиля, которые не переопределяют секции конфигурации
+PROFILE_KEYS = ("description", "markers", "workers")
+
+
+@dataclass(frozen=True)
+class RunSettings:
+    """Итоговые настройки прогона после применения профиля"""
+    profile: str
+    description: str
+    markers: str
+    workers: int
+    headless: bool
+    capture_policy: str
+    network_profile: str
+    browser_pool_size: int
+    page_state: bool
+    waits: WaitSettings
+    transport: TransportSettings
+    soak: SoakSettings
+    tabs: TabSettings
+    health: HealthSettings
+
+    def summary(self) -> str:
+        summary = (
+            f"Профиль {self.profile}: headless={self.headless}, скриншоты={self.capture_policy}, "
+            f"сеть={self.network_profile}, браузеров={self.browser_pool_size}, воркеров={self.workers or 1}, "
+            f"бюджет теста={self.waits.test_budget:g} с, маркеры={self.markers or 'все'}"
+        )
+        if self.tabs.enabled:
+            summary += ", вкладки в одном Chrome"
+        if self.soak.enabled:
+            summary += f", soak: проходов={self.soak.iterations or '∞'}, длительность={self.soak.duration or '-'} с"
+        return summary
+
+
+def available_profiles(config) -> list[str]:
+    return [s[len(PROFILE_SECTION_PREFIX):] for s in config.sections() if s.startswith(PROFILE_SECTION_PREFIX)]
+
+
+def apply_profile(config, name: str) -> None:
+    """Переносит переопределения профиля (ключи вида секция.опция) в конфигурацию.
+
+    Конфигурация меняется на месте, поэтому все читатели config_data видят значения профиля.
+    """
+    section = PROFILE_SECTION_PREFIX + name
+    if not config.has_section(section):
+        raise KeyError(f"Профиль {name} не найден, доступны: {', '.join(available_profiles(config))}")
+    for key, value in config.items(section, raw=True):
+        if key in PROFILE_KEYS:
+            continue
+        target, _, option = key.partition(".")
+        if not option:
+            raise ValueError(f"[{section}] {key}: ожидается ключ вида секция.опция")
+        if not config.has_section(target):
+            config.add_section(target)
+        config.set(target, option, value)
+
+
+def resolve(config, name: str) -> RunSettings:
+    """Применяет профиль и собирает типизированные настройки прогона"""
+    apply_profile(config, name)
+    section = PROFILE_SECTION_PREFIX + name
+    return RunSettings(
+        profile=name,
+        description=config.get(section, "description", fallback=""),
+        markers=config.get(section, "markers", fallback=""),
+        workers=config.getint(section, "workers", fallback=0),
+        headless=config.getboolean("selenium", "headless", fallback=True),
+        capture_policy=config.get("capture", "policy", fallback="on-failure"),
+        network_profile=config.get("network", "profile", fallback="full"),
+        browser_pool_size=config.getint("browser_pool", "size", fallback=1),
+        page_state=config.getboolean("page_state", "enabled", fallback=True),
+        waits=WaitSettings.from_config(config),
+        transport=TransportSettings.from_config(config),
+        soak=SoakSettings.from_config(config),
+        tabs=TabSettings.from_config(config),
+        health=HealthSettings.from_config(config),
+    )
@@ -0,0 +1,205 @@
+import argparse
+import heapq
+import json
+import logging
+import shutil
+import statistics
+from itertools import cycle
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pytest
+from allure_commons.model2 import Parameter
+from allure_commons.utils import represent
+from allure_pytest.utils import allure_full_name, get_history_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ESTIMATE = 5.0
+# Статусы, по которым длительность теста считается показательной
+MEASURED_STATUSES = ("passed", "failed")
+# Сколько тестов маркера с историей нужно, чтобы их медиана заменила оценку из конфигурации
+MIN_MARKER_SAMPLES = 3
+
+
+def parse_marker_estimates(value: str) -> dict[str, float]:
+    """Разбирает строку вида "ui: 30, api: 2" в словарь маркер -> секунды"""
+    estimates = {}
+    for part in value.split(","):
+        if ":" in part:
+            marker, seconds = part.split(":", 1)
+            estimates[marker.strip()] = float(seconds)
+    return estimates
+
+
+def load_history_durations(path: Path, last_runs: int = 5) -> dict[str, float]:
+    """Средняя длительность (с) последних прогонов каждого теста из history.json Allure по historyId"""
+    try:
+        history = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    durations = {}
+    for history_id, entry in history.items():
+        samples = [
+            item["time"]["duration"] / 1000
+            for item in entry.get("items", [])
+            if item.get("status") in MEASURED_STATUSES and "duration" in item.get("time", {})
+        ][:last_runs]
+        if samples:
+            durations[history_id] = statistics.mean(samples)
+    return durations
+
+
+def item_history_id(item: pytest.Item) -> str:
+    """historyId теста так же, как его считает allure-pytest"""
+    params = item.callspec.params if hasattr(item, "callspec") else {}
+    parameters = [Parameter(name=name, value=represent(value)) for name, value in params.items()]
+    return get_history_id(allure_full_name(item), parameters, original_values=params)
+
+
+class DurationEstimator:
+    """Оценка длительности теста: история Allure, иначе медиана известных тестов
+    с тем же маркером, иначе оценка маркера из конфигурации."""
+
+    def __init__(self, durations: dict[str, float], marker_estimates: dict[str, float],
+                 default: float = DEFAULT_ESTIMATE):
+        self.durations = durations
+        self.marker_estimates = marker_estimates
+        self.default = default
+
+    @classmethod
+    def from_config(cls, config, rootpath: Path) -> "DurationEstimator":
+        # Путь к истории задаётся относительно корня проекта, где лежит allure-report
+        history = rootpath / config.get("scheduling", "history", fallback="allure-report/history/history.json")
+        return cls(
+            durations=load_history_durations(history, config.getint("scheduling", "last_runs", fallback=5)),
+            marker_estimates=parse_marker_estimates(config.get("scheduling", "marker_estimates", fallback="")),
+            default=config.getfloat("scheduling", "default_estimate", fallback=DEFAULT_ESTIMATE),
+        )
+
+    def estimate_all(self, items: Iterable[pytest.Item]) -> dict[str, float]:
+        """Оценки длительности по nodeid для всех собранных тестов"""
+        items = list(items)
+        known: dict[str, float] = {}
+        by_marker: dict[str, list[float]] = {}
+        for item in items:
+            duration = self.durations.get(item_history_id(item))
+            if duration is None:
+                continue
+            known[item.nodeid] = duration
+            for marker in self.marker_estimates:
+                if item.get_closest_marker(marker):
+                    by_marker.setdefault(marker, []).append(duration)
+        estimates = {}
+        for item in items:
+            if item.nodeid in known:
+                estimates[item.nodeid] = known[item.nodeid]
+                continue
+            estimates[item.nodeid] = self._fallback(item, by_marker)
+        return estimates
+
+    def _fallback(self, item: pytest.Item, by_marker: dict[str, list[float]]) -> float:
+        for marker, seconds in self.marker_estimates.items():
+            if item.get_closest_marker(marker):
+                samples = by_marker.get(marker)
+                return statistics.median(samples) if len(samples or ()) >= MIN_MARKER_SAMPLES else seconds
+        return self.default
+
+
+def longest_first(items: list[pytest.Item], estimates: dict[str, float]) -> list[pytest.Item]:
+    """Тесты в порядке убывания оценки (при равенстве — по nodeid, чтобы порядок был одинаков у всех воркеров)"""
+    return sorted(items, key=lambda item: (-estimates[item.nodeid], item.nodeid))
+
+
+def lpt_partition(items: list[pytest.Item], estimates: dict[str, float], count: int) -> list[list[pytest.Item]]:
+    """Раскладывает тесты на count шардов: самый длинный тест — в наименее загруженный шард (LPT)"""
+    shards: list[list[pytest.Item]] = [[] for _ in range(count)]
+    loads = [(0.0, index) for index in range(count)]
+    heapq.heapify(loads)
+    for item in longest_first(items, estimates):
+        load, index = heapq.heappop(loads)
+        shards[index].append(item)
+        heapq.heappush(loads, (load + estimates[item.nodeid], index))
+    return shards
+
+
+def shard_summary(shards: list[list[pytest.Item]], estimates: dict[str, float]) -> list[str]:
+    return [
+        f"Шард {index}: {len(shard)} тестов, оценка {sum(estimates[i.nodeid] for i in shard):.1f} с"
+        for index, shard in enumerate(shards)
+    ]
+
+
+try:
+    from xdist.scheduler import LoadScheduling
+except ImportError:
+    LoadScheduling = None
+
+if LoadScheduling is not None:
+    class DurationScheduling(LoadScheduling):
+        """Раздача тестов xdist по одному в порядке сбора.
+
+        Воркеры уже отсортировали сбор по убыванию длительности, поэтому освободившийся
+        воркер всегда получает самый длинный из оставшихся тестов — жадный LPT.
+        """
+
+        def schedule(self):
+            assert self.collection_is_completed
+            if self.collection is not None or not self._check_nodes_have_same_collection():
+                return super().schedule()
+            self.collection = list(self.node2collection.values())[0]
+            self.pending[:] = range(len(self.collection))
+            if not self.collection:
+                return
+            self.maxschedchunk = 1
+            # По два теста на воркер вперемешку, чтобы самые длинные разошлись по разным воркерам
+            nodes = cycle(self.nodes)
+            for _ in range(min(len(self.pending), 2 * len(self.nodes))):
+                self._send_tests(next(nodes), 1)
+            if not self.pending:
+                for node in self.nodes:
+                    node.shutdown()
+
+
+def merge_results(sources: list[Path], target: Path) -> int:
+    """Объединяет каталоги allure-results шардов в один; возвращает число скопированных файлов"""
+    target.mkdir(parents=True, exist_ok=True)
+    copied = 0
+    environment: dict[str, str] = {}
+    for source in sources:
+        for path in sorted(source.iterdir()):
+            if path.name == "environment.properties":
+                for line in path.read_text(encoding="utf-8").splitlines():
+                    if "=" in line:
+                        key, value = line.split("=", 1)
+                        environment.setdefault(key.strip(), value.strip())
+                continue
+            # Результаты и вложения именуются по UUID, поэтому не пересекаются между шардами;
+            # общие файлы (categories.json, executor.json) берутся из первого шарда
+            if (target / path.name).exists():
+                continue
+            shutil.copy2(path, target / path.name)
+            copied += 1
+    if environment:
+        (target / "environment.properties").write_text(
+            "".join(f"{key}={value}\n" for key, value in environment.items()), encoding="utf-8"
+        )
+    logger.info("Объединено шардов: %s, файлов: %s -> %s", len(sources), copied, target)
+    return copied
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    # Вне pytest журнал настраивается здесь: сообщения утилиты выводятся в консоль
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Инструменты распределения тестов по шардам")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser("merge", help="Объединить allure-results шардов в один каталог")
+    merge.add_argument("sources", nargs="+", type=Path, help="Каталоги allure-results шардов")
+    merge.add_argument("-o", "--output", type=Path, default=Path("allure-results"), help="Итоговый каталог")
+    args = parser.parse_args(argv)
+    if args.command == "merge":
+        merge_results(args.sources, args.output)
+
+
+if __name__ == "__main__":
+    main()
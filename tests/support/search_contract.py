@@ -0,0 +1,209 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson не обязателен: без него ответы разбираются стандартным json
+    orjson = None
+
+from tests.support.latency_baseline import INFO_PREFIX, record_latency
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# Контракт ответа full-text-search: описан один раз подмножеством JSON Schema
+# (type, required, properties, items, enum, minLength). Лишние поля допускаются.
+SEARCH_RESPONSE_SCHEMA = {
+    "type": "object",
+    "required": ["blocks"],
+    "properties": {
+        "blocks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["type"],
+                "properties": {
+                    "type": {"type": "string", "minLength": 1},
+                    "title": {"type": ["string", "null"]},
+                    "payload": {
+                        "type": "array",
+                        "items": {"type": "object"},
+                    },
+                },
+            },
+        },
+    },
+}
+
+JSON_TYPES = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+# Валидатор: (значение, путь как кортеж сегментов, список нарушений); строка пути строится только при нарушении
+Validator = Callable[[Any, tuple, list], None]
+
+
+@dataclass
+class Violation:
+    """Нарушение контракта: путь к полю и описание"""
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+def format_path(path: tuple) -> str:
+    """Путь в виде $.blocks[0].type"""
+    return "$" + "".join(f"[{part}]" if isinstance(part, int) else f".{part}" for part in path)
+
+
+def _type_check(names: Union[str, list[str]]) -> Callable[[Any], bool]:
+    names = [names] if isinstance(names, str) else names
+    types = tuple(t for name in names for t in JSON_TYPES[name])
+    # bool — подкласс int, но в JSON это разные типы
+    if int in types and "boolean" not in names:
+        return lambda value: isinstance(value, types) and not isinstance(value, bool)
+    return lambda value: isinstance(value, types)
+
+
+def compile_schema(schema: dict) -> Validator:
+    """Превращает схему в дерево замыканий: обход ответа без интерпретации схемы на каждом узле"""
+    checks: list[Validator] = []
+
+    if "type" in schema:
+        is_type = _type_check(schema["type"])
+        expected = schema["type"] if isinstance(schema["type"], str) else " | ".join(schema["type"])
+
+        def check_type(value, path, violations):
+            if not is_type(value):
+                message = f"ожидался тип {expected}, получен {type(value).__name__}"
+                violations.append(Violation(format_path(path), message))
+                return False
+            return True
+    else:
+        def check_type(value, path, violations):
+            return True
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path, violations):
+            if value not in allowed:
+                violations.append(Violation(format_path(path), f"значение {value!r} не из {allowed}"))
+        checks.append(check_enum)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_length(value, path, violations):
+            if isinstance(value, str) and len(value) < min_length:
+                violations.append(Violation(format_path(path), f"длина меньше {min_length}"))
+        checks.append(check_length)
+
+    required = tuple(schema.get("required", ()))
+    properties = [(name, compile_schema(sub)) for name, sub in schema.get("properties", {}).items()]
+    if required or properties:
+        def check_object(value, path, violations):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    violations.append(Violation(format_path(path + (name,)), "обязательное поле отсутствует"))
+            for name, validate in properties:
+                if name in value:
+                    validate(value[name], path + (name,), violations)
+        checks.append(check_object)
+
+    if "items" in schema:
+        validate_item = compile_schema(schema["items"])
+        item_type = getattr(validate_item, "type_only", None)
+
+        if item_type is not None:
+            # Элементы проверяются только по типу: без вызова валидатора на каждый элемент
+            def check_items(value, path, violations):
+                if not isinstance(value, list):
+                    return
+                for index, item in enumerate(value):
+                    if not item_type(item):
+                        validate_item(item, path + (index,), violations)
+        else:
+            def check_items(value, path, violations):
+                if not isinstance(value, list):
+                    return
+                for index, item in enumerate(value):
+                    validate_item(item, path + (index,), violations)
+        checks.append(check_items)
+
+    def validate(value, path, violations):
+        if check_type(value, path, violations):
+            for check in checks:
+                check(value, path, violations)
+    if not checks and "type" in schema:
+        validate.type_only = is_type
+    return validate
+
+
+_validate_search_response = compile_schema(SEARCH_RESPONSE_SCHEMA)
+
+
+def decode_json(body: Union[bytes, str]) -> Any:
+    """Разбирает JSON быстрым бэкендом, если он установлен"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+@dataclass
+class ContractResult:
+    """Разобранный ответ, нарушения контракта и затраты на разбор и проверку"""
+    data: Any = None
+    violations: list[Violation] = field(default_factory=list)
+    decode_ms: float = 0.0
+    validate_ms: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.violations
+
+    def summary(self, limit: int = 10) -> str:
+        if self.error:
+            return f"Ответ не разобран: {self.error}"
+        lines = [f"Нарушений контракта: {len(self.violations)}"]
+        lines += [f"  {violation}" for violation in self.violations[:limit]]
+        if len(self.violations) > limit:
+            lines.append(f"  ... и ещё {len(self.violations) - limit}")
+        return "\n".join(lines)
+
+
+def check_search_response(body: Union[bytes, str]) -> ContractResult:
+    """Разбирает тело ответа поиска и проверяет его по контракту; время пишет в метрики теста.
+
+    Разбор и проверка занимают доли миллисекунды и сильно шумят, поэтому их метрики только для отчёта.
+    """
+    result = ContractResult()
+    started = time.perf_counter()
+    try:
+        result.data = decode_json(body)
+    except ValueError as e:
+        result.error = f"некорректный JSON ({e})"
+        return result
+    finally:
+        result.decode_ms = (time.perf_counter() - started) * 1000
+        record_latency(f"{INFO_PREFIX}contract:decode:{JSON_BACKEND}", result.decode_ms)
+    started = time.perf_counter()
+    _validate_search_response(result.data, (), result.violations)
+    result.validate_ms = (time.perf_counter() - started) * 1000
+    record_latency(f"{INFO_PREFIX}contract:validate", result.validate_ms)
+    return result
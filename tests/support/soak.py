@@ -0,0 +1,337 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import psutil
+except ImportError:  # psutil не обязателен: без него RSS читается из /proc (только Linux)
+    psutil = None
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+# Метрики CDP Performance.getMetrics: имя в отчёте -> (имя CDP, делитель)
+CDP_METRICS = {
+    "heap_mb": ("JSHeapUsedSize", 1024 * 1024),
+    "heap_total_mb": ("JSHeapTotalSize", 1024 * 1024),
+    "nodes": ("Nodes", 1),
+    "listeners": ("JSEventListeners", 1),
+    "documents": ("Documents", 1),
+    "frames": ("Frames", 1),
+}
+RSS_METRIC = "rss_mb"
+
+# Текущий регистратор soak-прогона; None — режим выносливости выключен
+_current: Optional["SoakRecorder"] = None
+
+
+def _parse_thresholds(value: str) -> dict[str, float]:
+    thresholds = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, threshold = part.partition(":")
+        thresholds[name.strip()] = float(threshold)
+    return thresholds
+
+
+@dataclass(frozen=True)
+class SoakSettings:
+    """Режим выносливости из секции [soak]: повторы UI-тестов на одном браузере.
+
+    iterations — число проходов, duration — длительность в секундах (0 — без ограничения),
+    warmup — первые проходы, не входящие в тренд, thresholds — рост метрики за прогон в %,
+    выше которого она считается утечкой.
+    """
+    iterations: int = 1
+    duration: float = 0
+    warmup: int = 1
+    min_samples: int = 5
+    thresholds: dict[str, float] = field(default_factory=lambda: {
+        "heap_mb": 20, "nodes": 20, "listeners": 20, RSS_METRIC: 25
+    })
+    output_dir: str = "soak"
+
+    @property
+    def enabled(self) -> bool:
+        return self.iterations > 1 or self.duration > 0
+
+    @classmethod
+    def from_config(cls, config) -> "SoakSettings":
+        defaults = cls()
+        section = "soak"
+        thresholds = config.get(section, "leak_threshold", fallback="")
+        return cls(
+            iterations=config.getint(section, "iterations", fallback=defaults.iterations),
+            duration=config.getfloat(section, "duration", fallback=defaults.duration),
+            warmup=config.getint(section, "warmup", fallback=defaults.warmup),
+            min_samples=config.getint(section, "min_samples", fallback=defaults.min_samples),
+            thresholds=_parse_thresholds(thresholds) if thresholds else defaults.thresholds,
+            output_dir=config.get(section, "output_dir", fallback=defaults.output_dir),
+        )
+
+
+def _proc_children() -> dict[int, list[int]]:
+    """Дерево процессов из /proc: pid родителя -> pid потомков"""
+    children: dict[int, list[int]] = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", encoding="utf-8") as f:
+                # Имя процесса в скобках может содержать пробелы: поля считаются после последней ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    return children
+
+
+def _proc_rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Суммарный RSS процесса и всех его потомков в МБ; None — измерить нельзя"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+    if not os.path.isdir("/proc"):
+        return None
+    children = _proc_children()
+    stack, total_kb = [pid], 0
+    while stack:
+        current = stack.pop()
+        total_kb += _proc_rss_kb(current)
+        stack.extend(children.get(current, ()))
+    return total_kb / 1024 if total_kb else None
+
+
+def sample_browser(driver: WebDriver) -> dict[str, float]:
+    """Снимает метрики страницы через CDP и RSS процессов браузера"""
+    metrics: dict[str, float] = {}
+    try:
+        # Повторное включение домена ничего не стоит, а браузер мог быть пересоздан пулом
+        driver.execute_cdp_cmd("Performance.enable", {})
+        raw = {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+    except WebDriverException as e:
+        logger.warning("Не удалось получить метрики CDP: %s", e)
+        raw = {}
+    for name, (cdp_name, divisor) in CDP_METRICS.items():
+        if cdp_name in raw:
+            metrics[name] = raw[cdp_name] / divisor
+    # Процесс chromedriver — корень дерева процессов Chrome этого драйвера
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is not None:
+        rss = process_tree_rss_mb(process.pid)
+        if rss is not None:
+            metrics[RSS_METRIC] = rss
+    return metrics
+
+
+@dataclass
+class Trend:
+    """Линейный тренд метрики по проходам (метод наименьших квадратов)"""
+    metric: str
+    samples: int
+    slope: float
+    start: float
+    end: float
+    r2: float
+
+    @property
+    def growth_pct(self) -> float:
+        if self.start <= 0:
+            return 0.0
+        return (self.end - self.start) / self.start * 100
+
+    def __str__(self) -> str:
+        return (
+            f"{self.metric}: {self.start:.1f} -> {self.end:.1f} ({self.growth_pct:+.1f}%, "
+            f"{self.slope:+.3f} за проход, R²={self.r2:.2f}, замеров {self.samples})"
+        )
+
+
+def fit_trend(metric: str, points: list[tuple[int, float]]) -> Optional[Trend]:
+    """Прямая по точкам (проход, значение); start/end — значения прямой на краях прогона"""
+    n = len(points)
+    if n < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    ss_tot = sum((y - mean_y) ** 2 for _, y in points)
+    ss_res = sum((y - (intercept + slope * x)) ** 2 for x, y in points)
+    r2 = 1 - ss_res / ss_tot if ss_tot else 1.0
+    first, last = points[0][0], points[-1][0]
+    return Trend(metric, n, slope, intercept + slope * first, intercept + slope * last, r2)
+
+
+@dataclass
+class Sample:
+    iteration: int
+    elapsed: float
+    test_id: str
+    metrics: dict[str, float]
+
+
+class SoakRecorder:
+    """Замеры soak-прогона: проход за проходом, тренды по каждому тесту и найденные утечки"""
+
+    def __init__(self, settings: SoakSettings):
+        self.settings = settings
+        self.samples: list[Sample] = []
+        self.iteration = 0
+        self.final = False
+        self.last_duration = 0.0
+        self.started = time.monotonic()
+
+    def record(self, test_id: str, metrics: dict[str, float]) -> None:
+        self.samples.append(Sample(self.iteration, time.monotonic() - self.started, test_id, metrics))
+
+    def test_ids(self) -> list[str]:
+        return list(dict.fromkeys(sample.test_id for sample in self.samples))
+
+    def trends(self, test_id: str) -> list[Trend]:
+        """Тренды метрик теста без проходов прогрева"""
+        series: dict[str, list[tuple[int, float]]] = {}
+        for sample in self.samples:
+            if sample.test_id != test_id or sample.iteration < self.settings.warmup:
+                continue
+            for metric, value in sample.metrics.items():
+                series.setdefault(metric, []).append((sample.iteration, value))
+        trends = (fit_trend(metric, points) for metric, points in series.items())
+        return [trend for trend in trends if trend is not None]
+
+    def leaks(self, test_id: Optional[str] = None) -> list[tuple[str, Trend]]:
+        """Метрики, выросшие за прогон сильнее порога (при достаточном числе замеров)"""
+        found = []
+        for current in [test_id] if test_id else self.test_ids():
+            for trend in self.trends(current):
+                threshold = self.settings.thresholds.get(trend.metric)
+                if threshold is None or trend.samples < self.settings.min_samples:
+                    continue
+                if trend.slope > 0 and trend.growth_pct > threshold:
+                    found.append((current, trend))
+        return found
+
+    def series_csv(self, test_id: Optional[str] = None) -> str:
+        """Временной ряд замеров в CSV: одна строка на тест и проход"""
+        metrics = list(CDP_METRICS) + [RSS_METRIC]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["iteration", "elapsed_s", "test"] + metrics)
+        for sample in self.samples:
+            if test_id is not None and sample.test_id != test_id:
+                continue
+            values = [sample.metrics.get(metric, "") for metric in metrics]
+            writer.writerow([sample.iteration, f"{sample.elapsed:.1f}", sample.test_id] + [
+                f"{value:.2f}" if isinstance(value, float) else value for value in values
+            ])
+        return buffer.getvalue()
+
+    def test_summary(self, test_id: str) -> str:
+        leaks = {trend.metric for _, trend in self.leaks(test_id)}
+        lines = [f"Проходов: {self.iteration + 1}, прогрев: {self.settings.warmup}"]
+        for trend in self.trends(test_id):
+            lines.append(f"{'УТЕЧКА ' if trend.metric in leaks else ''}{trend}")
+        return "\n".join(lines)
+
+    def summary_lines(self) -> list[str]:
+        elapsed = time.monotonic() - self.started
+        lines = [f"Проходов: {self.iteration + 1}, замеров: {len(self.samples)}, {elapsed / 60:.1f} мин"]
+        leaks = self.leaks()
+        for test_id, trend in leaks:
+            lines.append(f"УТЕЧКА {test_id} {trend}")
+        if not leaks:
+            lines.append("Рост метрик выше порогов не найден")
+        return lines
+
+    def write(self, output_dir: Path) -> Path:
+        """Сохраняет временной ряд (CSV) и тренды (JSON) прогона; возвращает путь к CSV"""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stem = output_dir / f"soak-{time.strftime('%Y%m%d-%H%M%S')}"
+        csv_path = stem.with_suffix(".csv")
+        csv_path.write_text(self.series_csv(), encoding="utf-8")
+        leaks = {(test_id, trend.metric) for test_id, trend in self.leaks()}
+        trends = {
+            test_id: [
+                {**trend.__dict__, "growth_pct": trend.growth_pct, "leak": (test_id, trend.metric) in leaks}
+                for trend in self.trends(test_id)
+            ]
+            for test_id in self.test_ids()
+        }
+        stem.with_suffix(".json").write_text(
+            json.dumps({"settings": {**self.settings.__dict__}, "iterations": self.iteration + 1, "trends": trends},
+                       ensure_ascii=False, indent=2),
+            encoding="utf-8"
+        )
+        return csv_path
+
+
+def iteration_schedule(items: list, recorder: SoakRecorder, is_soak_item) -> Iterator[tuple]:
+    """Порядок выполнения soak-прогона: пары (тест, следующий тест) для pytest_runtest_protocol.
+
+    Первый проход выполняет все тесты, следующие — только отобранные is_soak_item. При заданной
+    duration длительность прохода оценивается по предыдущему: прогон не выходит за duration.
+    """
+    settings = recorder.settings
+    soak_items = [item for item in items if is_soak_item(item)]
+    current = list(items)
+    while True:
+        iteration_started = time.monotonic()
+        more = bool(soak_items) and (settings.iterations <= 0 or recorder.iteration + 1 < settings.iterations)
+        if more and settings.duration and recorder.last_duration:
+            # Должны уложиться и этот проход, и следующий
+            more = iteration_started - recorder.started + 2 * recorder.last_duration <= settings.duration
+        recorder.final = not more
+        # Следующий тест после последнего в проходе — первый тест следующего прохода,
+        # чтобы фикстуры модуля и сеанса (браузер) не закрывались между проходами
+        following = soak_items[0] if more else None
+        for index, item in enumerate(current):
+            yield item, current[index + 1] if index + 1 < len(current) else following
+        recorder.last_duration = time.monotonic() - iteration_started
+        if not more:
+            return
+        recorder.iteration += 1
+        logger.info("Soak: проход %s, прошло %.0f с", recorder.iteration + 1, time.monotonic() - recorder.started)
+        current = soak_items
+
+
+def activate(recorder: Optional[SoakRecorder]) -> None:
+    global _current
+    _current = recorder
+
+
+def current_recorder() -> Optional[SoakRecorder]:
+    return _current
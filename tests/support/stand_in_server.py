@@ -0,0 +1,93 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit
+
+from tests.support.api_cassette import CassetteStore, request_key
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PATH = "/eats/v1/full-text-search/v1/search"
+FALLBACK_BODY = json.dumps({"blocks": []})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Очередь соединений побольше, чтобы нагрузочный прогон не упирался в backlog
+    request_queue_size = 128
+
+
+class StandInServer:
+    """Локальный HTTP-дублёр API поиска: отвечает из кассеты или заготовленным ответом"""
+
+    def __init__(self, store: Optional[CassetteStore] = None, host: str = "127.0.0.1", port: int = 0):
+        self.store = store
+        self.misses = 0
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL эндпоинта поиска на дублёре"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Дублёр API запущен: %s", self.url)
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        logger.info("Дублёр API остановлен (запросов без записи в кассете: %s)", self.misses)
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def lookup(self, method: str, path: str, body: bytes) -> tuple[int, str, str]:
+        """Возвращает статус, Content-Type и тело ответа для запроса"""
+        if urlsplit(path).path != SEARCH_PATH:
+            return 404, "application/json", json.dumps({"error": "not found"})
+        entry = self.store.get(request_key(method, path, body)) if self.store else None
+        if entry is not None:
+            return entry["status"], entry.get("headers", {}).get("Content-Type", "application/json"), entry["body"]
+        if method != "POST":
+            return 405, "application/json", json.dumps({"error": "method not allowed"})
+        self.misses += 1
+        return 200, "application/json", FALLBACK_BODY
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self._respond()
+
+            def do_POST(self):
+                self._respond()
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, content_type, text = stand_in.lookup(self.command, self.path, body)
+                payload = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import queue
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Текущий тест процесса: один на воркер xdist, потоки теста (предзагрузка, скриншоты) пишут под ним же
+_test_id: Optional[str] = None
+_listener: Optional[QueueListener] = None
+_ring: Optional["RingBuffer"] = None
+_handlers: list[logging.Handler] = []
+
+
+def _split(value: str) -> tuple[str, ...]:
+    return tuple(p.strip() for p in value.split(",") if p.strip())
+
+
+@dataclass(frozen=True)
+class LogSettings:
+    """Журнал прогона из секции [logging].
+
+    level — уровень файла журнала, ring_level и ring_size — что и сколько последних записей теста
+    держится в памяти для вложения при падении, quiet_loggers — болтливые библиотеки не ниже WARNING.
+    """
+    level: str = "INFO"
+    directory: str = "logs"
+    ring_size: int = 500
+    ring_level: str = "INFO"
+    quiet_loggers: tuple[str, ...] = ("urllib3", "selenium")
+
+    @classmethod
+    def from_config(cls, config) -> "LogSettings":
+        defaults = cls()
+        section = "logging"
+        quiet = config.get(section, "quiet_loggers", fallback=None)
+        return cls(
+            level=config.get(section, "level", fallback=defaults.level).upper(),
+            directory=config.get(section, "directory", fallback=defaults.directory),
+            ring_size=config.getint(section, "ring_size", fallback=defaults.ring_size),
+            ring_level=config.get(section, "ring_level", fallback=defaults.ring_level).upper(),
+            quiet_loggers=defaults.quiet_loggers if quiet is None else _split(quiet),
+        )
+
+
+def worker_id() -> str:
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+class ContextFilter(logging.Filter):
+    """Помечает запись идентификаторами теста и воркера (в потоке, который пишет в журнал)"""
+
+    def __init__(self, worker: str):
+        super().__init__()
+        self.worker = worker
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.test_id = _test_id
+        record.worker = self.worker
+        return True
+
+
+# Аргументы, которые нельзя изменить после вызова логгера: с ними сообщение можно собрать позже
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+_exception_formatter = logging.Formatter()
+
+
+def freeze(record: logging.LogRecord) -> logging.LogRecord:
+    """Фиксирует запись в момент вызова логгера, пока она ещё не ушла в очередь или буфер теста.
+
+    Исключение сразу превращается в текст: живой traceback держит кадры, а с ними драйвер
+    и страницы упавшего теста. Сообщение с изменяемыми аргументами (списки, словари, объекты)
+    собирается сразу, иначе поток записи увидит их уже изменёнными; строки и числа остаются
+    ленивыми.
+    """
+    if record.exc_info:
+        if not record.exc_text:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+    if record.args:
+        values = record.args.values() if isinstance(record.args, dict) else record.args
+        if not all(isinstance(value, _IMMUTABLE_ARGS) for value in values):
+            record.msg = record.getMessage()
+            record.args = None
+    return record
+
+
+class LazyQueueHandler(QueueHandler):
+    """Кладёт запись в очередь без лишней подготовки: сообщение с неизменяемыми аргументами
+    собирается из шаблона уже в потоке записи.
+
+    Очередь не покидает процесс, поэтому запись не нужно готовить к сериализации, как это делает
+    QueueHandler.prepare, — достаточно зафиксировать её (см. freeze).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return freeze(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "test_id": getattr(record, "test_id", None),
+            "worker": getattr(record, "worker", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RingBuffer(logging.Handler):
+    """Последние записи текущего теста; в текст превращаются, только если тест упал"""
+
+    def __init__(self, size: int, level: int):
+        super().__init__(level)
+        self.records: deque[logging.LogRecord] = deque(maxlen=size)
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(freeze(record))
+
+    def clear(self) -> None:
+        self.records.clear()
+
+    def dump(self) -> str:
+        return "\n".join(self.format(record) for record in list(self.records))
+
+
+def configure(settings: LogSettings, base_dir: Path) -> Path:
+    """Настраивает журнал процесса один раз: очередь, поток записи в файл и буфер теста"""
+    global _listener, _ring
+    if _listener is not None:
+        return Path(_handlers[0].baseFilename)
+    worker = worker_id()
+    directory = base_dir / settings.directory
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{worker}.jsonl"
+    level = logging.getLevelName(settings.level)
+    ring_level = logging.getLevelName(settings.ring_level)
+    context = ContextFilter(worker)
+
+    file_handler = logging.FileHandler(path, mode="w", encoding="utf-8", delay=True)
+    file_handler.setFormatter(JsonFormatter())
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(records, file_handler)
+    _listener.start()
+
+    queue_handler = LazyQueueHandler(records)
+    queue_handler.setLevel(level)
+    queue_handler.addFilter(context)
+    _ring = RingBuffer(settings.ring_size, ring_level)
+    _ring.addFilter(context)
+
+    root = logging.getLogger()
+    root.setLevel(min(level, ring_level))
+    root.addHandler(queue_handler)
+    root.addHandler(_ring)
+    _handlers[:] = [file_handler, queue_handler, _ring]
+    for name in settings.quiet_loggers:
+        logging.getLogger(name).setLevel(max(logging.WARNING, level))
+    logger.info("Журнал прогона: %s", path)
+    return path
+
+
+def shutdown() -> None:
+    """Дописывает очередь в файл и снимает обработчики"""
+    global _listener, _ring
+    if _listener is None:
+        return
+    _listener.stop()
+    file_handler, queue_handler, ring = _handlers
+    root = logging.getLogger()
+    root.removeHandler(queue_handler)
+    root.removeHandler(ring)
+    file_handler.close()
+    _handlers.clear()
+    _listener = _ring = None
+
+
+def begin_test(test_id: str) -> None:
+    global _test_id
+    _test_id = test_id
+    if _ring is not None:
+        _ring.clear()
+
+
+def end_test() -> None:
+    global _test_id
+    _test_id = None
+
+
+def failure_log() -> Optional[str]:
+    """Записи текущего теста из буфера (JSON Lines) или None, если их нет"""
+    if _ring is None or not _ring.records:
+        return None
+    return _ring.dump()
@@ -0,0 +1,370 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # fcntl есть только в Unix: без него блокировка действует в пределах процесса
+    fcntl = None
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver import Remote
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.remote.command import Command
+
+from tests.support.browser_pool import BrowserPool
+from tests.support.soak import process_tree_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Команды уровня сессии: выполняются без переключения на вкладку
+UNROUTED_COMMANDS = {Command.NEW_SESSION, Command.QUIT, Command.W3C_GET_WINDOW_HANDLES, Command.GET_LOG}
+# Состояния document.readyState, при которых загрузка считается завершённой для стратегии вкладки
+READY_STATES = {"none": None, "eager": ("interactive", "complete"), "normal": ("complete",)}
+READY_POLL = 0.05
+
+
+@dataclass(frozen=True)
+class TabSettings:
+    """Режим вкладок из секции [tabs]: один Chrome на прогон, у каждого воркера своя вкладка.
+
+    isolated — отдельный контекст браузера (cookies, хранилища) на вкладку,
+    page_load_strategy — до какого состояния вкладка ждёт загрузку страницы; общая сессия открыта
+    со стратегией none, и ожидание идёт короткими командами, а не под блокировкой,
+    script_slice — сколько секунд один скрипт батча действий может ждать элемент под блокировкой.
+    """
+    enabled: bool = False
+    isolated: bool = True
+    page_load_strategy: str = "eager"
+    script_slice: float = 0.25
+    monitor_interval: float = 0.5
+    history: str = "resource_runs.json"
+    history_runs: int = 20
+
+    @classmethod
+    def from_config(cls, config) -> "TabSettings":
+        defaults = cls()
+        section = "tabs"
+        return cls(
+            enabled=config.getboolean(section, "enabled", fallback=defaults.enabled),
+            isolated=config.getboolean(section, "isolated", fallback=defaults.isolated),
+            page_load_strategy=config.get(section, "page_load_strategy", fallback=defaults.page_load_strategy),
+            script_slice=config.getfloat(section, "script_slice", fallback=defaults.script_slice),
+            monitor_interval=config.getfloat(section, "monitor_interval", fallback=defaults.monitor_interval),
+            history=config.get(section, "history", fallback=defaults.history),
+            history_runs=config.getint(section, "history_runs", fallback=defaults.history_runs),
+        )
+
+
+class CommandLock:
+    """Блокировка команд общей сессии WebDriver для потоков и процессов (воркеров xdist).
+
+    В файле блокировки хранится вкладка, на которую сессия переключена сейчас: переключение
+    нужно только когда предыдущая команда выполнялась в другой вкладке.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._depth = 0
+
+    def __enter__(self) -> "CommandLock":
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth == 1 and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if self._depth == 0 and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    @property
+    def current(self) -> str:
+        return os.pread(self._fd, 256, 0).decode("utf-8").strip()
+
+    @current.setter
+    def current(self, handle: Optional[str]) -> None:
+        data = (handle or "").encode("utf-8")
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, data, 0)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class TabDriver(Remote):
+    """WebDriver одной вкладки поверх общей сессии Chrome.
+
+    Каждая команда выполняется под общей блокировкой и, при необходимости, после переключения
+    на свою вкладку. Долгие ожидания под блокировку не попадают: загрузка страницы проверяется
+    опросом readyState, а батчи действий ждут элементы отрезками по script_slice секунд.
+    Список окон и журнал производительности видят только вкладки своего контекста.
+    """
+
+    def __init__(
+        self,
+        executor: str,
+        session_id: str,
+        lock: CommandLock,
+        spool_dir: Path,
+        isolated: bool = True,
+        page_load_strategy: str = "eager",
+        script_slice: float = 0.25,
+    ):
+        if page_load_strategy not in READY_STATES:
+            raise ValueError(f"Неизвестная стратегия загрузки вкладки: {page_load_strategy}")
+        self._attach_session_id = session_id
+        self.lock = lock
+        self.spool_dir = spool_dir
+        self.page_load_strategy = page_load_strategy
+        self.script_slice = script_slice
+        self.handle: Optional[str] = None
+        self.context_id: Optional[str] = None
+        options = ChromeOptions()
+        super().__init__(command_executor=executor, options=options)
+        self._open_tab(isolated)
+
+    def start_session(self, capabilities: dict) -> None:
+        """Подключение к существующей сессии вместо создания новой"""
+        self.session_id = self._attach_session_id
+        self.caps = {"browserName": "chrome"}
+
+    def _open_tab(self, isolated: bool) -> None:
+        with self.lock:
+            params = {"url": "about:blank"}
+            if isolated:
+                self.context_id = self.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+                params["browserContextId"] = self.context_id
+            # Идентификатор цели DevTools совпадает с дескриптором окна chromedriver
+            self.handle = self.execute_cdp_cmd("Target.createTarget", params)["targetId"]
+        logger.info("Открыта вкладка %s в общем браузере (контекст %s)", self.handle[:8], self.context_id or 'общий')
+
+    def execute(self, driver_command: str, params: dict = None):
+        with self.lock:
+            if driver_command not in UNROUTED_COMMANDS and self.handle and self.lock.current != self.handle:
+                super().execute(Command.SWITCH_TO_WINDOW, {"handle": self.handle})
+                self.lock.current = self.handle
+            response = super().execute(driver_command, params)
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                self.handle = self.lock.current = params["handle"]
+            elif driver_command == Command.CLOSE:
+                # Сессия осталась без текущего окна: следующая команда любой вкладки переключится
+                self.lock.current = None
+            return response
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict) -> dict:
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+    def get(self, url: str) -> None:
+        """Переход без удержания блокировки на время загрузки: сессия не ждёт загрузку (стратегия none),
+        готовность проверяется отдельными короткими командами, между которыми работают другие вкладки"""
+        ready = READY_STATES[self.page_load_strategy]
+        # Переход по якорю не меняет документ: ждать нечего
+        if ready is None or ("#" in url and url.split("#")[0] == self.current_url.split("#")[0]):
+            super().get(url)
+            return
+        # Метка старого документа: пока она видна, readyState относится к предыдущей странице
+        self.execute_script("window.__tabNavigating = true;")
+        super().get(url)
+        timeout = self.timeouts.page_load
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.execute_script("return window.__tabNavigating ? 'navigating' : document.readyState;")
+            if state in ready:
+                return
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"Страница {url} не загрузилась за {timeout:.0f} с (readyState: {state})")
+            time.sleep(READY_POLL)
+
+    def _own_targets(self) -> set[str]:
+        targets = self.execute_cdp_cmd("Target.getTargets", {})["targetInfos"]
+        return {
+            t["targetId"] for t in targets
+            if t["type"] == "page" and (self.context_id is None or t.get("browserContextId") == self.context_id)
+        }
+
+    @property
+    def window_handles(self) -> list[str]:
+        own = self._own_targets()
+        return [handle for handle in super().window_handles if handle in own]
+
+    def get_log(self, log_type: str) -> list[dict]:
+        """Журнал сессии общий: чужие записи откладываются в файлы вкладок-владельцев"""
+        if log_type != "performance":
+            return super().get_log(log_type)
+        with self.lock:
+            entries = super().get_log(log_type)
+            owners = {}
+            targets = self.execute_cdp_cmd("Target.getTargets", {})["targetInfos"]
+            for target in targets:
+                owners[target["targetId"]] = target.get("browserContextId") or "default"
+            own_key = self.context_id or "default"
+            own, foreign = [], {}
+            for entry in entries:
+                webview = json.loads(entry["message"]).get("webview")
+                key = owners.get(webview, "default")
+                (own if key == own_key else foreign.setdefault(key, [])).append(entry)
+            for key, items in foreign.items():
+                with open(self.spool_dir / f"{key}.jsonl", "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(item) + "\n" for item in items)
+            spool = self.spool_dir / f"{own_key}.jsonl"
+            if spool.exists():
+                own = [json.loads(line) for line in spool.read_text(encoding="utf-8").splitlines()] + own
+                spool.unlink()
+        return own
+
+    def quit(self) -> None:
+        """Закрывает вкладки своего контекста; сам браузер и сессия принадлежат хосту"""
+        try:
+            with self.lock:
+                for handle in self._own_targets():
+                    self.execute_cdp_cmd("Target.closeTarget", {"targetId": handle})
+                if self.context_id:
+                    self.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+                self.lock.current = None
+        finally:
+            self.stop_client()
+            self.command_executor.close()
+
+
+class TabPool(BrowserPool):
+    """Пул вкладок общего браузера: сброс состояния ограничен своим контекстом"""
+
+    @staticmethod
+    def _reset(driver: TabDriver) -> None:
+        handles = driver.window_handles
+        for handle in handles:
+            if handle != driver.handle:
+                driver.execute_cdp_cmd("Target.closeTarget", {"targetId": handle})
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            pass
+        # Network.clearBrowserCookies очистил бы cookies всех воркеров
+        params = {"browserContextId": driver.context_id} if driver.context_id else {}
+        driver.execute_cdp_cmd("Storage.clearCookies", params)
+        driver.get("about:blank")
+
+    @staticmethod
+    def _heap_mb(driver: TabDriver) -> float:
+        # Рост памяти браузера в целом отслеживает хост, вкладка не пересоздаётся по размеру кучи
+        return 0.0
+
+
+class TabHost:
+    """Общий Chrome прогона: запускается в главном процессе, воркеры подключаются к его сессии"""
+
+    def __init__(self, driver: Remote, workdir: Path):
+        self.driver = driver
+        self.workdir = workdir
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        (self.workdir / "spool").mkdir(exist_ok=True)
+
+    @property
+    def info(self) -> dict:
+        """Всё, что нужно воркеру для подключения (передаётся через workerinput xdist)"""
+        return {
+            "executor": self.driver.command_executor._url,
+            "session_id": self.driver.session_id,
+            "lock": str(self.workdir / "commands.lock"),
+            "spool": str(self.workdir / "spool"),
+        }
+
+    def close(self) -> None:
+        try:
+            self.driver.quit()
+        except WebDriverException as e:
+            logger.warning("Не удалось закрыть общий браузер: %s", e)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def open_tab(info: dict, settings: TabSettings) -> TabDriver:
+    return TabDriver(
+        info["executor"], info["session_id"], CommandLock(info["lock"]), Path(info["spool"]),
+        isolated=settings.isolated, page_load_strategy=settings.page_load_strategy, script_slice=settings.script_slice,
+    )
+
+
+class ResourceMonitor:
+    """Пиковый RSS дерева процессов прогона (pytest, воркеры, браузеры) и пропускная способность"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        # Число UI-тестов прогона заполняется по итоговым отчётам
+        self.tests = 0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+
+    def start(self) -> "ResourceMonitor":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.finished = time.monotonic()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = process_tree_rss_mb(os.getpid())
+            if rss is not None:
+                self.peak_rss_mb = max(self.peak_rss_mb, rss)
+
+    def record(self, mode: str, workers: int) -> dict:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            "mode": mode,
+            "workers": workers,
+            "tests": self.tests,
+            "seconds": round(elapsed, 1),
+            "tests_per_min": round(self.tests / elapsed * 60, 2) if elapsed else 0.0,
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+
+def save_run(path: Path, run: dict, max_runs: int) -> list[dict]:
+    """Добавляет прогон в историю и возвращает её"""
+    try:
+        runs = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        runs = []
+    runs = (runs + [run])[-max_runs:]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(runs, ensure_ascii=False, indent=1), encoding="utf-8")
+    return runs
+
+
+def comparison_lines(run: dict, history: list[dict]) -> list[str]:
+    """Текущий прогон против последнего прогона другим способом с тем же числом воркеров"""
+    lines = [
+        f"Режим: {'вкладки в одном Chrome' if run['mode'] == 'tabs' else 'браузер на воркер'}, "
+        f"воркеров {run['workers']}: тестов {run['tests']} за {run['seconds']:.0f} с "
+        f"({run['tests_per_min']:.1f} в мин), пиковый RSS {run['peak_rss_mb']:.0f} МБ"
+    ]
+    other = next(
+        (r for r in reversed(history[:-1]) if r["mode"] != run["mode"] and r["workers"] == run["workers"]), None
+    )
+    if other is None:
+        lines.append("Для сравнения нет прогона другим способом с тем же числом воркеров")
+        return lines
+    throughput = run["tests_per_min"] / other["tests_per_min"] if other["tests_per_min"] else 0
+    memory = run["peak_rss_mb"] / other["peak_rss_mb"] if other["peak_rss_mb"] else 0
+    lines.append(
+        f"Против режима {other['mode']} ({other['finished']}): пропускная способность x{throughput:.2f}, "
+        f"пиковый RSS x{memory:.2f} ({other['tests_per_min']:.1f} в мин, {other['peak_rss_mb']:.0f} МБ)"
+    )
+    return lines
@@ -0,0 +1,191 @@
+import functools
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+# Трассировщик текущего сеанса: через него пишут спаны page object'ы, utils и хуки pytest
+_current_tracer: Optional["Tracer"] = None
+
+
+def _command_args(command: str, params: Optional[dict]) -> dict:
+    """Аргументы команды WebDriver, полезные в трассе: локатор, элемент, начало скрипта"""
+    if not params:
+        return {}
+    args = {}
+    if "using" in params:
+        args["locator"] = f"{params['using']}={params.get('value')}"
+    if "id" in params:
+        args["element"] = str(params["id"])[:12]
+    if "script" in params:
+        args["script"] = " ".join(params["script"].split())[:80]
+    if "url" in params:
+        args["url"] = params["url"]
+    return args
+
+
+class CommandStats:
+    """Число команд WebDriver и top_n самых медленных из них (остальные не хранятся)"""
+
+    def __init__(self, top_n: int):
+        self.top_n = top_n
+        self.count = 0
+        self._slowest: list[tuple[float, int, str, dict]] = []
+        self._order = itertools.count()
+
+    def add(self, name: str, duration_ms: float, args: dict) -> None:
+        self.count += 1
+        entry = (duration_ms, next(self._order), name, args)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, entry)
+        elif duration_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self, limit: int) -> list[tuple[str, float, dict]]:
+        ordered = sorted(self._slowest, key=lambda e: e[0], reverse=True)[:limit]
+        return [(name, duration_ms, args) for duration_ms, _, name, args in ordered]
+
+
+class Tracer:
+    """Собирает спаны команд WebDriver, шагов page object'ов, фикстур и тестов
+    в формате Chrome Trace Event (открывается в chrome://tracing и Perfetto).
+
+    Память ограничена: в трассе остаются последние max_events событий, по командам хранятся
+    только счётчики и top_n самых медленных — на тест (до его окончания) и на весь прогон.
+    """
+
+    def __init__(self, process_name: str = "pytest", max_events: int = 100_000, top_n: int = 10):
+        self.pid = os.getpid()
+        self.metadata = {
+            "name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+            "args": {"name": process_name},
+        }
+        self.events: deque[dict] = deque(maxlen=max_events)
+        self.dropped = 0
+        self.current_test: Optional[str] = None
+        self.path: Optional[str] = None
+        self.top_n = top_n
+        self.commands = CommandStats(top_n)
+        self._test_commands: dict[Optional[str], CommandStats] = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, args: Optional[dict] = None) -> Iterator[None]:
+        """Записывает полный спан (ph=X) вокруг блока"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((started - self._origin) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": dict(args or {}, test=self.current_test),
+            }
+            with self._lock:
+                if len(self.events) == self.events.maxlen:
+                    self.dropped += 1
+                self.events.append(event)
+                if category == "webdriver":
+                    command = (name, duration * 1000, args or {})
+                    self.commands.add(*command)
+                    test = self._test_commands.get(self.current_test)
+                    if test is None:
+                        test = self._test_commands[self.current_test] = CommandStats(self.top_n)
+                    test.add(*command)
+
+    def end_test(self, test_id: Optional[str]) -> None:
+        """Отбрасывает команды закончившегося теста: в прогоне остаются только самые медленные"""
+        with self._lock:
+            self._test_commands.pop(test_id, None)
+
+    def instrument(self, driver: WebDriver) -> WebDriver:
+        """Оборачивает driver.execute: через него проходят все удалённые команды, включая команды элементов"""
+        original = driver.execute
+
+        def traced_execute(driver_command: str, params: dict = None):
+            with self.span(driver_command, "webdriver", _command_args(driver_command, params)):
+                return original(driver_command, params)
+
+        driver.execute = traced_execute
+        return driver
+
+    def command_count(self, test_id: Optional[str]) -> int:
+        """Число команд WebDriver, выполненных в рамках теста"""
+        stats = self._test_commands.get(test_id)
+        return stats.count if stats is not None else 0
+
+    def slowest_commands(self, test_id: Optional[str] = None, limit: int = 10) -> list[tuple[str, float, dict]]:
+        """Самые медленные команды текущего теста (или всего прогона, если test_id не задан)"""
+        stats = self.commands if test_id is None else self._test_commands.get(test_id)
+        return stats.slowest(limit) if stats is not None else []
+
+    def slowest_summary(self, test_id: Optional[str] = None, limit: int = 10) -> str:
+        total = self.command_count(test_id) if test_id else self.commands.count
+        lines = [f"Команд WebDriver: {total}"]
+        for name, duration_ms, args in self.slowest_commands(test_id, limit):
+            details = ", ".join(f"{key}={value}" for key, value in args.items())
+            lines.append(f"{duration_ms:9.1f} мс  {name}  {details}")
+        return "\n".join(lines)
+
+    def write(self, path: str) -> str:
+        """Сохраняет трассу в JSON-файл"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"traceEvents": [self.metadata, *self.events], "displayTimeUnit": "ms"}
+        target.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        logger.info(
+            "Трасса WebDriver сохранена: %s (%s событий, ранних отброшено: %s)",
+            target, len(data['traceEvents']), self.dropped
+        )
+        self.path = str(target)
+        return self.path
+
+
+def activate(tracer: Optional[Tracer]) -> None:
+    """Делает трассировщик текущим для сеанса"""
+    global _current_tracer
+    _current_tracer = tracer
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _current_tracer
+
+
+@contextmanager
+def trace_span(name: str, category: str = "step", args: Optional[dict] = None) -> Iterator[None]:
+    """Спан текущего трассировщика (без трассировщика ничего не делает)"""
+    if _current_tracer is None:
+        yield
+        return
+    with _current_tracer.span(name, category, args):
+        yield
+
+
+def traced(name: str, category: str = "page"):
+    """Декоратор для шагов page object'ов и утилит"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
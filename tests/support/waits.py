@@ -0,0 +1,205 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+
+class FailFastError(WebDriverException):
+    """Ожидание прервано условием быстрого отказа (например, на странице CAPTCHA)"""
+
+
+class WaitBudgetExceeded(TimeoutException):
+    """Исчерпан бюджет времени теста на ожидания"""
+
+
+@dataclass(frozen=True)
+class WaitSettings:
+    """Таймауты и параметры адаптивного опроса из секции [waits]"""
+    default_timeout: float = 15
+    navigation_timeout: float = 30
+    interstitial_timeout: float = 10
+    interstitial_settle: float = 0.5
+    poll_min: float = 0.05
+    poll_max: float = 1.0
+    backoff: float = 1.5
+    test_budget: float = 90
+    fail_fast: tuple[str, ...] = ("captcha",)
+    fail_fast_every: int = 3
+
+    @classmethod
+    def from_config(cls, config) -> "WaitSettings":
+        defaults = cls()
+        section = "waits"
+
+        def number(option: str, default: float) -> float:
+            return config.getfloat(section, option, fallback=default)
+
+        fail_fast = config.get(section, "fail_fast", fallback=",".join(defaults.fail_fast))
+        return cls(
+            default_timeout=number("default_timeout", config.getfloat("selenium", "timeout", fallback=15)),
+            navigation_timeout=number("navigation_timeout", defaults.navigation_timeout),
+            interstitial_timeout=number("interstitial_timeout", defaults.interstitial_timeout),
+            interstitial_settle=number("interstitial_settle", defaults.interstitial_settle),
+            poll_min=number("poll_min", defaults.poll_min),
+            poll_max=number("poll_max", defaults.poll_max),
+            backoff=number("backoff", defaults.backoff),
+            test_budget=number("test_budget", defaults.test_budget),
+            fail_fast=tuple(name.strip() for name in fail_fast.split(",") if name.strip()),
+            fail_fast_every=max(1, config.getint(section, "fail_fast_every", fallback=defaults.fail_fast_every)),
+        )
+
+
+class TimeBudget:
+    """Общий для всех ожиданий теста запас времени"""
+
+    def __init__(self, total: float):
+        self.total = total
+        self.deadline = time.monotonic() + total
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+
+_settings = WaitSettings()
+_budget: Optional[TimeBudget] = None
+# Условия быстрого отказа: имя -> функция(driver) -> True, если ждать дальше бессмысленно
+FAIL_FAST_CONDITIONS: dict[str, Callable[[WebDriver], bool]] = {}
+# Те же условия как селекторы (CSS или "xpath:..."), которые проверяются внутри скриптов браузера
+FAIL_FAST_SELECTORS: dict[str, str] = {}
+
+
+def configure(settings: WaitSettings) -> None:
+    """Задаёт параметры ожиданий для сеанса"""
+    global _settings
+    _settings = settings
+
+
+def current_settings() -> WaitSettings:
+    return _settings
+
+
+def start_budget(total: Optional[float] = None) -> TimeBudget:
+    """Начинает бюджет времени нового теста"""
+    global _budget
+    _budget = TimeBudget(_settings.test_budget if total is None else total)
+    return _budget
+
+
+def stop_budget() -> None:
+    global _budget
+    _budget = None
+
+
+def register_fail_fast(name: str, condition: Callable[[WebDriver], bool], selector: Optional[str] = None) -> None:
+    """Регистрирует условие быстрого отказа, доступное по имени в [waits] fail_fast.
+
+    selector — видимый элемент, по которому условие можно проверить без Python (например, в батче действий).
+    """
+    FAIL_FAST_CONDITIONS[name] = condition
+    if selector is not None:
+        FAIL_FAST_SELECTORS[name] = selector
+
+
+def fail_fast_selectors(names: Optional[Sequence[str]] = None) -> dict[str, str]:
+    """Селекторы включённых условий быстрого отказа: имя -> CSS или "xpath:..." """
+    names = _settings.fail_fast if names is None else names
+    return {name: FAIL_FAST_SELECTORS[name] for name in names if name in FAIL_FAST_SELECTORS}
+
+
+def budgeted_timeout(timeout: Optional[float] = None) -> float:
+    """Таймаут ожидания с учётом остатка бюджета теста"""
+    requested = _settings.default_timeout if timeout is None else timeout
+    if _budget is None:
+        return requested
+    remaining = _budget.remaining()
+    if remaining <= 0:
+        raise WaitBudgetExceeded(f"Бюджет ожиданий теста ({_budget.total} с) исчерпан")
+    return min(requested, remaining)
+
+
+def poll_intervals() -> tuple[float, float, float]:
+    """Параметры адаптивного опроса: начальный интервал, максимальный и множитель"""
+    return _settings.poll_min, _settings.poll_max, _settings.backoff
+
+
+class AdaptiveWait:
+    """Явное ожидание с опросом от частого к редкому, бюджетом теста и быстрым отказом.
+
+    Совместимо по интерфейсу с WebDriverWait: until/until_not принимают expected_conditions.
+    """
+
+    def __init__(
+        self,
+        driver: WebDriver,
+        timeout: Optional[float] = None,
+        fail_fast: Optional[Sequence[str]] = None,
+        ignored_exceptions: Sequence[type] = (NoSuchElementException, StaleElementReferenceException),
+    ):
+        self.driver = driver
+        self.timeout = timeout
+        self.fail_fast = _settings.fail_fast if fail_fast is None else tuple(fail_fast)
+        self.ignored_exceptions = tuple(ignored_exceptions)
+
+    def until(self, method: Callable, message: str = ""):
+        """Ждёт, пока method(driver) вернёт истинное значение, и возвращает его"""
+        return self._wait(method, message, expect=True)
+
+    def until_not(self, method: Callable, message: str = ""):
+        """Ждёт, пока method(driver) вернёт ложное значение"""
+        return self._wait(method, message, expect=False)
+
+    def _wait(self, method: Callable, message: str, expect: bool):
+        requested = _settings.default_timeout if self.timeout is None else self.timeout
+        timeout = budgeted_timeout(requested)
+        started = time.monotonic()
+        deadline = started + timeout
+        interval, poll_max, backoff = poll_intervals()
+        last_error: Optional[Exception] = None
+        polls = 0
+        while True:
+            try:
+                value = method(self.driver)
+                if bool(value) == expect:
+                    return value if expect else True
+            except self.ignored_exceptions as e:
+                if not expect:
+                    return True
+                last_error = e
+            polls += 1
+            remaining = deadline - time.monotonic()
+            # Каждая проверка быстрого отказа — лишний round trip, поэтому она идёт раз в fail_fast_every
+            # опросов и перед таймаутом, чтобы CAPTCHA не выдавалась за обычное ожидание
+            if polls % _settings.fail_fast_every == 0 or remaining <= 0:
+                self._check_fail_fast(message, started)
+            if remaining <= 0:
+                reason = " (ограничено бюджетом теста)" if timeout < requested else ""
+                raise TimeoutException(
+                    f"{message or 'Условие не выполнено'} за {timeout:.1f} с{reason}"
+                    + (f": {last_error.msg}" if isinstance(last_error, WebDriverException) else "")
+                )
+            time.sleep(min(interval, remaining))
+            interval = min(interval * backoff, poll_max)
+
+    def _check_fail_fast(self, message: str, started: float) -> None:
+        for name in self.fail_fast:
+            condition = FAIL_FAST_CONDITIONS.get(name)
+            if condition is not None and condition(self.driver):
+                raise FailFastError(
+                    f"{message or 'Ожидание'} прервано: {name} "
+                    f"(через {time.monotonic() - started:.2f} с)"
+                )
+
+
+def wait(driver: WebDriver, timeout: Optional[float] = None, fail_fast: Optional[Sequence[str]] = None) -> AdaptiveWait:
+    """Создаёт адаптивное ожидание с таймаутом из конфигурации по умолчанию"""
+    return AdaptiveWait(driver, timeout=timeout, fail_fast=fail_fast)
@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import statistics
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import allure
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+# Порог метрики задаётся в секции [performance] ключом page_<метрика>, например page_lcp_ms
+THRESHOLD_PREFIX = "page_"
+# Метрики на графике тренда в Allure (по панели на метрику)
+CHART_METRICS = ("ttfb_ms", "fcp_ms", "lcp_ms", "cls", "tbt_ms", "transfer_kb")
+
+# Наблюдатели PerformanceObserver ставятся до скриптов страницы на каждом новом документе:
+# LCP, CLS (максимальное окно сдвигов, как в web-vitals) и длинные задачи
+OBSERVER_SCRIPT = """
+(() => {
+  if (window.__webVitals) return;
+  const state = window.__webVitals = {lcp: null, cls: 0, longTasks: [], windowValue: 0, windowStart: 0, lastShift: 0};
+  try { performance.setResourceTimingBufferSize(1000); } catch (e) {}
+  const observe = (type, callback) => {
+    try {
+      new PerformanceObserver(list => list.getEntries().forEach(callback)).observe({type, buffered: true});
+    } catch (e) {}
+  };
+  observe('largest-contentful-paint', e => { state.lcp = e.renderTime || e.loadTime || e.startTime; });
+  observe('layout-shift', e => {
+    if (e.hadRecentInput) return;
+    if (state.windowValue && e.startTime - state.lastShift < 1000 && e.startTime - state.windowStart < 5000) {
+      state.windowValue += e.value;
+    } else {
+      state.windowValue = e.value;
+      state.windowStart = e.startTime;
+    }
+    state.lastShift = e.startTime;
+    state.cls = Math.max(state.cls, state.windowValue);
+  });
+  observe('longtask', e => { state.longTasks.push([e.startTime, e.duration]); });
+})();
+"""
+
+# Сбор метрик текущего документа. Если наблюдатели не поставлены заранее (например, вкладка
+# открыта ссылкой), LCP и CLS берутся из буфера браузера, длинные задачи недоступны.
+# Повторный сбор в том же документе (переход внутри SPA) учитывает только новые ресурсы и задачи.
+COLLECT_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const collect = (state, observed) => {
+  const since = window.__webVitalsCollected || 0;
+  const nav = performance.getEntriesByType('navigation')[0];
+  const paint = {};
+  performance.getEntriesByType('paint').forEach(p => { paint[p.name] = p.startTime; });
+  const resources = performance.getEntriesByType('resource').filter(r => r.startTime >= since);
+  const tasks = state.longTasks ? state.longTasks.filter(t => t[0] >= since) : null;
+  window.__webVitalsCollected = performance.now();
+  done({
+    url: location.href,
+    observed: observed,
+    soft: since > 0,
+    navigation: nav ? {
+      ttfb: nav.responseStart, dcl: nav.domContentLoadedEventEnd, load: nav.loadEventEnd,
+      transfer: nav.transferSize
+    } : null,
+    paint: paint,
+    lcp: state.lcp,
+    cls: state.cls,
+    longTasks: tasks,
+    resources: {
+      count: resources.length,
+      transfer: resources.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+      decoded: resources.reduce((sum, r) => sum + (r.decodedBodySize || 0), 0)
+    }
+  });
+};
+if (window.__webVitals) {
+  collect(window.__webVitals, true);
+} else {
+  const state = {lcp: null, cls: 0, longTasks: null};
+  try {
+    new PerformanceObserver(l => l.getEntries().forEach(e => { state.lcp = e.renderTime || e.startTime; }))
+      .observe({type: 'largest-contentful-paint', buffered: true});
+    new PerformanceObserver(l => l.getEntries().forEach(e => { if (!e.hadRecentInput) state.cls += e.value; }))
+      .observe({type: 'layout-shift', buffered: true});
+  } catch (e) {}
+  // Записи из буфера доставляются асинхронно
+  setTimeout(() => collect(state, false), 100);
+}
+"""
+
+# Текущий сборщик сеанса: через него метрики снимают page object'ы и тесты
+_current: Optional["WebVitalsCollector"] = None
+
+
+def install_observer(driver: WebDriver) -> None:
+    """Ставит наблюдатели на каждый новый документ вкладки (до скриптов страницы)"""
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": OBSERVER_SCRIPT})
+
+
+def parse_metrics(raw: dict) -> dict[str, float]:
+    """Плоский набор метрик страницы: время в мс, объёмы в КБ, CLS без единиц"""
+    metrics: dict[str, float] = {}
+    navigation = raw.get("navigation")
+    # После перехода внутри SPA Navigation Timing и отрисовка относятся к исходному документу
+    if navigation and not raw.get("soft"):
+        metrics["ttfb_ms"] = navigation["ttfb"]
+        metrics["dom_content_loaded_ms"] = navigation["dcl"]
+        if navigation["load"]:
+            metrics["load_ms"] = navigation["load"]
+        metrics["document_kb"] = navigation["transfer"] / 1024
+        paint = raw.get("paint") or {}
+        if "first-paint" in paint:
+            metrics["fp_ms"] = paint["first-paint"]
+        if "first-contentful-paint" in paint:
+            metrics["fcp_ms"] = paint["first-contentful-paint"]
+        if raw.get("lcp") is not None:
+            metrics["lcp_ms"] = raw["lcp"]
+        metrics["cls"] = raw.get("cls") or 0.0
+    tasks = raw.get("longTasks")
+    if tasks is not None:
+        metrics["long_tasks"] = len(tasks)
+        # Total Blocking Time: всё, что дольше 50 мс в каждой длинной задаче
+        metrics["tbt_ms"] = sum(max(0.0, duration - 50) for _, duration in tasks)
+    resources = raw.get("resources") or {}
+    metrics["resources"] = resources.get("count", 0)
+    metrics["transfer_kb"] = resources.get("transfer", 0) / 1024
+    metrics["decoded_kb"] = resources.get("decoded", 0) / 1024
+    return {name: round(value, 4) for name, value in metrics.items()}
+
+
+def thresholds_from_config(config) -> dict[str, float]:
+    """Пороги метрик из ключей page_<метрика> секции [performance]"""
+    if not config.has_section("performance"):
+        return {}
+    return {
+        key[len(THRESHOLD_PREFIX):]: float(value)
+        for key, value in config.items("performance")
+        if key.startswith(THRESHOLD_PREFIX) and value.strip()
+    }
+
+
+@dataclass
+class Violation:
+    page: str
+    metric: str
+    value: float
+    threshold: float
+
+    def __str__(self) -> str:
+        return f"{self.page} {self.metric}: {self.value:.4g} > {self.threshold:g}"
+
+
+class WebVitalsHistory:
+    """История метрик по прогонам: файл на прогон (и воркер xdist) с медианами по страницам"""
+
+    def __init__(self, path: str, max_runs: int = 20):
+        self.path = Path(path)
+        self.max_runs = max_runs
+
+    def runs(self, network_profile: Optional[str] = None) -> list[dict]:
+        """Последние прогоны по времени; файлы воркеров одного прогона объединяются"""
+        merged: dict[str, dict] = {}
+        for file in sorted(self.path.glob("*.json")):
+            try:
+                data = json.loads(file.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning("Пропущен файл истории метрик %s: %s", file.name, e)
+                continue
+            if data.get("schema") != SCHEMA_VERSION:
+                continue
+            if network_profile is not None and data.get("network_profile") != network_profile:
+                continue
+            run = merged.setdefault(data["run_id"], {**data, "pages": {}})
+            run["pages"].update(data["pages"])
+        return sorted(merged.values(), key=lambda run: run["started"])[-self.max_runs:]
+
+    def write(self, run: dict, worker: str) -> Path:
+        self.path.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(run["started"]))
+        target = self.path / f"{stamp}-{run['run_id'][:8]}-{worker}.json"
+        tmp_path = target.with_name(target.name + ".tmp")
+        tmp_path.write_text(json.dumps(run, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, target)
+        self._prune()
+        return target
+
+    def _prune(self) -> None:
+        """Удаляет файлы прогонов старше max_runs (с запасом на воркеры)"""
+        files = sorted(self.path.glob("*.json"))
+        for file in files[:-self.max_runs * 8]:
+            file.unlink(missing_ok=True)
+
+
+def trend_svg(title: str, runs: list[dict[str, float]], metrics=CHART_METRICS) -> str:
+    """График тренда: панель на метрику, точка на прогон (последняя — текущий)"""
+    width, panel_height, pad = 560, 70, 30
+    metrics = [m for m in metrics if any(m in run for run in runs)]
+    height = pad + panel_height * len(metrics)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" '
+        f'font-size="11"><text x="8" y="18" font-size="13">{title}</text>'
+    ]
+    step = (width - 140) / max(1, len(runs) - 1)
+    for index, metric in enumerate(metrics):
+        top = pad + index * panel_height
+        values = [(i, run[metric]) for i, run in enumerate(runs) if metric in run]
+        low, high = min(v for _, v in values), max(v for _, v in values)
+        scale = (panel_height - 25) / ((high - low) or 1)
+        points = [(100 + i * step, top + panel_height - 12 - (v - low) * scale) for i, v in values]
+        polyline = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        last_x, last_y = points[-1]
+        parts.append(
+            f'<text x="8" y="{top + 30}">{metric}</text>'
+            f'<text x="8" y="{top + 45}" fill="#888">{low:.4g}–{high:.4g}</text>'
+            f'<polyline points="{polyline}" fill="none" stroke="#4a7bd0" stroke-width="1.5"/>'
+            f'<circle cx="{last_x:.1f}" cy="{last_y:.1f}" r="3" fill="#d04a4a"/>'
+            f'<text x="{last_x + 6:.1f}" y="{last_y + 4:.1f}">{values[-1][1]:.4g}</text>'
+        )
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+class WebVitalsCollector:
+    """Сбор фронтенд-метрик страниц за сеанс: проверка порогов, вложения и история прогонов"""
+
+    def __init__(
+        self,
+        history: WebVitalsHistory,
+        thresholds: dict[str, float],
+        network_profile: str = "full",
+        run_id: Optional[str] = None,
+    ):
+        self.history = history
+        self.thresholds = thresholds
+        self.network_profile = network_profile
+        self.run_id = run_id or uuid.uuid4().hex
+        self.started = time.time()
+        self.samples: dict[str, list[dict[str, float]]] = {}
+        self.violations: list[Violation] = []
+        self._pending: list[Violation] = []
+        self._previous_runs: Optional[list[dict]] = None
+
+    def collect(self, driver: WebDriver, page: str) -> dict[str, float]:
+        """Снимает метрики открытой страницы, сверяет с порогами и прикладывает к тесту"""
+        try:
+            raw = driver.execute_async_script(COLLECT_SCRIPT)
+        except WebDriverException as e:
+            logger.warning("Не удалось снять метрики страницы %s: %s", page, e)
+            return {}
+        metrics = parse_metrics(raw)
+        self.samples.setdefault(page, []).append(metrics)
+        for metric, threshold in self.thresholds.items():
+            if metric in metrics and metrics[metric] > threshold:
+                violation = Violation(page, metric, metrics[metric], threshold)
+                self.violations.append(violation)
+                self._pending.append(violation)
+        logger.info("Метрики страницы %s: %s", page, metrics)
+        allure.attach(
+            json.dumps({"page": page, "url": raw.get("url"), "observed": raw.get("observed"), "metrics": metrics},
+                       ensure_ascii=False, indent=2),
+            name=f"Метрики страницы: {page}",
+            attachment_type=allure.attachment_type.JSON
+        )
+        runs = [run["pages"][page] for run in self.previous_runs() if page in run["pages"]]
+        allure.attach(
+            trend_svg(f"{page}: прогонов {len(runs) + 1}, профиль {self.network_profile}", runs + [metrics]),
+            name=f"Тренд метрик страницы: {page}",
+            attachment_type=allure.attachment_type.SVG
+        )
+        return metrics
+
+    def previous_runs(self) -> list[dict]:
+        if self._previous_runs is None:
+            self._previous_runs = self.history.runs(self.network_profile)
+        return self._previous_runs
+
+    def take_violations(self) -> list[Violation]:
+        """Нарушения порогов с прошлого вызова (для проверки в конце теста)"""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def run_record(self) -> dict:
+        """Медианы метрик по страницам за прогон"""
+        pages = {}
+        for page, samples in self.samples.items():
+            names = {name for sample in samples for name in sample}
+            pages[page] = {
+                name: round(statistics.median(s[name] for s in samples if name in s), 4) for name in sorted(names)
+            }
+        return {
+            "schema": SCHEMA_VERSION,
+            "run_id": self.run_id,
+            "started": self.started,
+            "network_profile": self.network_profile,
+            "samples": {page: len(samples) for page, samples in self.samples.items()},
+            "pages": pages,
+        }
+
+    def save(self, worker: str = "main") -> Optional[Path]:
+        if not self.samples:
+            return None
+        path = self.history.write(self.run_record(), worker)
+        logger.info("Метрики страниц прогона сохранены: %s", path)
+        return path
+
+    def summary_lines(self) -> list[str]:
+        lines = []
+        for page, metrics in self.run_record()["pages"].items():
+            shown = ", ".join(f"{name}={metrics[name]:.4g}" for name in CHART_METRICS if name in metrics)
+            lines.append(f"{page} (замеров {len(self.samples[page])}): {shown}")
+        for violation in self.violations:
+            lines.append(f"Превышен порог: {violation}")
+        return lines
+
+
+def activate(collector: Optional[WebVitalsCollector]) -> None:
+    global _current
+    _current = collector
+
+
+def current_collector() -> Optional[WebVitalsCollector]:
+    return _current
+
+
+def collect_page_metrics(driver: WebDriver, page: str) -> dict[str, float]:
+    """Снимает метрики страницы текущим сборщиком; без сборщика ничего не делает"""
+    if _current is None:
+        return {}
+    return _current.collect(driver, page)
@@ -0,0 +1,105 @@
+import json
+import allure
+import pytest
+from tests.support.allure_summary import (
+    STATE_FILE, build_summary, collect_runs, compact_history, main, update_history
+)
+
+
+def write_result(results_dir, uuid: str, history_id: str, status: str, start: int, stop: int):
+    """Результат allure-pytest: только поля, которые читает сводка"""
+    results_dir.mkdir(exist_ok=True)
+    result = {
+        "uuid": uuid, "historyId": history_id, "fullName": f"tests.test_x#{history_id}", "name": history_id,
+        "status": status, "start": start, "stop": stop,
+        "statusDetails": {"message": "AssertionError"} if status == "failed" else {},
+    }
+    (results_dir / f"{uuid}-result.json").write_text(json.dumps(result), encoding="utf-8")
+
+
+def read_json(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+@allure.feature("Reporting")
+@pytest.mark.reporting
+class TestAllureSummary:
+
+    @allure.step("Перезапуски сводятся к последней попытке")
+    def test_collect_runs_retries(self, tmp_path):
+        results = tmp_path / "allure-results"
+        write_result(results, "a1", "a", "failed", 0, 100)
+        write_result(results, "a2", "a", "passed", 200, 250)
+        write_result(results, "b1", "b", "failed", 0, 300)
+        (results / "c-container.json").write_text("{}", encoding="utf-8")
+
+        runs = collect_runs(results)
+
+        assert sorted(runs) == ["a", "b"]
+        assert runs["a"].uuid == "a2" and runs["a"].status == "passed"
+        assert runs["a"].attempts == ["failed", "passed"] and runs["a"].retries == 1
+        assert runs["a"].flaky and not runs["b"].flaky
+        assert runs["b"].message == "AssertionError"
+
+    @allure.step("Нет каталога результатов или он пуст — понятная ошибка")
+    def test_collect_runs_missing_or_empty(self, tmp_path):
+        with pytest.raises(SystemExit, match="не найден"):
+            collect_runs(tmp_path / "missing")
+        (tmp_path / "empty").mkdir()
+        with pytest.raises(SystemExit, match="нет результатов"):
+            collect_runs(tmp_path / "empty")
+
+    @allure.step("Повторный запуск по тем же результатам не дублирует историю")
+    def test_update_history_dedupes_run(self, tmp_path):
+        results, history_dir = tmp_path / "allure-results", tmp_path / "history"
+        write_result(results, "a1", "a", "passed", 0, 100)
+        runs = collect_runs(results)
+
+        assert update_history(history_dir, runs, max_runs=5)
+        assert not update_history(history_dir, runs, max_runs=5)
+
+        history = read_json(history_dir / "history.json")
+        assert [item["uid"] for item in history["a"]["items"]] == ["a1"]
+        assert len(read_json(history_dir / "history-trend.json")) == 1
+        assert read_json(history_dir / STATE_FILE)["build_order"] == 1
+
+    @allure.step("В истории остаются только max_runs последних прогонов")
+    def test_update_history_trims(self, tmp_path):
+        history_dir = tmp_path / "history"
+        for run in range(4):
+            results = tmp_path / f"run{run}"
+            write_result(results, f"a{run}", "a", "failed" if run % 2 else "passed", run * 1000, run * 1000 + 10)
+            update_history(history_dir, collect_runs(results), max_runs=3)
+
+        entry = read_json(history_dir / "history.json")["a"]
+        assert [item["uid"] for item in entry["items"]] == ["a3", "a2", "a1"]
+        assert entry["statistic"]["failed"] == 2 and entry["statistic"]["total"] == 3
+        trend = read_json(history_dir / "history-trend.json")
+        assert [point["buildOrder"] for point in trend] == [4, 3, 2]
+
+        # Одна запись истории теста и по одной точке в каждом из четырёх трендов
+        assert compact_history(history_dir, max_runs=2) == 5
+        assert len(read_json(history_dir / "history.json")["a"]["items"]) == 2
+
+    @allure.step("Тест, менявший статус в истории, попадает в нестабильные")
+    def test_summary_flaky_from_history(self, tmp_path):
+        history_dir = tmp_path / "history"
+        for run, status in enumerate(("failed", "passed")):
+            results = tmp_path / f"run{run}"
+            write_result(results, f"a{run}", "a", status, run * 1000, run * 1000 + 10)
+            write_result(results, f"b{run}", "b", "passed", run * 1000, run * 1000 + 500)
+            runs = collect_runs(results)
+            update_history(history_dir, runs, max_runs=5)
+
+        summary = build_summary(runs, read_json(history_dir / "history.json"), top_n=1)
+
+        assert summary["flaky"] == ["tests.test_x#a"]
+        assert summary["failed"] == []
+        assert summary["slowest"] == [{"name": "tests.test_x#b", "duration": 500}]
+        assert summary["statistic"]["passed"] == 2
+
+    @allure.step("Утилита без результатов завершается сообщением, а не трассировкой")
+    def test_main_without_results(self, tmp_path):
+        with pytest.raises(SystemExit, match="не найден"):
+            main([str(tmp_path / "allure-results"), "-r", str(tmp_path / "report")])
+        assert not (tmp_path / "report").exists()
@@ -2,45 +2,52 @@ import pytest
 import allure
 import json
 import logging
+from requests import RequestException
+from tests.support.corpus import CorpusReport
+from tests.support.latency_baseline import aggregate_latency
+from tests.support.load_generator import LoadGenerator, LoadProfile
+from tests.support.search_contract import check_search_response
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def search_payload(query: str) -> dict:
+    """Тело запроса поиска для центра Москвы"""
+    return {
+        "text": query,
+        "location": {"latitude": 55.7558, "longitude": 37.6173}
+    }
+
+
 @pytest.mark.api
 class TestAPI:
 
     @allure.step("Тестирование позитивных сценариев поиска")
     @pytest.mark.api_positive
+    @pytest.mark.api_prefetch(lambda params: search_payload(params["query"]))
     @pytest.mark.parametrize("query", [
         "Цыпленок тапака",
         "кафе",
         "pizza"
     ], ids=["chicken_tapaka", "cafe", "pizza_english"])
-    def test_search_positive_cases(self, api_client, config_data, query, headers):
+    def test_search_positive_cases(self, api_post, config_data, query):
         url = config_data['base']['api_url']
-        payload = {
-            "text": query,
-            "location": {"latitude": 55.7558, "longitude": 37.6173}
-        }
+        payload = search_payload(query)
         with allure.step(f"Поиск: '{query}'"):
-            response = api_client.post(
-                url,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=config_data.getint("api", "timeout"),
-            )
+            response = api_post(url, payload)
 
         with allure.step("Проверка успешного ответа"):
             assert (
                 response.status_code == 200
             ), f"Ожидался статус 200, получен {response.status_code}"
-            assert response.json() is not None, "Ответ должен содержать JSON"
+
+        with allure.step("Проверка контракта ответа"):
+            contract = check_search_response(response.content)
+            assert contract.ok, contract.summary()
 
     @allure.step("Тестирование производительности поиска")
     @pytest.mark.api_performance
-    def test_search_performance(self, api_client, config_data, headers, benchmark):
+    def test_search_performance(self, api_client, config_data, headers):
         url = config_data['base']['api_url']
         payload = {
             "text": "пицца",
@@ -57,13 +64,83 @@ class TestAPI:
             assert response.status_code == 200, (
                 f"Ожидался статус 200, получен {response.status_code}"
             )
-            response_json = response.json()
-            assert "blocks" in response_json, "Ответ должен содержать поле 'blocks'"
+            contract = check_search_response(response.content)
+            assert contract.ok, contract.summary()
             return response
 
-        benchmark(make_request)
+        # Задержка каждого запроса записывается хуком api_client и сравнивается с базовой линией
+        for _ in range(config_data.getint('performance', 'search_rounds', fallback=5)):
+            make_request()
         logger.info("Тест производительности успешно завершен")
 
+    @allure.step("Нагрузочное тестирование поиска")
+    @pytest.mark.api_performance
+    @pytest.mark.api_load
+    def test_search_load(self, search_url, config_data, headers):
+        profile = LoadProfile.from_config(config_data)
+        threshold_ms = config_data.getfloat("performance", "api_response_threshold_ms")
+        checked = [p.strip() for p in config_data.get("load", "slo_percentiles", fallback="p99").split(",")]
+
+        with allure.step(
+            f"Нагрузка: {profile.concurrency} потоков, {profile.rate or 'макс.'} запросов/с, "
+            f"{profile.duration} с"
+        ):
+            report = LoadGenerator(search_url, profile, headers).run()
+            allure.attach(
+                report.summary(),
+                name="Результаты нагрузки",
+                attachment_type=allure.attachment_type.TEXT
+            )
+
+        with allure.step("Проверка ошибок и перцентилей задержки"):
+            assert report.requests > 0, "Не выполнено ни одного запроса"
+            assert report.error_rate == 0, f"Есть ошибочные ответы: {report.status_counts}"
+            violations = report.slo_violations(threshold_ms, checked)
+            assert not violations, f"Нарушен порог задержки: {', '.join(violations)}"
+
+    @allure.step("Поиск по корпусу запросов")
+    @pytest.mark.api_corpus
+    @pytest.mark.parametrize("corpus", ["search_queries"], indirect=True)
+    def test_search_corpus(self, api_client, config_data, headers, corpus):
+        url = config_data['base']['api_url']
+        report = CorpusReport(corpus.name)
+
+        # Задержки и время проверки контракта сводятся по корпусу: в базовую линию — только перцентили
+        with allure.step(corpus.describe()), aggregate_latency():
+            for row in corpus:
+                expected_status = int(row.get("expected_status") or 200)
+                payload = {
+                    "text": row["query"],
+                    "location": {"latitude": 55.7558, "longitude": 37.6173}
+                }
+                try:
+                    response = api_client.post(
+                        url,
+                        headers=headers,
+                        data=json.dumps(payload),
+                        timeout=config_data.getint("api", "timeout"),
+                    )
+                except RequestException as e:
+                    report.record(row, f"{type(e).__name__}: {e}")
+                    continue
+                if response.status_code != expected_status:
+                    report.record(row, f"статус {response.status_code}, ожидался {expected_status}")
+                    continue
+                if response.status_code == 200:
+                    contract = check_search_response(response.content)
+                    if not contract.ok:
+                        report.record(row, contract.summary(limit=3).replace("\n", ";"))
+                        continue
+                report.record(row)
+
+        allure.attach(report.summary(), name="Итоги корпуса", attachment_type=allure.attachment_type.TEXT)
+        if report.failures:
+            allure.attach(report.failures_csv(), name="Ошибки корпуса", attachment_type=allure.attachment_type.CSV)
+
+        with allure.step("Проверка результатов по корпусу"):
+            assert report.total > 0, f"Корпус {corpus.name} не дал ни одной строки"
+            assert report.failed == 0, report.summary()
+
     @pytest.mark.api_negative
     @allure.step("Тестирование негативных сценариев поиска")
     @pytest.mark.parametrize(
@@ -74,20 +151,13 @@ class TestAPI:
             {"query": "", "expected_status": 200},
             {"query": "   ", "expected_status": 200},
         ], ids=["non_existent", "zero", "empty", "spaces"])
-    def test_search_negative_cases(self, api_client, config_data, headers, test_data):
+    @pytest.mark.api_prefetch(lambda params: search_payload(params["test_data"]["query"]))
+    def test_search_negative_cases(self, api_post, config_data, test_data):
         url = config_data["base"]["api_url"]
-        payload = {
-            "text": test_data["query"],
-            "location": {"latitude": 55.7558, "longitude": 37.6173},
-        }
+        payload = search_payload(test_data["query"])
 
         with allure.step(f"Отправка запроса с query: '{test_data['query']}'"):
-            response = api_client.post(
-                url,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=config_data.getint("api", "timeout"),
-            )
+            response = api_post(url, payload)
 
         with allure.step("Проверка статус кода"):
             assert response.status_code == test_data["expected_status"], (
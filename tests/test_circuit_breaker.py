@@ -0,0 +1,116 @@
+import allure
+import pytest
+from tests.support.circuit_breaker import CAPTCHA, CLOSED, CONNECTION, HALF_OPEN, OPEN, CircuitBreaker
+
+PROBE_INTERVAL = 60
+
+
+class FakeClock:
+    """Часы предохранителя: время идёт, только когда тест его двигает"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeProbe:
+    """Проверка сайта: возвращает заданную проблему или None, если сайт ожил"""
+
+    def __init__(self):
+        self.problem = "connection: ConnectionError"
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.problem
+
+
+def make_breaker(threshold: int = 3):
+    clock, probe = FakeClock(), FakeProbe()
+    breaker = CircuitBreaker("api", threshold, PROBE_INTERVAL, probe, clock=clock)
+    return breaker, clock, probe
+
+
+def fail(breaker, count: int, kind=CONNECTION) -> None:
+    for i in range(count):
+        breaker.record(f"t::{kind}{i}", kind, passed=False)
+
+
+@allure.feature("Health")
+@pytest.mark.health
+class TestCircuitBreaker:
+
+    @allure.step("Серия сбоев одного вида размыкает предохранитель")
+    def test_trip(self):
+        breaker, _, probe = make_breaker()
+        fail(breaker, 2)
+        assert breaker.state == CLOSED and breaker.allow() is None
+        fail(breaker, 1)
+        assert breaker.state == OPEN
+        assert breaker.trip.kind == CONNECTION and breaker.trip.failures == 3
+        # Сразу после размыкания сайт не проверяется: тесты пропускаются до probe_interval
+        assert "разомкнут" in breaker.allow()
+        assert probe.calls == 0 and breaker.trip.short_circuited == 1
+
+    @allure.step("Сбой другого вида или обычное падение обрывает серию")
+    def test_other_outcomes_reset_series(self):
+        breaker, _, _ = make_breaker()
+        fail(breaker, 2, CONNECTION)
+        fail(breaker, 1, CAPTCHA)
+        fail(breaker, 1, CONNECTION)
+        assert breaker.state == CLOSED
+        assert breaker.failures == {CONNECTION: 1}
+        breaker.record("t::assert", None, passed=False)
+        assert breaker.failures == {}
+        fail(breaker, 2, CONNECTION)
+        assert breaker.state == CLOSED
+
+    @allure.step("Проверка сайта раз в probe_interval, пока сайт лежит")
+    def test_probe_failure_keeps_open(self):
+        breaker, clock, probe = make_breaker()
+        fail(breaker, 3)
+        clock.advance(PROBE_INTERVAL - 1)
+        assert breaker.allow() is not None and probe.calls == 0
+        clock.advance(1)
+        reason = breaker.allow()
+        assert probe.calls == 1 and breaker.state == OPEN
+        assert "ConnectionError" in reason
+        # Следующая проверка — снова через полный интервал
+        clock.advance(PROBE_INTERVAL / 2)
+        breaker.allow()
+        assert probe.calls == 1 and breaker.trip.probes == 1
+
+    @allure.step("Пробный тест падает из-за сбоя — предохранитель снова разомкнут")
+    def test_half_open_reopen(self):
+        breaker, clock, probe = make_breaker()
+        fail(breaker, 3)
+        clock.advance(PROBE_INTERVAL)
+        probe.problem = None
+        assert breaker.allow() is None and breaker.state == HALF_OPEN
+        breaker.record("t::probe", CAPTCHA, passed=False)
+        assert breaker.state == OPEN
+        assert len(breaker.trips) == 1
+        assert breaker.trip.kind == CAPTCHA and breaker.trip.failures == 4
+        assert breaker.trip.test_id == "t::probe"
+        # Интервал проверки отсчитывается заново от повторного размыкания
+        assert breaker.allow() is not None and probe.calls == 1
+
+    @allure.step("Пробный тест прошёл — предохранитель замкнут")
+    def test_half_open_close(self):
+        breaker, clock, probe = make_breaker()
+        fail(breaker, 3)
+        clock.advance(PROBE_INTERVAL)
+        probe.problem = None
+        assert breaker.allow() is None
+        clock.advance(5)
+        breaker.record("t::probe", None, passed=True)
+        assert breaker.state == CLOSED and breaker.trip is None
+        assert breaker.failures == {}
+        trip = breaker.trips[-1]
+        assert trip.closed_at - trip.opened_at == PROBE_INTERVAL + 5
+        assert breaker.allow() is None
@@ -0,0 +1,84 @@
+import allure
+import pytest
+import logging
+from dataclasses import replace
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from tests.pages.main_page import MainPage
+from tests.support.harness_bench import repeat
+from tests.support.latency_baseline import measure
+from tests.support.waits import configure, current_settings
+from utils import close_popup
+
+logger = logging.getLogger(__name__)
+
+
+@allure.feature("Harness Benchmarks")
+@pytest.mark.harness_bench
+class TestHarness:
+    """Накладные расходы самого стенда. Замеры сравниваются с базовой линией задержек
+    (фикстура latency) и обновляются с --update-baseline."""
+
+    @allure.step("Загрузка конфигурации и тестовых данных")
+    def test_config_loading(self, harness, bench_settings):
+        repeat("harness:load_config", harness.load_config, bench_settings.rounds, bench_settings.warmup)
+        data = repeat("harness:load_test_data", harness.load_test_data, bench_settings.rounds, bench_settings.warmup)
+        assert all(isinstance(item, dict) for item in data), "Тестовые данные должны загружаться как словарь"
+
+    @allure.step("Разрешение пути к chromedriver")
+    def test_driver_resolve(self, harness, bench_settings):
+        paths = repeat("harness:resolve_driver", harness.resolve_driver, bench_settings.rounds, bench_settings.warmup)
+        assert len(set(paths)) == 1, f"Путь к chromedriver меняется между вызовами: {set(paths)}"
+
+    @allure.step("Холодный запуск и закрытие Chrome")
+    def test_driver_start(self, harness, bench_settings):
+        for _ in range(bench_settings.driver_rounds):
+            with measure("harness:driver_start"):
+                driver = harness.start_chrome()
+            with measure("harness:driver_quit"):
+                driver.quit()
+
+    @allure.step("Аренда прогретого браузера из пула")
+    def test_pool_lease(self, browser_pool, bench_settings):
+        def lease():
+            with browser_pool.lease():
+                pass
+
+        repeat("harness:pool_lease", lease, bench_settings.rounds, bench_settings.warmup)
+
+    # Замеры ниже арендуют браузер из пула напрямую: фикстура driver добавляет свои накладные расходы
+    # (журнал производительности, Web Vitals, трафик теста), которые не относятся к замеряемой операции
+    @allure.step("close_popup без всплывающего окна")
+    def test_close_popup_absent(self, browser_pool, static_page, bench_settings):
+        with browser_pool.lease() as driver:
+            driver.get(static_page.url)
+            closed = repeat("harness:close_popup_absent", lambda: close_popup(driver), bench_settings.rounds)
+        assert not any(closed), "На статической странице не должно быть всплывающего окна"
+
+    @allure.step("Ожидание присутствующего элемента")
+    def test_wait_present(self, browser_pool, static_page, bench_settings):
+        with browser_pool.lease() as driver:
+            page = MainPage(driver)
+            driver.get(static_page.url)
+            repeat(
+                "harness:wait_present", lambda: page.wait_for_element(page.SEARCH_INPUT),
+                bench_settings.rounds, bench_settings.warmup
+            )
+
+    @allure.step("Ожидание отсутствующего элемента до таймаута")
+    def test_wait_absent(self, browser_pool, static_page, bench_settings):
+        missing = (By.CSS_SELECTOR, "[data-testid='harness-missing']")
+        settings = current_settings()
+        configure(replace(settings, default_timeout=bench_settings.absent_timeout))
+        try:
+            with browser_pool.lease() as driver:
+                page = MainPage(driver)
+                driver.get(static_page.url)
+
+                def wait_absent():
+                    with pytest.raises(TimeoutException):
+                        page.wait_for_element(missing)
+
+                repeat("harness:wait_absent", wait_absent, bench_settings.rounds)
+        finally:
+            configure(settings)
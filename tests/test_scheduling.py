@@ -0,0 +1,80 @@
+import allure
+import pytest
+from types import SimpleNamespace
+from tests.support.scheduling import longest_first, lpt_partition, main, merge_results
+
+
+def make_items(estimates: dict[str, float]) -> list:
+    """Заглушки собранных тестов: планировщику нужен только nodeid"""
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in estimates]
+
+
+def write_shard(root, name: str, files: dict[str, str]):
+    shard = root / name
+    shard.mkdir()
+    for file_name, text in files.items():
+        (shard / file_name).write_text(text, encoding="utf-8")
+    return shard
+
+
+@allure.feature("Scheduling")
+@pytest.mark.scheduling
+class TestScheduling:
+
+    @allure.step("Сортировка тестов по убыванию оценки")
+    def test_longest_first(self):
+        estimates = {"t::b": 5.0, "t::a": 5.0, "t::c": 30.0, "t::d": 1.0}
+        ordered = longest_first(make_items(estimates), estimates)
+        # При равной оценке порядок определяется nodeid, а не порядком сбора
+        assert [item.nodeid for item in ordered] == ["t::c", "t::a", "t::b", "t::d"]
+
+    @allure.step("Раскладка тестов по шардам (LPT)")
+    def test_lpt_partition(self):
+        estimates = {"t::a": 7.0, "t::b": 6.0, "t::c": 5.0, "t::d": 4.0, "t::e": 3.0, "t::f": 2.0}
+        shards = lpt_partition(make_items(estimates), estimates, 2)
+        loads = [sum(estimates[item.nodeid] for item in shard) for shard in shards]
+        assert sorted(item.nodeid for shard in shards for item in shard) == sorted(estimates)
+        assert [item.nodeid for item in shards[0]] == ["t::a", "t::d", "t::e"]
+        assert [item.nodeid for item in shards[1]] == ["t::b", "t::c", "t::f"]
+        assert loads == [14.0, 13.0]
+
+    @allure.step("Шардов больше, чем тестов")
+    def test_lpt_partition_more_shards_than_items(self):
+        estimates = {"t::a": 3.0, "t::b": 1.0}
+        shards = lpt_partition(make_items(estimates), estimates, 3)
+        assert [[item.nodeid for item in shard] for shard in shards] == [["t::a"], ["t::b"], []]
+
+    @allure.step("Объединение allure-results шардов")
+    def test_merge_results(self, tmp_path):
+        first = write_shard(tmp_path, "shard0", {
+            "a-result.json": "{}",
+            "categories.json": "first",
+            "environment.properties": "Browser=Chrome\nShard=0\n",
+        })
+        second = write_shard(tmp_path, "shard1", {
+            "b-result.json": "{}",
+            "categories.json": "second",
+            "environment.properties": "Shard=1\nApi=live\n",
+        })
+        target = tmp_path / "merged"
+
+        copied = merge_results([first, second], target)
+
+        assert copied == 3
+        assert sorted(p.name for p in target.iterdir()) == [
+            "a-result.json", "b-result.json", "categories.json", "environment.properties"
+        ]
+        # Общие файлы берутся из первого шарда, переменные окружения — первое значение ключа
+        assert (target / "categories.json").read_text(encoding="utf-8") == "first"
+        environment = (target / "environment.properties").read_text(encoding="utf-8")
+        assert environment == "Browser=Chrome\nShard=0\nApi=live\n"
+
+    @allure.step("Команда merge из командной строки")
+    def test_merge_cli(self, tmp_path):
+        first = write_shard(tmp_path, "shard0", {"a-result.json": "{}"})
+        second = write_shard(tmp_path, "shard1", {"b-result.json": "{}"})
+        target = tmp_path / "merged"
+
+        main(["merge", str(first), str(second), "-o", str(target)])
+
+        assert sorted(p.name for p in target.iterdir()) == ["a-result.json", "b-result.json"]
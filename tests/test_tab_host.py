@@ -0,0 +1,79 @@
+import allure
+import pytest
+import threading
+import time
+from types import SimpleNamespace
+from selenium.webdriver.common.by import By
+from tests.support.batch_actions import ActionBatch
+from tests.support.tab_host import CommandLock
+
+ITEM = (By.CSS_SELECTOR, "[data-testid='item']")
+# Через сколько секунд после начала ожидания элемент появляется на странице
+APPEARS_AFTER = 0.6
+
+
+class FakeTab:
+    """Вкладка общей сессии: скрипт батча держит блокировку команд, пока ждёт элемент"""
+
+    def __init__(self, lock: CommandLock, appears_at: float, script_slice=None):
+        self.lock = lock
+        self.appears_at = appears_at
+        self.script_slice = script_slice
+        self.timeouts = SimpleNamespace(script=30)
+        self.calls = 0
+
+    def set_script_timeout(self, seconds):
+        self.timeouts.script = seconds
+
+    def execute_async_script(self, script, steps, timeout_ms, *args):
+        with self.lock:
+            self.calls += 1
+            wait = max(0.0, self.appears_at - time.monotonic())
+            if wait <= timeout_ms / 1000:
+                time.sleep(wait)
+                return {"ok": True, "values": {}, "elements": {"item": "element"}}
+            time.sleep(timeout_ms / 1000)
+            return {"ok": False, "timeout": True, "index": 0, "values": {}, "elements": {}, "error": "item"}
+
+
+def other_tab_commands(tmp_path, script_slice):
+    """Пока одна вкладка ждёт элемент в батче, другая выполняет короткие команды.
+
+    Возвращает вкладку с батчем и задержки команд другой вкладки (у каждой вкладки своя
+    блокировка на общем файле, как у воркеров xdist).
+    """
+    path = str(tmp_path / "commands.lock")
+    waiting = FakeTab(CommandLock(path), time.monotonic() + APPEARS_AFTER, script_slice)
+    other = CommandLock(path)
+    batch = ActionBatch(waiting, timeout=5).locate("item", ITEM)
+    thread = threading.Thread(target=batch.run)
+    thread.start()
+    time.sleep(0.05)
+    latencies = []
+    while thread.is_alive():
+        started = time.monotonic()
+        with other:
+            pass
+        latencies.append(time.monotonic() - started)
+        time.sleep(0.01)
+    thread.join()
+    return waiting, latencies
+
+
+@allure.feature("Tabs")
+@pytest.mark.tabs
+class TestTabHost:
+
+    @allure.step("Ожидание элемента в батче не держит общую блокировку")
+    def test_batch_wait_yields_lock(self, tmp_path):
+        waiting, latencies = other_tab_commands(tmp_path, script_slice=0.05)
+        assert waiting.calls > 1, "Батч должен ждать элемент несколькими короткими вызовами"
+        assert max(latencies) < 0.25, f"Команда другой вкладки ждала блокировку {max(latencies):.2f} с"
+        # За время ожидания другая вкладка успевает выполнять команды, а не стоит в очереди
+        assert len(latencies) >= 3, f"Другая вкладка выполнила только {len(latencies)} команд"
+
+    @allure.step("Без нарезки ожидание батча останавливает остальные вкладки")
+    def test_batch_wait_without_slice_blocks(self, tmp_path):
+        waiting, latencies = other_tab_commands(tmp_path, script_slice=None)
+        assert waiting.calls == 1
+        assert max(latencies) > APPEARS_AFTER / 2, "Проверка выше ничего не доказывает, если блокировка не мешала"
@@ -2,15 +2,14 @@ import allure
 import pytest
 import logging
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from tests.pages.main_page import MainPage
 from urllib.parse import urlparse, parse_qs
-from utils import close_popup, handle_captcha
+from tests.support.capture import capture_screenshot
+from tests.support.waits import current_settings, wait
+from utils import clear_page, handle_captcha
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -18,17 +17,17 @@ logger = logging.getLogger(__name__)
 @pytest.mark.ui
 class TestUI:
     @pytest.fixture(autouse=True)
-    def setup(self, driver, config_data, test_data):
+    def setup(self, driver, config_data, test_data, page_state):
         """Фикстура для инициализации страницы перед каждым тестом"""
         self.page = MainPage(driver)
         self.url = config_data['base']['base_url']
         self.test_data = test_data
-        self.page.open(self.url)
-        close_popup(driver)
-        WebDriverWait(driver, 15).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )
-        logger.info(f"Открыт URL: {self.url}")
+        if page_state is not None:
+            self.page.open_ready(self.url, page_state)
+        else:
+            self.page.open(self.url)
+            clear_page(driver)
+        logger.info("Открыт URL: %s", self.url)
         yield
 
     # ==================== ПОЗИТИВНЫЕ ТЕСТЫ ====================
@@ -40,12 +39,8 @@ class TestUI:
         try:
             self.page.search("пицца")
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка поиска",
-                attachment_type=allure.attachment_type.PNG
-            )
-            logger.error(f"Поиск не выполнен: {e}")
+            capture_screenshot(driver, "Ошибка поиска")
+            logger.error("Поиск не выполнен: %s", e)
             raise
 
         parsed_url = urlparse(driver.current_url)
@@ -65,15 +60,10 @@ class TestUI:
         """Тест увеличения масштаба страницы и поиска кнопки 'Найти'."""
         zoom_percentage = test_case['zoom_percentage']
         scale = zoom_percentage / 100
-        driver.execute_script(
+        current_zoom = driver.execute_script(
             f"document.body.style.transform = 'scale({scale})';"
-        )
-        driver.execute_script(
             "document.body.style.transformOrigin = '0 0';"
-        )
-
-        current_zoom = driver.execute_script(
-            "return document.body.style.transform"
+            "return document.body.style.transform;"
         )
         current_scale = (
             float(current_zoom.split("scale(")[1].split(")")[0])
@@ -87,24 +77,11 @@ class TestUI:
         )
 
         try:
-            find_button = self.page.wait_for_clickable(self.page.FIND_BUTTON)
-            driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-                find_button
-            )
-            driver.execute_script("arguments[0].click();", find_button)
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="После клика по кнопке 'Найти'",
-                attachment_type=allure.attachment_type.PNG
-            )
+            self.page.click(self.page.FIND_BUTTON)
+            capture_screenshot(driver, "После клика по кнопке 'Найти'")
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка поиска кнопки",
-                attachment_type=allure.attachment_type.PNG
-            )
-            logger.error(f"Клик по кнопке 'Найти' не удался: {e}")
+            capture_screenshot(driver, "Ошибка поиска кнопки")
+            logger.error("Клик по кнопке 'Найти' не удался: %s", e)
             pytest.fail(f"Кнопка 'Найти' не найдена или не кликабельна: {e}")
 
     @allure.step("Проверка выбора категории 'Десерты' в футере")
@@ -113,21 +90,15 @@ class TestUI:
         """Проверяет выбор категории 'Десерты'."""
         try:
             self.page.click_dessert_category()
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "h1.r1vfw7r0"))
-            )
-            title_element = driver.find_element(By.CSS_SELECTOR, "h1.r1vfw7r0")
-            assert "Доставка десертов" in title_element.text, (
+            title = self.page.read_text((By.CSS_SELECTOR, "h1.r1vfw7r0"))
+            assert "Доставка десертов" in title, (
                 f"Ожидаемый заголовок: 'Доставка десертов', "
-                f"текущий: '{title_element.text}'"
+                f"текущий: '{title}'"
             )
+            self.page.collect_metrics("dessert_category")
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка перехода в категорию",
-                attachment_type=allure.attachment_type.PNG
-            )
-            logger.error(f"Переход в категорию 'Десерты' не удался: {e}")
+            capture_screenshot(driver, "Ошибка перехода в категорию")
+            logger.error("Переход в категорию 'Десерты' не удался: %s", e)
             raise
 
     @allure.step("Проверка поиска с помощью клавиатуры")
@@ -135,17 +106,12 @@ class TestUI:
     def test_search_using_keyboard_navigation(self, driver):
         """Проверяет поиск с помощью клавиатуры (Tab и Enter)"""
         try:
-            search_input = self.page.wait_for_clickable(self.page.SEARCH_INPUT)
-            search_input.send_keys(Keys.TAB)
-            search_input.send_keys("пицца")
-            search_input.send_keys(Keys.ENTER)
+            # Нужны настоящие события клавиатуры, поэтому ввод через WebDriver одной командой
+            search_input = self.page.find(self.page.SEARCH_INPUT, state="clickable")
+            search_input.send_keys(Keys.TAB, "пицца", Keys.ENTER)
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка поиска с клавиатуры",
-                attachment_type=allure.attachment_type.PNG
-            )
-            logger.error(f"Поиск с клавиатуры не удался: {e}")
+            capture_screenshot(driver, "Ошибка поиска с клавиатуры")
+            logger.error("Поиск с клавиатуры не удался: %s", e)
             raise
 
         parsed_url = urlparse(driver.current_url)
@@ -157,35 +123,20 @@ class TestUI:
 
     @allure.step("Доступность политики конфиденциальности")
     @pytest.mark.ui_positive
-    def test_footer_links(self, driver, config_data):
+    def test_footer_links(self, driver):
         """Проверяет переход по ссылкам в футере."""
         original_handle = driver.current_window_handle
         try:
-            main_page = MainPage(driver)
-            main_page.open(config_data['base']['base_url'])
-            close_popup(driver)
-            handle_captcha(driver)
-
-            user_agreement_link = WebDriverWait(driver, 15).until(
-                EC.element_to_be_clickable((
-                    By.CSS_SELECTOR,
-                    "a[href*='term_of_use_dc']"
-                ))
-            )
-            driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-                user_agreement_link
-            )
-            driver.execute_script("arguments[0].click();", user_agreement_link)
-            WebDriverWait(driver, 15).until(EC.number_of_windows_to_be(2))
+            self.page.click((By.CSS_SELECTOR, "a[href*='term_of_use_dc']"))
+            wait(driver).until(EC.number_of_windows_to_be(2))
 
             for handle in driver.window_handles:
                 if handle != original_handle:
                     driver.switch_to.window(handle)
                     break
 
-            # Увеличиваем таймаут и используем общий селектор
-            WebDriverWait(driver, 30).until(
+            # Новая вкладка загружается дольше: таймаут навигации и общий селектор
+            wait(driver, timeout=current_settings().navigation_timeout).until(
                 EC.presence_of_element_located((
                     By.TAG_NAME,
                     "h1"
@@ -198,18 +149,11 @@ class TestUI:
                 f"Ожидался URL или заголовок с 'term_of_use' или 'соглашение', "
                 f"получен URL: '{driver.current_url}', заголовок: '{driver.title}'"
             )
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="После перехода на страницу соглашения",
-                attachment_type=allure.attachment_type.PNG
-            )
+            self.page.collect_metrics("terms")
+            capture_screenshot(driver, "После перехода на страницу соглашения")
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка перехода по ссылке",
-                attachment_type=allure.attachment_type.PNG
-            )
-            logger.error(f"Переход по ссылке в футере не удался: {e}")
+            capture_screenshot(driver, "Ошибка перехода по ссылке")
+            logger.error("Переход по ссылке в футере не удался: %s", e)
             pytest.fail(f"Не удалось перейти по ссылке в футере: {e}")
 
     # ==================== НЕГАТИВНЫЕ ТЕСТЫ ====================
@@ -220,68 +164,45 @@ class TestUI:
         """Негативный тест: вход с невалидным номером телефона"""
         try:
             self.page.click_login_button()
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.ID, "passp-field-phone"))
-            )
+            self.page.find((By.ID, "passp-field-phone"))
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка клика на кнопку 'Войти'",
-                attachment_type=allure.attachment_type.PNG
-            )
-            logger.error(f"Клик на кнопку 'Войти' не удался: {e}")
+            capture_screenshot(driver, "Ошибка клика на кнопку 'Войти'")
+            logger.error("Клик на кнопку 'Войти' не удался: %s", e)
             raise
 
         handle_captcha(driver)
 
         try:
-            phone_input = self.page.wait_for_element((By.ID, "passp-field-phone"))
-            phone_input.clear()
-            phone_input.send_keys("1000000000")
-            submit_button = self.page.wait_for_clickable((By.ID, "passp:sign-in"))
-            driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-                submit_button
+            # Поле телефона с маской ввода: текст вводится настоящими событиями клавиатуры
+            (
+                self.page.batch()
+                .locate("phone", (By.ID, "passp-field-phone"))
+                .type("phone", "1000000000", native=True)
+                .locate("submit", (By.ID, "passp:sign-in"), state="clickable")
+                .scroll("submit")
+                .click("submit")
+                .run()
             )
-            driver.execute_script("arguments[0].click();", submit_button)
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка ввода номера",
-                attachment_type=allure.attachment_type.PNG
-            )
-            logger.error(f"Ввод номера телефона не удался: {e}")
+            capture_screenshot(driver, "Ошибка ввода номера")
+            logger.error("Ввод номера телефона не удался: %s", e)
             pytest.fail(f"Не удалось выполнить вход: {e}")
 
         try:
-            error_message = WebDriverWait(driver, 15).until(
-                EC.visibility_of_element_located((
-                    By.CSS_SELECTOR,
-                    "[id='field:input-phone:hint'], div.Textinput-Hint.Textinput-Hint_state_error"
-                ))
-            )
-            assert error_message and error_message.is_displayed(), (
-                "Сообщение об ошибке не отображается"
-            )
+            error_text = self.page.read_text((
+                By.CSS_SELECTOR,
+                "[id='field:input-phone:hint'], div.Textinput-Hint.Textinput-Hint_state_error"
+            ), state="visible")
             expected_errors = [
                 "Недопустимый формат номера",
                 "Неверный формат номера",
                 "Введите корректный номер"
             ]
-            assert any(text in error_message.text for text in expected_errors), (
+            assert any(text in error_text for text in expected_errors), (
                 f"Ожидаемое сообщение: {expected_errors}, "
-                f"получено: '{error_message.text}'"
+                f"получено: '{error_text}'"
             )
         except Exception as e:
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Ошибка проверки сообщения",
-                attachment_type=allure.attachment_type.PNG
-            )
-            allure.attach(
-                driver.page_source.encode('utf-8'),
-                name="Page Source",
-                attachment_type=allure.attachment_type.HTML
-            )
-            logger.error(f"Проверка сообщения об ошибке не удалась: {e}")
+            capture_screenshot(driver, "Ошибка проверки сообщения", page_source=True)
+            logger.error("Проверка сообщения об ошибке не удалась: %s", e)
             pytest.fail(f"Сообщение об ошибке не найдено: {e}")
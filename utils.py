@@ -1,84 +1,64 @@
 import logging
 import allure
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from tests.support.capture import capture_screenshot
+from tests.support.circuit_breaker import CAPTCHA, note_failure
+from tests.support.interstitials import InterstitialReport, clear_interstitials
+from tests.support.tracing import traced
+from tests.support.waits import wait
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def attach_interstitial_report(driver, report: InterstitialReport, name: str) -> None:
+    """Прикладывает к отчёту Allure итог обработки блокеров"""
+    allure.attach(
+        report.summary(),
+        name=name,
+        attachment_type=allure.attachment_type.TEXT
+    )
+    if not report.clear:
+        capture_screenshot(driver, f"{name}: страница не очищена")
+    if CAPTCHA in report.remaining:
+        # Если тест упадёт, причиной считается CAPTCHA, а не таймаут ожидания
+        note_failure(CAPTCHA)
+
+
+@traced("utils.close_popup", "utils")
 def close_popup(driver):
     """Утилитарная функция для закрытия всплывающего окна, если оно появляется"""
-    try:
-        popup_locator = (By.CSS_SELECTOR, "div.r1nk4da0")
-        popup = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located(popup_locator)
-        )
-        yes_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//button[.//span[text()='Да']]"
-            ))
-        )
-        driver.execute_script(
-            "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-            yes_button
-        )
-        yes_button.click()
-        WebDriverWait(driver, 10).until(
-            EC.invisibility_of_element(popup)
-        )
-        allure.attach(
-            driver.get_screenshot_as_png(),
-            name="После закрытия окна",
-            attachment_type=allure.attachment_type.PNG
-        )
+    report = clear_interstitials(driver, ["address_popup"])
+    attach_interstitial_report(driver, report, "Закрытие всплывающего окна")
+    if "address_popup" in report.handled_names():
         logger.info("Всплывающее окно успешно закрыто")
         return True
-    except Exception as e:
-        logger.warning(f"Всплывающее окно не найдено или не удалось закрыть: {e}")
-        allure.attach(
-            driver.get_screenshot_as_png(),
-            name="Ошибка закрытия попапа",
-            attachment_type=allure.attachment_type.PNG
-        )
-        return False
+    if report.clear:
+        logger.info("Всплывающее окно не появилось")
+    else:
+        logger.warning("Не удалось закрыть всплывающее окно: %s", report.summary())
+    return False
 
 
+@traced("utils.handle_captcha", "utils")
 def handle_captcha(driver):
     """Утилитарная функция для обработки CAPTCHA, если она появляется"""
-    try:
-        captcha_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//button[contains(text(), 'Я не робот') or contains(text(), 'I\\'m not a robot')]"
-            ))
-        )
-        driver.execute_script(
-            "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
-            captcha_button
-        )
-        captcha_button.click()
-        logger.info("Кнопка CAPTCHA нажата")
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.ID, "passp-field-phone"))
-        )
-        allure.attach(
-            driver.get_screenshot_as_png(),
-            name="После обработки CAPTCHA",
-            attachment_type=allure.attachment_type.PNG
-        )
-    except Exception as e:
-        logger.warning(f"CAPTCHA не найдена или не удалось обработать: {e}")
-        allure.attach(
-            driver.get_screenshot_as_png(),
-            name="Ошибка обработки CAPTCHA",
-            attachment_type=allure.attachment_type.PNG
-        )
-        driver.refresh()
-        WebDriverWait(driver, 15).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )
-        logger.info("Страница обновлена из-за CAPTCHA")
+    report = clear_interstitials(driver, ["captcha"])
+    attach_interstitial_report(driver, report, "Обработка CAPTCHA")
+    if report.clear:
+        if "captcha" in report.handled_names():
+            logger.info("CAPTCHA обработана")
+        return
+    logger.warning("CAPTCHA не удалось обработать: %s", report.summary())
+    driver.refresh()
+    # Проверка CAPTCHA здесь не должна прерывать ожидание: страница как раз перезагружается из-за неё
+    wait(driver, fail_fast=()).until(
+        lambda d: d.execute_script("return document.readyState") == "complete"
+    )
+    logger.info("Страница обновлена из-за CAPTCHA")
+
+
+@traced("utils.clear_page", "utils")
+def clear_page(driver):
+    """Убирает все известные блокеры (попап адреса, CAPTCHA и зарегистрированные) за один проход"""
+    report = clear_interstitials(driver)
+    attach_interstitial_report(driver, report, "Обработка блокеров страницы")
+    return report